@@ -3,28 +3,63 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
 import json
+from app.storage import RoutingSession, configure_storage, init_storage
+from app.fragment_cache import init_fragment_cache
+from app.metrics import init_metrics
+from app.sql_profiling import init_sql_profiling
 
 # Load environment variables
 load_dotenv()
 
 # Initialize SQLAlchemy
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
-def create_app():
+def create_app(init_db=None):
     """
     Application factory function to create and configure the Flask app
+    
+    Args:
+        init_db (bool): Create tables and seed sample data while booting. Defaults
+            to True, except when APP_ENV is 'production', where `flask init-db`
+            is run once instead so workers boot without touching the schema.
     """
     app = Flask(__name__, 
                 template_folder='../templates',
                 static_folder='../static')
     
     # Configure the app
+    app.config['APP_ENV'] = os.getenv('APP_ENV', 'development')
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default_secret_key')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', 'sqlite:///genai_pulse.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['API_MAX_BATCH_SIZE'] = int(os.getenv('API_MAX_BATCH_SIZE', 100))
+    app.config['FRAGMENT_CACHE_ENABLED'] = os.getenv('FRAGMENT_CACHE_ENABLED', '1') == '1'
+    app.config['FRAGMENT_CACHE_SIZE'] = int(os.getenv('FRAGMENT_CACHE_SIZE', 1024))
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', '1') == '1'
+    
+    # SQL profiling: 'off', 'header' (requests sending SQL_PROFILE_HEADER) or 'all'
+    app.config['SQL_PROFILING'] = os.getenv('SQL_PROFILING', 'off')
+    app.config['SQL_PROFILE_HEADER'] = os.getenv('SQL_PROFILE_HEADER', 'X-SQL-Profile')
+    app.config['SQL_PROFILE_TOKEN'] = os.getenv('SQL_PROFILE_TOKEN', '')
+    app.config['SQL_PROFILE_TOP'] = int(os.getenv('SQL_PROFILE_TOP', 5))
+    app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', 100))
+    app.config['SLOW_REQUEST_MS'] = float(os.getenv('SLOW_REQUEST_MS', 500))
+    app.config['SLOW_QUERY_LOG'] = os.getenv('SLOW_QUERY_LOG', '')
+    
+    # Storage mode: 'default', or 'wal' for SQLite with WAL and separate read/write engines
+    app.config['STORAGE_MODE'] = os.getenv('STORAGE_MODE', 'default')
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))
+    app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 268435456))
+    app.config['SQLITE_CACHE_SIZE'] = int(os.getenv('SQLITE_CACHE_SIZE', -65536))
+    configure_storage(app)
     
     # Initialize extensions
     db.init_app(app)
+    init_storage(app, db)
+    init_fragment_cache(app)
+    init_metrics(app)
+    init_sql_profiling(app, db)
     
     # Register blueprints
     from app.routes.main import main_bp
@@ -33,15 +68,17 @@ def create_app():
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp)
     
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+    
     # Create database tables and add sample data
-    with app.app_context():
-        from app.models import Library, Category, Version, library_categories
-        
-        db.create_all()
-        
-        # Add sample data if database is empty
-        if Category.query.count() == 0:
-            create_sample_data()
+    if init_db is None:
+        init_db = app.config['APP_ENV'] != 'production'
+    
+    if init_db:
+        with app.app_context():
+            init_database()
     
     # Add Jinja template filters
     @app.template_filter('now')
@@ -57,6 +94,110 @@ def create_app():
     
     return app
 
+def init_database():
+    """Create missing tables, seed an empty database and backfill derived tables"""
+    from app.models import Category, CatalogStat
+    from app.aggregates import rebuild_aggregates, CATALOG_STAT_ID
+    from app.version_history import remove_duplicate_versions
+    from app.versioning import populate_version_keys
+    from sqlalchemy import inspect
+    
+    db.create_all()
+    
+    # create_all skips tables that already exist, so add columns and indexes introduced since
+    added_columns = add_missing_columns()
+    if ('version', 'sort_key') in added_columns:
+        populate_version_keys()
+    if ('library', 'repository_key') in added_columns:
+        from app.projects import assign_repository_keys
+        assign_repository_keys()
+        db.session.commit()
+    
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.name == 'uq_version_library_number':
+                # Versions recorded twice before the index existed
+                remove_duplicate_versions()
+            index.create(bind=db.engine)
+    
+    # Tables created before the (name, language) constraint existed get it as a unique index;
+    # the PostgreSQL bulk upsert conflicts on it
+    existing = {index['name'] for index in inspector.get_indexes('library')} | \
+               {constraint['name'] for constraint in inspector.get_unique_constraints('library')}
+    if 'uq_library_name_language' not in existing:
+        from app.bulk_load import merge_duplicate_libraries
+        from sqlalchemy import text
+        merge_duplicate_libraries()
+        with db.engine.begin() as connection:
+            connection.execute(text("CREATE UNIQUE INDEX uq_library_name_language ON library (name, language)"))
+    
+    # Add sample data if database is empty
+    if Category.query.count() == 0:
+        create_sample_data()
+    elif db.session.get(CatalogStat, CATALOG_STAT_ID) is None:
+        # Databases created before the aggregate tables existed
+        rebuild_aggregates()
+
+def add_missing_columns():
+    """
+    Add model columns that are missing from existing tables
+    
+    Columns are added as nullable, with their scalar default (if any) as the
+    server default so existing rows get a value.
+    
+    Returns:
+        set: (table name, column name) pairs that were added
+    """
+    from sqlalchemy import inspect, text
+    
+    inspector = inspect(db.engine)
+    dialect = db.engine.dialect
+    added = set()
+    
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=dialect)}"
+            if column.default is not None and column.default.is_scalar:
+                ddl += f" DEFAULT {column.default.arg!r}"
+            
+            with db.engine.begin() as connection:
+                connection.execute(text(ddl))
+            added.add((table.name, column.name))
+    
+    return added
+
+def warm_up(app):
+    """
+    Do the lazy first-request work up front
+    
+    Called once in a preloading parent process (see gunicorn.conf.py) so forked
+    workers inherit compiled templates and imported modules instead of each
+    paying for them on their first request.
+    """
+    for template in app.jinja_env.list_templates():
+        if template.endswith('.html'):
+            app.jinja_env.get_template(template)
+    
+    # Modules that routes import on first use
+    from app import export  # noqa: F401
+    
+    # Map the catalog index once so forked workers share the mapping
+    from app.catalog_index import load_catalog_index
+    load_catalog_index()
+    
+    # Resolve relationships between models, which SQLAlchemy otherwise does on first query
+    from sqlalchemy.orm import configure_mappers
+    configure_mappers()
+
 def create_sample_data():
     """Create sample data for the application"""
     from app.models import Library, Category, Version, library_categories
@@ -287,4 +428,13 @@ def create_sample_data():
             db.session.add(version)
     
     # Commit all changes
-    db.session.commit() 
\ No newline at end of file
+    db.session.commit()
+    
+    # Normalize the sample scores the same way collected libraries are scored
+    from app.popularity import recompute_popularity
+    recompute_popularity()
+    db.session.commit()
+    
+    # Populate the aggregate tables for the new catalog
+    from app.aggregates import rebuild_aggregates
+    rebuild_aggregates() 
\ No newline at end of file
@@ -0,0 +1,194 @@
+from sqlalchemy import func
+from app import db
+from app.models import (Library, Category, library_categories, LanguageStat, CategoryStat,
+                        LanguageCategoryStat, CatalogStat)
+
+# Primary key of the single CatalogStat row
+CATALOG_STAT_ID = 1
+
+def language_counts():
+    """
+    Get the number of libraries per language
+
+    Returns:
+        list: (language, count) tuples ordered by language
+    """
+    return db.session.query(
+        LanguageStat.language,
+        LanguageStat.library_count
+    ).filter(
+        LanguageStat.library_count > 0
+    ).order_by(
+        LanguageStat.language
+    ).all()
+
+def category_counts(limit=None):
+    """
+    Get categories with their library counts, largest first
+
+    Args:
+        limit (int): Maximum number of categories to return
+
+    Returns:
+        list: (id, name, library_count) rows
+    """
+    query = db.session.query(
+        Category.id,
+        Category.name,
+        CategoryStat.library_count
+    ).join(
+        CategoryStat, CategoryStat.category_id == Category.id
+    ).filter(
+        CategoryStat.library_count > 0
+    ).order_by(
+        CategoryStat.library_count.desc()
+    )
+
+    if limit:
+        query = query.limit(limit)
+
+    return query.all()
+
+def category_count_column():
+    """Column expression for a category's library count, for queries outer-joined to CategoryStat"""
+    return func.coalesce(CategoryStat.library_count, 0)
+
+def catalog_summary():
+    """
+    Get the catalog-wide totals
+
+    Returns:
+        CatalogStat: Summary row (an empty, unsaved one if the catalog was never aggregated)
+    """
+    return db.session.get(CatalogStat, CATALOG_STAT_ID) or CatalogStat(total_libraries=0, last_update=None, generation=0)
+
+def record_new_library(library):
+    """
+    Add a newly inserted library to the aggregates
+
+    Must be called once the library's categories are attached. Changes are
+    added to the current session and committed with the caller's transaction.
+
+    Args:
+        library (Library): The new library
+    """
+    catalog = _get_or_create(CatalogStat, id=CATALOG_STAT_ID)
+    catalog.total_libraries = (catalog.total_libraries or 0) + 1
+    _bump_last_update(catalog, library.last_update)
+
+    category_ids = {category.id for category in library.categories}
+
+    for category_id in category_ids:
+        stat = _get_or_create(CategoryStat, category_id=category_id)
+        stat.library_count = (stat.library_count or 0) + 1
+
+    if library.language is None:
+        return
+
+    stat = _get_or_create(LanguageStat, language=library.language)
+    stat.library_count = (stat.library_count or 0) + 1
+
+    for category_id in category_ids:
+        stat = _get_or_create(LanguageCategoryStat, language=library.language, category_id=category_id)
+        stat.library_count = (stat.library_count or 0) + 1
+
+def record_library_update(library, previous_last_update=None):
+    """
+    Fold an updated library's last_update into the catalog summary
+
+    If the library held the catalog's latest update and its last_update moved
+    back, the latest update is recomputed from the library table.
+
+    Args:
+        library (Library): The updated library
+        previous_last_update (datetime): The library's last_update before the change
+    """
+    catalog = _get_or_create(CatalogStat, id=CATALOG_STAT_ID)
+
+    held_latest = previous_last_update is not None and catalog.last_update is not None and \
+        previous_last_update >= catalog.last_update
+    if held_latest and (library.last_update is None or library.last_update < previous_last_update):
+        catalog.last_update = db.session.query(func.max(Library.last_update)).scalar()
+    else:
+        _bump_last_update(catalog, library.last_update)
+
+def bump_generation():
+    """
+    Mark the catalog data as changed
+
+    Cached page fragments are keyed on the generation, so they are rendered
+    afresh after the caller's transaction commits.
+    """
+    catalog = _get_or_create(CatalogStat, id=CATALOG_STAT_ID)
+    catalog.generation = (catalog.generation or 0) + 1
+
+def rebuild_aggregates():
+    """Recompute every aggregate table from scratch and commit"""
+    generation = db.session.query(CatalogStat.generation).filter_by(id=CATALOG_STAT_ID).scalar() or 0
+
+    LanguageCategoryStat.query.delete()
+    LanguageStat.query.delete()
+    CategoryStat.query.delete()
+    CatalogStat.query.delete()
+
+    language_rows = db.session.query(
+        Library.language,
+        func.count(Library.id)
+    ).filter(
+        Library.language.isnot(None)
+    ).group_by(
+        Library.language
+    ).all()
+
+    for language, count in language_rows:
+        db.session.add(LanguageStat(language=language, library_count=count))
+
+    category_rows = db.session.query(
+        library_categories.c.category_id,
+        func.count(library_categories.c.library_id)
+    ).group_by(
+        library_categories.c.category_id
+    ).all()
+
+    for category_id, count in category_rows:
+        db.session.add(CategoryStat(category_id=category_id, library_count=count))
+
+    pair_rows = db.session.query(
+        Library.language,
+        library_categories.c.category_id,
+        func.count(Library.id)
+    ).join(
+        library_categories, library_categories.c.library_id == Library.id
+    ).filter(
+        Library.language.isnot(None)
+    ).group_by(
+        Library.language,
+        library_categories.c.category_id
+    ).all()
+
+    for language, category_id, count in pair_rows:
+        db.session.add(LanguageCategoryStat(language=language, category_id=category_id, library_count=count))
+
+    total, last_update = db.session.query(func.count(Library.id), func.max(Library.last_update)).one()
+    db.session.add(CatalogStat(id=CATALOG_STAT_ID, total_libraries=total, last_update=last_update,
+                               generation=generation + 1))
+
+    db.session.commit()
+
+def _get_or_create(model, **key):
+    """Load an aggregate row by primary key, adding a zeroed one to the session if missing"""
+    pk = tuple(key.values()) if len(key) > 1 else next(iter(key.values()))
+    row = db.session.get(model, pk)
+
+    if row is None:
+        row = model(**key)
+        db.session.add(row)
+        # Flush so the next lookup in this transaction finds the row
+        db.session.flush()
+
+    return row
+
+def _bump_last_update(catalog, last_update):
+    """Advance the catalog's last_update if the given timestamp is newer"""
+    if last_update and (catalog.last_update is None or last_update > catalog.last_update):
+        catalog.last_update = last_update
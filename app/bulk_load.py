@@ -0,0 +1,420 @@
+import csv
+import io
+import logging
+import os
+from datetime import datetime
+from sqlalchemy import select, update, delete, bindparam, func
+from app import db
+from app.versioning import parse_version
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Set BULK_LOAD=0 to force the row-by-row ORM path on PostgreSQL
+BULK_LOAD_ENABLED = os.getenv('BULK_LOAD', '1') == '1'
+
+# NULL marker used in the CSV fed to COPY; quoted values never match it
+COPY_NULL = r'\N'
+
+def supports_copy():
+    """
+    Whether the current database can take the COPY fast path
+
+    Requires PostgreSQL through psycopg2, whose cursors provide copy_expert.
+    Everything else (including SQLite) uses the generic ORM path.
+    """
+    dialect = db.engine.dialect
+    return BULK_LOAD_ENABLED and dialect.name == 'postgresql' and dialect.driver == 'psycopg2'
+
+def copy_rows(cursor, table, columns, rows):
+    """
+    Stream rows into a table with COPY ... FROM STDIN
+
+    Args:
+        cursor: psycopg2 cursor
+        table (str): Target table name
+        columns (list): Column names, in row order
+        rows (iterable): Sequences of values; None becomes NULL
+
+    Returns:
+        int: Number of rows copied
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+
+    for row in rows:
+        writer.writerow([COPY_NULL if value is None else value for value in row])
+        count += 1
+
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+        buffer
+    )
+    return count
+
+def bulk_insert(table, rows):
+    """
+    Insert a list of row dicts into a table, using COPY on PostgreSQL
+
+    Used by catalog imports that already know every column value.
+
+    Args:
+        table (sqlalchemy.Table): Target table
+        rows (list): Row dicts keyed by column name
+    """
+    if not rows:
+        return
+
+    if not supports_copy():
+        db.session.execute(table.insert(), rows)
+        return
+
+    columns = list(rows[0])
+    cursor = db.session.connection().connection.cursor()
+    try:
+        copy_rows(cursor, table.name, columns, ([row[c] for c in columns] for row in rows))
+    finally:
+        cursor.close()
+
+def update_library_column(column, library_ids, values):
+    """
+    Set one column of many libraries with a single UPDATE
+
+    Joined to a COPY-loaded temp table on PostgreSQL, executemany elsewhere.
+    Used to write back scores computed for the whole catalog; the caller commits.
+
+    Args:
+        column (str): Float column of the library table, e.g. 'popularity_score'
+        library_ids (list): Ids of the libraries to update
+        values (list): New value of each library, in library_ids order
+    """
+    if not library_ids:
+        return
+
+    if supports_copy():
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.execute("CREATE TEMP TABLE tmp_library_value (id INTEGER PRIMARY KEY, value DOUBLE PRECISION) ON COMMIT DROP")
+            copy_rows(cursor, 'tmp_library_value', ['id', 'value'], zip(library_ids, values))
+            cursor.execute(f"UPDATE library SET {column} = t.value FROM tmp_library_value t WHERE library.id = t.id")
+            cursor.execute("DROP TABLE tmp_library_value")
+        finally:
+            cursor.close()
+        return
+
+    from app.models import Library
+
+    table = Library.__table__
+    db.session.execute(
+        update(table).where(table.c.id == bindparam('library_id')).values({column: bindparam('value')}),
+        [{'library_id': library_id, 'value': value} for library_id, value in zip(library_ids, values)]
+    )
+
+def save_libraries(libraries_data, language):
+    """
+    Merge collected libraries into the catalog with COPY and INSERT ... ON CONFLICT
+
+    Does the same as scheduler.save_libraries in a fixed number of statements:
+    the batch is copied into temp tables, versions are recorded for libraries
+    whose current version changed, libraries are upserted on (name, language),
+    new libraries get their initial version and categories, and the aggregate
+    tables are bumped for the inserted rows. Everything runs in one transaction
+    that the caller commits.
+
+    Args:
+        libraries_data (list): Library dicts as returned by the data sources
+        language (str): Language of every library in the batch
+
+    Returns:
+        dict: Number of libraries inserted and updated
+    """
+    from app.projects import repository_key
+
+    # Later entries win, as they would when saving row by row
+    batch = {}
+    for lib_data in libraries_data:
+        batch[lib_data['name']] = lib_data
+
+    if not batch:
+        return {'inserted': 0, 'updated': 0}
+
+    now = datetime.utcnow()
+    cursor = db.session.connection().connection.cursor()
+
+    try:
+        cursor.execute("""
+            CREATE TEMP TABLE tmp_library (
+                name VARCHAR(100) PRIMARY KEY,
+                description TEXT,
+                version VARCHAR(50),
+                last_update TIMESTAMP,
+                repository_url VARCHAR(255),
+                repository_key VARCHAR(40),
+                documentation_url VARCHAR(255),
+                package_url VARCHAR(255),
+                monthly_downloads INTEGER,
+                release_notes TEXT,
+                sort_key VARCHAR(255),
+                is_prerelease BOOLEAN,
+                has_description BOOLEAN,
+                has_version BOOLEAN,
+                has_last_update BOOLEAN,
+                has_repository_url BOOLEAN,
+                has_documentation_url BOOLEAN,
+                has_package_url BOOLEAN,
+                has_downloads BOOLEAN
+            ) ON COMMIT DROP
+        """)
+        cursor.execute("""
+            CREATE TEMP TABLE tmp_library_category (
+                name VARCHAR(100),
+                category_name VARCHAR(100)
+            ) ON COMMIT DROP
+        """)
+        cursor.execute("""
+            CREATE TEMP TABLE tmp_upserted (
+                id INTEGER PRIMARY KEY,
+                inserted BOOLEAN
+            ) ON COMMIT DROP
+        """)
+
+        # has_* flags keep the ORM path's "only overwrite fields the source provided" behaviour
+        copy_rows(cursor, 'tmp_library', [
+            'name', 'description', 'version', 'last_update', 'repository_url', 'repository_key', 'documentation_url',
+            'package_url', 'monthly_downloads', 'release_notes', 'sort_key', 'is_prerelease',
+            'has_description', 'has_version',
+            'has_last_update', 'has_repository_url', 'has_documentation_url', 'has_package_url', 'has_downloads'
+        ], ([
+            name,
+            lib.get('description', ''),
+            lib.get('version', ''),
+            lib.get('last_update', now),
+            lib.get('repository_url', ''),
+            repository_key(lib.get('repository_url')),
+            lib.get('documentation_url', ''),
+            lib.get('package_url', ''),
+            lib.get('downloads', 0),
+            lib.get('release_notes', ''),
+            *parse_version(lib.get('version', ''), language),
+            'description' in lib,
+            'version' in lib,
+            'last_update' in lib,
+            'repository_url' in lib,
+            'documentation_url' in lib,
+            'package_url' in lib,
+            'downloads' in lib
+        ] for name, lib in batch.items()))
+
+        copy_rows(cursor, 'tmp_library_category', ['name', 'category_name'], (
+            (name, category)
+            for name, lib in batch.items()
+            for category in set(lib.get('categories') or [])
+        ))
+
+        # Version history for existing libraries whose current version changes
+        cursor.execute("""
+            INSERT INTO version (library_id, version_number, release_date, release_notes, sort_key, is_prerelease)
+            SELECT l.id, t.version, t.last_update, t.release_notes, t.sort_key, t.is_prerelease
+            FROM tmp_library t
+            JOIN library l ON l.name = t.name AND l.language = %(language)s
+            WHERE t.version <> '' AND l.current_version IS DISTINCT FROM t.version
+            ON CONFLICT (library_id, version_number) DO NOTHING
+        """, {'language': language})
+
+        # An update moving back the library that holds the catalog's latest update means
+        # the latest update has to be recomputed rather than advanced
+        cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1
+                FROM tmp_library t
+                JOIN library e ON e.name = t.name AND e.language = %(language)s
+                JOIN catalog_stat c ON c.id = 1
+                WHERE t.has_last_update AND e.last_update >= c.last_update
+                  AND (t.last_update IS NULL OR t.last_update < e.last_update)
+            )
+        """, {'language': language})
+        latest_moved_back = cursor.fetchone()[0]
+
+        # Upsert the libraries. Fields the source didn't provide keep their stored
+        # value (or the ORM default for new rows); xmax = 0 marks inserted rows
+        cursor.execute("""
+            WITH upserted AS (
+                INSERT INTO library (name, description, language, current_version, last_update,
+                                     repository_url, repository_key, documentation_url, package_url,
+                                     monthly_downloads, github_stars, popularity_score)
+                SELECT t.name,
+                       CASE WHEN t.has_description THEN t.description ELSE COALESCE(e.description, '') END,
+                       %(language)s,
+                       CASE WHEN t.has_version THEN t.version ELSE COALESCE(e.current_version, '') END,
+                       CASE WHEN t.has_last_update THEN t.last_update ELSE COALESCE(e.last_update, t.last_update) END,
+                       CASE WHEN t.has_repository_url THEN t.repository_url ELSE COALESCE(e.repository_url, '') END,
+                       CASE WHEN t.has_repository_url THEN t.repository_key ELSE e.repository_key END,
+                       CASE WHEN t.has_documentation_url THEN t.documentation_url ELSE COALESCE(e.documentation_url, '') END,
+                       CASE WHEN t.has_package_url THEN t.package_url ELSE COALESCE(e.package_url, '') END,
+                       GREATEST(0, CASE WHEN t.has_downloads THEN COALESCE(t.monthly_downloads, 0)
+                                        ELSE COALESCE(e.monthly_downloads, 0) END),
+                       COALESCE(e.github_stars, 0),
+                       COALESCE(e.popularity_score, 0.0)
+                FROM tmp_library t
+                LEFT JOIN library e ON e.name = t.name AND e.language = %(language)s
+                ON CONFLICT (name, language) DO UPDATE SET
+                    description = EXCLUDED.description,
+                    current_version = EXCLUDED.current_version,
+                    last_update = EXCLUDED.last_update,
+                    repository_url = EXCLUDED.repository_url,
+                    repository_key = EXCLUDED.repository_key,
+                    documentation_url = EXCLUDED.documentation_url,
+                    package_url = EXCLUDED.package_url,
+                    monthly_downloads = EXCLUDED.monthly_downloads
+                RETURNING id, (xmax = 0) AS inserted
+            )
+            INSERT INTO tmp_upserted (id, inserted)
+            SELECT id, inserted FROM upserted
+        """, {'language': language})
+
+        # Initial version for new libraries
+        cursor.execute("""
+            INSERT INTO version (library_id, version_number, release_date, release_notes, sort_key, is_prerelease)
+            SELECT l.id, t.version, t.last_update, t.release_notes, t.sort_key, t.is_prerelease
+            FROM tmp_upserted u
+            JOIN library l ON l.id = u.id
+            JOIN tmp_library t ON t.name = l.name
+            WHERE u.inserted AND t.version <> ''
+        """)
+
+        # Categories for new libraries, creating any that don't exist yet
+        cursor.execute("""
+            INSERT INTO category (name, category_type)
+            SELECT DISTINCT c.category_name, 'functionality'
+            FROM tmp_library_category c
+            JOIN library l ON l.name = c.name AND l.language = %(language)s
+            JOIN tmp_upserted u ON u.id = l.id AND u.inserted
+            ON CONFLICT (name) DO NOTHING
+        """, {'language': language})
+        cursor.execute("""
+            INSERT INTO library_categories (library_id, category_id)
+            SELECT DISTINCT l.id, cat.id
+            FROM tmp_library_category c
+            JOIN library l ON l.name = c.name AND l.language = %(language)s
+            JOIN tmp_upserted u ON u.id = l.id AND u.inserted
+            JOIN category cat ON cat.name = c.category_name
+            ON CONFLICT DO NOTHING
+        """, {'language': language})
+
+        _bump_aggregates(cursor, latest_moved_back)
+
+        cursor.execute("SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM tmp_upserted")
+        inserted, updated = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    # The ORM didn't see these writes
+    db.session.expire_all()
+
+    logger.info(f"Bulk loaded {language} libraries: {inserted} inserted, {updated} updated")
+    return {'inserted': inserted, 'updated': updated}
+
+def merge_duplicate_libraries():
+    """
+    Fold libraries stored twice under one (name, language) into the oldest row
+
+    Run before uq_library_name_language is created on databases that predate
+    it; the upsert in save_libraries relies on that index. Versions and
+    categories move to the kept library (versions it already has are
+    dropped), dependency links point at it, and the duplicates' backfill
+    watermarks, dependency lists and similarity rows are removed; the next
+    collection and index build recreate them. Commits.
+
+    Returns:
+        int: Number of duplicate libraries removed
+    """
+    from app.models import (Library, Version, VersionBackfill, LibraryDependency, SimilarLibrary,
+                            library_categories)
+    from app.aggregates import rebuild_aggregates
+
+    groups = select(Library.name, Library.language, func.min(Library.id).label('keep_id')).\
+        where(Library.language.isnot(None)).group_by(Library.name, Library.language).\
+        having(func.count(Library.id) > 1).subquery()
+    duplicates = db.session.execute(
+        select(Library.id, groups.c.keep_id).
+        join(groups, (Library.name == groups.c.name) & (Library.language == groups.c.language)).
+        where(Library.id != groups.c.keep_id)
+    ).all()
+
+    for duplicate_id, keep_id in duplicates:
+        kept_versions = select(Version.version_number).where(Version.library_id == keep_id)
+        db.session.execute(update(Version).
+                           where(Version.library_id == duplicate_id, Version.version_number.not_in(kept_versions)).
+                           values(library_id=keep_id))
+        db.session.execute(delete(Version).where(Version.library_id == duplicate_id))
+
+        kept_categories = select(library_categories.c.category_id).where(library_categories.c.library_id == keep_id)
+        db.session.execute(update(library_categories).
+                           where(library_categories.c.library_id == duplicate_id,
+                                 library_categories.c.category_id.not_in(kept_categories)).
+                           values(library_id=keep_id))
+        db.session.execute(delete(library_categories).where(library_categories.c.library_id == duplicate_id))
+
+        db.session.execute(update(LibraryDependency).where(LibraryDependency.dependency_id == duplicate_id).
+                           values(dependency_id=keep_id))
+        db.session.execute(delete(LibraryDependency).where(LibraryDependency.library_id == duplicate_id))
+        db.session.execute(delete(VersionBackfill).where(VersionBackfill.library_id == duplicate_id))
+        db.session.execute(delete(SimilarLibrary).where(
+            (SimilarLibrary.library_id == duplicate_id) | (SimilarLibrary.similar_id == duplicate_id)))
+        db.session.execute(delete(Library).where(Library.id == duplicate_id))
+
+    db.session.commit()
+
+    if duplicates:
+        # Library and category counts changed
+        rebuild_aggregates()
+        logger.info(f"Merged {len(duplicates)} duplicate libraries")
+    return len(duplicates)
+
+def _bump_aggregates(cursor, latest_moved_back=False):
+    """
+    Add the libraries inserted in this batch to the aggregate tables and bump the data generation
+
+    The catalog's last_update is advanced to the batch's newest, or recomputed
+    from the library table when latest_moved_back is set.
+    """
+    cursor.execute("""
+        INSERT INTO language_stat (language, library_count)
+        SELECT l.language, COUNT(*)
+        FROM tmp_upserted u JOIN library l ON l.id = u.id
+        WHERE u.inserted AND l.language IS NOT NULL
+        GROUP BY l.language
+        ON CONFLICT (language) DO UPDATE SET library_count = language_stat.library_count + EXCLUDED.library_count
+    """)
+    cursor.execute("""
+        INSERT INTO category_stat (category_id, library_count)
+        SELECT lc.category_id, COUNT(*)
+        FROM tmp_upserted u JOIN library_categories lc ON lc.library_id = u.id
+        WHERE u.inserted
+        GROUP BY lc.category_id
+        ON CONFLICT (category_id) DO UPDATE SET library_count = category_stat.library_count + EXCLUDED.library_count
+    """)
+    cursor.execute("""
+        INSERT INTO language_category_stat (language, category_id, library_count)
+        SELECT l.language, lc.category_id, COUNT(*)
+        FROM tmp_upserted u
+        JOIN library l ON l.id = u.id
+        JOIN library_categories lc ON lc.library_id = u.id
+        WHERE u.inserted AND l.language IS NOT NULL
+        GROUP BY l.language, lc.category_id
+        ON CONFLICT (language, category_id) DO UPDATE
+            SET library_count = language_category_stat.library_count + EXCLUDED.library_count
+    """)
+    cursor.execute("""
+        INSERT INTO catalog_stat (id, total_libraries, last_update, generation)
+        SELECT 1, COUNT(*) FILTER (WHERE u.inserted), MAX(l.last_update), 1
+        FROM tmp_upserted u JOIN library l ON l.id = u.id
+        ON CONFLICT (id) DO UPDATE SET
+            total_libraries = catalog_stat.total_libraries + EXCLUDED.total_libraries,
+            last_update = CASE WHEN %(recompute)s THEN (SELECT MAX(last_update) FROM library)
+                               ELSE GREATEST(catalog_stat.last_update, EXCLUDED.last_update) END,
+            generation = catalog_stat.generation + 1
+    """, {'recompute': latest_moved_back})
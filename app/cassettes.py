@@ -0,0 +1,162 @@
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 'off', 'record' (fetch from the network and store every exchange) or
+# 'replay' (serve stored exchanges, never touching the network)
+CASSETTE_MODE = os.getenv('HTTP_CASSETTE_MODE', 'off')
+
+# Directory holding one compressed file per request, under a folder per source
+CASSETTE_DIR = os.getenv('HTTP_CASSETTE_DIR', 'cassettes')
+
+# Request headers that don't change the response and must not be written to disk
+IGNORED_HEADERS = {'authorization', 'user-agent', 'accept-encoding', 'connection'}
+
+# Query parameters left out of the request key because they change on every run
+# (GitHub's commits 'since' is computed from the current time)
+IGNORED_PARAMS = set(filter(None, os.getenv('HTTP_CASSETTE_IGNORE_PARAMS', 'since').split(',')))
+
+class CassetteMiss(requests.ConnectionError):
+    """A request in replay mode that was never recorded"""
+
+class Cassettes:
+    """
+    Recorded HTTP exchanges of the data sources
+
+    Each distinct request (method, full URL with query string, and the
+    headers that can change the response) maps to a gzipped JSON file
+    holding every response it got while recording, in order. Replaying
+    serves them in the same order, repeating the last one once they run
+    out, so a crawl that retried or was rate limited replays identically.
+
+    Args:
+        directory (str): Where cassette files are stored
+        mode (str): 'record' or 'replay'
+    """
+
+    def __init__(self, directory=CASSETTE_DIR, mode=CASSETTE_MODE):
+        self.directory = directory
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._recorded = set()
+        self._replayed = {}
+        self._loaded = {}
+
+    def get(self, source, url, **kwargs):
+        """
+        requests.get through the cassettes
+
+        Args:
+            source (str): Data source name; cassettes are grouped by it
+            url (str): URL to fetch
+            **kwargs: Passed to requests.get
+
+        Returns:
+            Response: Live response when recording, stored one when replaying
+
+        Raises:
+            CassetteMiss: In replay mode, if the request was never recorded
+        """
+        prepared = requests.Request('GET', url, params=kwargs.get('params'), headers=kwargs.get('headers')).prepare()
+        key = request_key(prepared)
+        path = os.path.join(self.directory, source, hashlib.sha1(key.encode()).hexdigest() + '.json.gz')
+
+        if self.mode == 'replay':
+            return self._replay(key, path, prepared)
+
+        response = requests.get(url, **kwargs)
+        self._record(key, path, response)
+        return response
+
+    def _replay(self, key, path, prepared):
+        """Build the next stored response for a request"""
+        with self._lock:
+            exchanges = self._loaded.get(path)
+            if exchanges is None:
+                if not os.path.exists(path):
+                    raise CassetteMiss(f"No recorded response for {key}")
+                exchanges = self._loaded[path] = _read(path)['responses']
+
+            index = self._replayed.get(key, 0)
+            self._replayed[key] = index + 1
+
+        stored = exchanges[min(index, len(exchanges) - 1)]
+
+        response = requests.Response()
+        response.status_code = stored['status_code']
+        response.headers = CaseInsensitiveDict(stored['headers'])
+        response.encoding = stored['encoding']
+        response.url = stored['url']
+        response.reason = stored['reason']
+        response.request = prepared
+        response._content = base64.b64decode(stored['body'])
+        return response
+
+    def _record(self, key, path, response):
+        """Append a response to its request's cassette, starting the cassette afresh on first use"""
+        exchange = {
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'url': response.url,
+            'encoding': response.encoding,
+            # Stored bodies are already decoded, so the transfer encoding no longer applies
+            'headers': {name: value for name, value in response.headers.items()
+                        if name.lower() not in ('content-encoding', 'transfer-encoding')},
+            'body': base64.b64encode(response.content).decode()
+        }
+
+        with self._lock:
+            if key in self._recorded and os.path.exists(path):
+                cassette = _read(path)
+            else:
+                cassette = {'request': key, 'responses': []}
+                self._recorded.add(key)
+
+            cassette['responses'].append(exchange)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path, 'wt', encoding='utf-8') as cassette_file:
+                json.dump(cassette, cassette_file)
+
+def request_key(prepared):
+    """Identify a request by method, URL and the headers that affect its response"""
+    url = urlsplit(prepared.url)
+    query = urlencode([(name, value) for name, value in parse_qsl(url.query, keep_blank_values=True)
+                       if name not in IGNORED_PARAMS])
+    headers = sorted((name.lower(), value) for name, value in prepared.headers.items()
+                     if name.lower() not in IGNORED_HEADERS)
+    return f"{prepared.method} {urlunsplit(url._replace(query=query))} {json.dumps(headers)}"
+
+def active_cassettes():
+    """The process's Cassettes, or None when HTTP_CASSETTE_MODE is off"""
+    global _cassettes
+    if CASSETTE_MODE == 'off':
+        return None
+
+    with _cassettes_lock:
+        if _cassettes is None:
+            logger.info(f"HTTP cassettes in {CASSETTE_MODE} mode at {CASSETTE_DIR}")
+            _cassettes = Cassettes()
+    return _cassettes
+
+def replaying():
+    """Whether data source requests are served from cassettes instead of the network"""
+    return CASSETTE_MODE == 'replay'
+
+def _read(path):
+    """Load a cassette file"""
+    with gzip.open(path, 'rt', encoding='utf-8') as cassette_file:
+        return json.load(cassette_file)
+
+_cassettes = None
+_cassettes_lock = threading.Lock()
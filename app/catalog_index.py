@@ -0,0 +1,449 @@
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import select
+from app import db
+from app.models import Library, Category, library_categories
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# File the read index is written to after collection runs; empty disables it
+CATALOG_INDEX_PATH = os.getenv('CATALOG_INDEX_PATH', 'catalog.idx')
+
+# File signature and format version
+MAGIC = b'GPCIDX02'
+
+# Arrays start on cache-line boundaries
+ALIGNMENT = 64
+
+# Sort orders stored in the index, by the `sort` values the routes accept
+SORTS = ('popularity', 'newest', 'name')
+
+# Separates names and descriptions in the search text; stripped from search terms
+SEARCH_SEPARATOR = b'\x00'
+
+# Set bits per byte value
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+# Last update times are stored as microseconds since this point
+EPOCH = datetime(1970, 1, 1)
+
+class CatalogIndex:
+    """
+    Read-only, memory-mapped view of the catalog for listing endpoints
+
+    The file holds one row per library as flat arrays: ids, an interned
+    language code, a permutation per sort order and the lowercased name and
+    description text, plus a bitmap (one bit per row, packed into 64-bit
+    words) per language and per category. Filters are ORs and ANDs of
+    bitmaps, facet counts are popcounts, and sorting is a pass over a
+    precomputed order; routes then load the page's rows by primary key. Every
+    process maps the same file, so gunicorn workers share one copy through
+    the page cache.
+
+    Args:
+        path (str): Index file written by build_catalog_index
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as index_file:
+            stat = os.fstat(index_file.fileno())
+            self._mapping = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mapping[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog index")
+
+        header_length = int.from_bytes(self._mapping[len(MAGIC):len(MAGIC) + 8], 'little')
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mapping[header_start:header_start + header_length])
+        base = _aligned(header_start + header_length)
+
+        self.path = path
+        self.file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.generation = header['generation']
+        self.built_at = header['built_at']
+        self.size = header['rows']
+        self.languages = header['languages']
+        self.categories = [tuple(category) for category in header['categories']]
+
+        self._language_codes = {language: code for code, language in enumerate(self.languages)}
+        self._category_codes = {str(category[0]): code for code, category in enumerate(self.categories)}
+
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            arrays[name] = np.frombuffer(self._mapping, dtype=spec['dtype'], count=spec['count'],
+                                         offset=base + spec['offset'])
+
+        self.ids = arrays['ids']
+        self.language = arrays['language']
+        self.orders = {sort: arrays[f"order_{sort}"] for sort in SORTS}
+        self._words = -(-self.size // 64)
+        self._language_bitmaps = arrays['language_bitmaps'].reshape(len(self.languages), self._words)
+        self._category_bitmaps = arrays['category_bitmaps'].reshape(len(self.categories), self._words)
+        self._search_offsets = arrays['search_offsets']
+        self._search_start = base + header['arrays']['search_text']['offset']
+
+    def query(self, languages=None, category_ids=None, search=None, sort='popularity', offset=0, limit=None):
+        """
+        Filter and sort the catalog
+
+        Filters combine with AND; several languages or categories match any of
+        them. Unknown sort values keep id order.
+
+        Args:
+            languages (list): Languages to keep
+            category_ids (list): Category ids to keep
+            search (str): Case-insensitive substring of the name or description, matched literally
+            sort (str): 'popularity', 'newest' or 'name'
+            offset (int): Rows to skip
+            limit (int): Rows to return, None for all
+
+        Returns:
+            tuple: (library ids of the page in order, total matching rows)
+        """
+        selection = _intersect(self._language_filter(languages), self._category_filter(category_ids),
+                               self._search_filter(search))
+
+        order = self.orders.get(sort)
+        if order is None:
+            order = np.arange(self.size, dtype=np.int32)
+        if selection is not None:
+            mask = _unpack(selection, self.size)
+            order = order[mask[order]]
+
+        offset = max(offset or 0, 0)
+        end = None if limit is None or limit < 0 else offset + limit
+        return self.ids[order[offset:end]].tolist(), len(order)
+
+    def language_counts(self):
+        """
+        Libraries per language
+
+        Returns:
+            list: (language, count) tuples ordered by language, without empty languages
+        """
+        known = self.language[self.language >= 0]
+        counts = np.bincount(known, minlength=len(self.languages))
+        return [(language, int(count)) for language, count in zip(self.languages, counts) if count > 0]
+
+    def category_counts(self, limit=None):
+        """
+        Categories with their library counts, largest first
+
+        Args:
+            limit (int): Maximum number of categories to return
+
+        Returns:
+            list: (id, name, library_count) tuples
+        """
+        counts = _popcount(self._category_bitmaps)
+        codes = [code for code in np.argsort(-counts, kind='stable') if counts[code] > 0][:limit]
+        return [(self.categories[code][0], self.categories[code][1], int(counts[code])) for code in codes]
+
+    def facet_counts(self, languages=None, category_ids=None, search=None):
+        """
+        Libraries per language and per category under the current filter
+
+        Each facet is counted under the other facets' selections and the
+        search, but not its own, since values within a facet are alternatives:
+        a language's count is what the listing would hold with that language
+        (also) ticked. Every value of a facet is counted in one AND and
+        popcount over its stacked bitmaps.
+
+        Args:
+            languages (list): Selected languages
+            category_ids (list): Selected category ids
+            search (str): Case-insensitive substring of the name or description, matched literally
+
+        Returns:
+            dict: 'total' matching the whole filter, 'languages' (language -> count)
+                and 'categories' (category id -> count)
+        """
+        language_filter = self._language_filter(languages)
+        category_filter = self._category_filter(category_ids)
+        search_filter = self._search_filter(search)
+
+        language_counts = _popcount(_restrict(self._language_bitmaps, _intersect(category_filter, search_filter)))
+        category_counts = _popcount(_restrict(self._category_bitmaps, _intersect(language_filter, search_filter)))
+        selection = _intersect(language_filter, category_filter, search_filter)
+
+        return {
+            'total': self.size if selection is None else int(_popcount(selection)),
+            'languages': {language: int(count) for language, count in zip(self.languages, language_counts)},
+            'categories': {category[0]: int(count) for category, count in zip(self.categories, category_counts)}
+        }
+
+    def _language_filter(self, languages):
+        """Bitmap of the selected languages, or None if none are selected"""
+        if not languages:
+            return None
+        codes = [self._language_codes[language] for language in languages if language in self._language_codes]
+        return _union(self._language_bitmaps, codes, self._words)
+
+    def _category_filter(self, category_ids):
+        """Bitmap of the selected categories, or None if none are selected"""
+        if not category_ids:
+            return None
+        codes = [self._category_codes[str(category_id)] for category_id in category_ids
+                 if str(category_id) in self._category_codes]
+        return _union(self._category_bitmaps, codes, self._words)
+
+    def _search_filter(self, search):
+        """Bitmap of the rows matching a search, or None without one"""
+        if not search:
+            return None
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self._search(search)] = True
+        return _pack(mask)
+
+    def _search(self, term):
+        """
+        Rows whose name or description contains the term
+
+        The term is matched literally: unlike the SQL path's ilike, '%' and '_'
+        are not wildcards, so results can differ for terms containing them.
+        """
+        needle = term.lower().encode('utf-8').replace(SEARCH_SEPARATOR, b'')
+        if not needle:
+            return np.arange(self.size)
+
+        start = self._search_start
+        text = memoryview(self._mapping)[start:start + int(self._search_offsets[-1])]
+        positions = np.fromiter((match.start() for match in re.finditer(re.escape(needle), text)), dtype=np.int64)
+        return np.unique(np.searchsorted(self._search_offsets, positions, side='right') - 1)
+
+def build_catalog_index(path=CATALOG_INDEX_PATH):
+    """
+    Write the memory-mapped read index of the current catalog
+
+    The data generation is read before the rows, so an index never claims a
+    newer generation than the data it holds. The file is written under a
+    temporary name and renamed into place; processes still mapping the old
+    file keep reading it until they pick up the new one.
+
+    Args:
+        path (str): Index file
+
+    Returns:
+        int: Number of libraries indexed
+    """
+    from app.aggregates import catalog_summary
+
+    generation = catalog_summary().generation or 0
+    connection = db.session.connection()
+
+    rows = connection.execute(
+        select(Library.id, Library.name, Library.description, Library.language,
+               Library.popularity_score, Library.last_update).order_by(Library.id)
+    ).all()
+    links = connection.execute(
+        select(library_categories.c.category_id, library_categories.c.library_id)
+    ).all()
+    categories = connection.execute(
+        select(Category.id, Category.name, Category.category_type).order_by(Category.id)
+    ).all()
+
+    n = len(rows)
+    ids = np.fromiter((row.id for row in rows), dtype='<i8', count=n)
+
+    # Intern languages as codes into a sorted table; -1 is no language
+    languages = sorted({row.language for row in rows if row.language is not None})
+    language_codes = {language: code for code, language in enumerate(languages)}
+    language = np.fromiter((language_codes.get(row.language, -1) for row in rows), dtype='<i2', count=n)
+
+    # Missing values sort last
+    popularity = np.fromiter((row.popularity_score if row.popularity_score is not None else -np.inf for row in rows),
+                             dtype=np.float64, count=n)
+    last_update = np.fromiter((_timestamp(row.last_update) for row in rows), dtype=np.int64, count=n)
+
+    arrays = {
+        'ids': ids,
+        'language': language,
+        'order_popularity': np.lexsort((ids, -popularity)).astype('<i4'),
+        'order_newest': np.lexsort((ids, -last_update)).astype('<i4'),
+        'order_name': np.array(sorted(range(n), key=lambda row: (rows[row].name or '', rows[row].id)), dtype='<i4')
+    }
+
+    # One bitmap per language and per category, in code order
+    arrays['language_bitmaps'] = _pack(language[np.newaxis, :] == np.arange(len(languages))[:, np.newaxis]).ravel()
+
+    category_codes = {row.id: code for code, row in enumerate(categories)}
+    known_links = [(category_codes[category_id], library_id) for category_id, library_id in links
+                   if category_id in category_codes]
+    link_ids = np.fromiter((library_id for _, library_id in known_links), dtype=np.int64, count=len(known_links))
+    link_codes = np.fromiter((code for code, _ in known_links), dtype=np.int64, count=len(known_links))
+    # Links of libraries added after the rows were read are left for the next build
+    in_catalog = np.isin(link_ids, ids)
+    in_category = np.zeros((len(categories), n), dtype=bool)
+    in_category[link_codes[in_catalog], np.searchsorted(ids, link_ids[in_catalog])] = True
+    arrays['category_bitmaps'] = _pack(in_category).ravel()
+
+    # Lowercased "name\0description\0" per row, located by offsets
+    texts = [(row.name or '').lower().encode('utf-8') + SEARCH_SEPARATOR +
+             (row.description or '').lower().encode('utf-8') + SEARCH_SEPARATOR for row in rows]
+    arrays['search_offsets'] = np.concatenate(
+        [[0], np.cumsum([len(text) for text in texts], dtype=np.int64)]).astype('<i8')
+    arrays['search_text'] = np.frombuffer(b''.join(texts), dtype=np.uint8)
+
+    header = {
+        'generation': generation,
+        'built_at': datetime.utcnow().isoformat(),
+        'rows': n,
+        'languages': languages,
+        'categories': [[row.id, row.name, row.category_type] for row in categories],
+        'arrays': {}
+    }
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {'dtype': array.dtype.str, 'count': len(array), 'offset': offset}
+        offset = _aligned(offset + array.nbytes)
+
+    _write_index(path, header, arrays)
+
+    logger.info(f"Built catalog index of {n} libraries at generation {generation} in {path}")
+    return n
+
+def load_catalog_index(path=CATALOG_INDEX_PATH):
+    """
+    Map the index file into this process if it isn't mapped yet or was rebuilt
+
+    Returns:
+        CatalogIndex: The mapped index, or None if there is no usable file
+    """
+    global _index, _rejected
+    if not path:
+        return None
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    file_id = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _index_lock:
+        if _index is None or (_index.path, *_index.file_id) != file_id:
+            # A file that failed to load is not retried until it is replaced
+            if file_id == _rejected:
+                return None
+            try:
+                _index = CatalogIndex(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading catalog index: {str(e)}")
+                _rejected = file_id
+                return None
+        return _index
+
+def current_index():
+    """
+    The catalog index, if it was built from the data generation this request sees
+
+    A stale index (the catalog changed after it was built) is never served;
+    callers fall back to SQL until the next build.
+
+    Returns:
+        CatalogIndex: Up-to-date index, or None
+    """
+    from app.fragment_cache import current_generation
+
+    generation = current_generation()
+    index = _index
+    if index is None or index.generation != generation:
+        index = load_catalog_index()
+
+    return index if index is not None and index.generation == generation else None
+
+def load_libraries(ids):
+    """
+    Libraries by id, in the given order
+
+    Args:
+        ids (list): Library ids
+
+    Returns:
+        list: Library objects for the ids that still exist
+    """
+    if not ids:
+        return []
+
+    libraries = {library.id: library for library in Library.query.filter(Library.id.in_(ids)).all()}
+    return [libraries[library_id] for library_id in ids if library_id in libraries]
+
+def _write_index(path, header, arrays):
+    """Write the header and arrays to a temporary file and move it into place"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    encoded = json.dumps(header).encode('utf-8')
+    header_end = len(MAGIC) + 8 + len(encoded)
+    temporary = f"{path}.tmp"
+
+    with open(temporary, 'wb') as index_file:
+        index_file.write(MAGIC)
+        index_file.write(len(encoded).to_bytes(8, 'little'))
+        index_file.write(encoded)
+        index_file.write(b'\x00' * (_aligned(header_end) - header_end))
+
+        for name, array in arrays.items():
+            data = np.ascontiguousarray(array).tobytes()
+            index_file.write(data)
+            index_file.write(b'\x00' * (_aligned(len(data)) - len(data)))
+
+    os.replace(temporary, path)
+
+def _pack(masks):
+    """Bitmaps of boolean masks along the last axis, as little-endian 64-bit words"""
+    packed = np.packbits(masks, axis=-1, bitorder='little')
+    padding = [(0, 0)] * (packed.ndim - 1) + [(0, -packed.shape[-1] % 8)]
+    return np.ascontiguousarray(np.pad(packed, padding)).view('<u8')
+
+def _unpack(bitmap, size):
+    """Boolean mask of a bitmap"""
+    return np.unpackbits(bitmap.view(np.uint8), count=size, bitorder='little').view(bool)
+
+def _union(bitmaps, codes, words):
+    """OR of the bitmaps with the given codes"""
+    if not codes:
+        return np.zeros(words, dtype='<u8')
+    return np.bitwise_or.reduce(bitmaps[codes], axis=0)
+
+def _intersect(*bitmaps):
+    """AND of the given bitmaps, skipping None; None if all are None"""
+    result = None
+    for bitmap in bitmaps:
+        if bitmap is not None:
+            result = bitmap if result is None else result & bitmap
+    return result
+
+def _restrict(bitmaps, selection):
+    """Stacked bitmaps ANDed with a selection, or unchanged without one"""
+    return bitmaps if selection is None else bitmaps & selection
+
+def _popcount(bitmaps):
+    """Set bits along the last axis"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bitmaps).sum(axis=-1, dtype=np.int64)
+    # numpy < 2.0 has no popcount ufunc; count bytes through a lookup table
+    return POPCOUNT[bitmaps.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+def _aligned(offset):
+    """Round an offset up to the next ALIGNMENT boundary"""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _timestamp(value):
+    """Microseconds since the epoch, with missing dates first"""
+    if value is None:
+        # Not the minimum itself, which has no negation
+        return np.iinfo(np.int64).min + 1
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+_index = None
+_rejected = None
+_index_lock = threading.Lock()
@@ -0,0 +1,157 @@
+import sys
+import click
+from app import db
+
+# Scheduler jobs that read from the data sources, in the order they should run
+COLLECTION_JOBS = ('collect_python_libraries', 'collect_javascript_libraries', 'collect_dotnet_libraries',
+                   'collect_java_libraries', 'update_github_data', 'discover_github_repositories')
+
+def register_commands(app):
+    """Register the application's Flask CLI commands"""
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create tables and seed sample data (run once per deployment in production)"""
+        from app import init_database
+
+        init_database()
+        click.echo('Database initialized')
+
+    @app.cli.command('build-similarity-index')
+    @click.option('--top-k', type=int, default=None, help='Neighbours to keep per library')
+    def build_similarity_index(top_k):
+        """Rebuild the precomputed similar-libraries index"""
+        from app.similarity import build_similarity_index as build_index, TOP_K
+
+        count = build_index(top_k=top_k or TOP_K)
+        click.echo(f"Wrote {count} similar-library entries")
+
+    @app.cli.command('backfill-versions')
+    @click.option('--language', help='Only backfill libraries in this language')
+    @click.option('--batch-size', type=int, default=None, help='Libraries per insert and commit')
+    def backfill_versions(language, batch_size):
+        """Ingest full version histories from the registries"""
+        from app.version_history import backfill_version_history, BACKFILL_BATCH_SIZE
+
+        counts = backfill_version_history(language=language, batch_size=batch_size or BACKFILL_BATCH_SIZE)
+        click.echo(f"Inserted {counts['versions']} versions for {counts['libraries']} libraries")
+
+    @app.cli.command('collect')
+    @click.option('--job', 'jobs', multiple=True, type=click.Choice(COLLECTION_JOBS),
+                  help='Job to run (repeatable); defaults to all of them')
+    def collect(jobs):
+        """Run collection jobs now instead of waiting for the scheduler"""
+        from app import scheduler
+
+        for name in jobs or COLLECTION_JOBS:
+            click.echo(f"Running {name}")
+            getattr(scheduler, name)()
+
+    @app.cli.command('discover-repositories')
+    @click.option('--topic', 'topics', multiple=True, help='GitHub topic to search (repeatable); defaults to DISCOVERY_TOPICS')
+    @click.option('--since', help='Earliest repository creation date (defaults to DISCOVERY_START)')
+    @click.option('--until', help='Latest repository creation date (defaults to today)')
+    @click.option('--min-stars', type=int, default=None, help='Minimum stars of a repository')
+    def discover_repositories(topics, since, until, min_stars):
+        """Search GitHub topics for repositories that aren't known yet and queue them for ingestion"""
+        from datetime import date
+        from app.discovery import discover_repositories as discover, DISCOVERY_MIN_STARS
+
+        try:
+            since = date.fromisoformat(since) if since else None
+            until = date.fromisoformat(until) if until else None
+        except ValueError:
+            raise click.BadParameter('must be an ISO date', param_hint='--since/--until')
+
+        counts = discover(topics=list(topics) or None, since=since, until=until,
+                          min_stars=DISCOVERY_MIN_STARS if min_stars is None else min_stars)
+        db.session.commit()
+        click.echo(f"Ran {counts['searches']} searches ({counts['failed']} failed, {counts['truncated']} truncated), "
+                   f"found {counts['found']} repositories, queued {counts['queued']} new ones")
+
+    @app.cli.command('fan-out-digests')
+    def fan_out_digests():
+        """Write subscription digests for versions added since the last run"""
+        from app.digests import fan_out_digests as fan_out
+
+        count = fan_out()
+        click.echo(f"Wrote {count} subscription digests")
+
+    @app.cli.command('recompute-version-keys')
+    def recompute_version_keys():
+        """Recompute every version's sort key and pre-release flag after the version parser changed"""
+        from app.versioning import populate_version_keys
+
+        count = populate_version_keys(recompute=True)
+        click.echo(f"Updated sort keys of {count} versions")
+
+    @app.cli.command('recompute-popularity')
+    def recompute_popularity():
+        """Rescore every library from its downloads, stars and dependency-graph importance"""
+        from app import aggregates
+        from app.dependency_graph import recompute_importance
+        from app.popularity import recompute_popularity as recompute
+        from app.catalog_index import build_catalog_index as build_index, CATALOG_INDEX_PATH
+
+        importance_count = recompute_importance()
+        click.echo(f"Updated importance scores of {importance_count} libraries")
+        count = recompute()
+        aggregates.bump_generation()
+        db.session.commit()
+        click.echo(f"Updated popularity scores of {count} libraries")
+
+        # The new generation makes the listing index stale; rebuild it as the scheduler does
+        if CATALOG_INDEX_PATH:
+            build_index()
+            click.echo(f"Rebuilt catalog index at {CATALOG_INDEX_PATH}")
+
+    @app.cli.command('export-snapshot')
+    @click.option('--output', type=click.Path(file_okay=False), default=None, help='Snapshot directory (defaults to SNAPSHOT_DIR)')
+    @click.option('--format', 'file_format', type=click.Choice(['parquet', 'arrow']), default=None,
+                  help='File format (defaults to SNAPSHOT_FORMAT)')
+    @click.option('--force', is_flag=True, help='Rewrite every partition, changed or not')
+    def export_snapshot(output, file_format, force):
+        """Write the catalog as a partitioned Parquet or Arrow dataset"""
+        from app.snapshots import write_snapshot, SNAPSHOT_DIR, SNAPSHOT_FORMAT
+
+        counts = write_snapshot(directory=output or SNAPSHOT_DIR or 'snapshots',
+                                file_format=file_format or SNAPSHOT_FORMAT, force=force)
+        click.echo(f"Wrote {counts['written']} partitions, {counts['unchanged']} unchanged, {counts['removed']} removed")
+
+    @app.cli.command('build-catalog-index')
+    @click.option('--output', type=click.Path(dir_okay=False), default=None,
+                  help='Index file (defaults to CATALOG_INDEX_PATH)')
+    def build_catalog_index(output):
+        """Build the memory-mapped index the listing endpoints filter and sort on"""
+        from app.catalog_index import build_catalog_index as build, CATALOG_INDEX_PATH
+
+        count = build(path=output or CATALOG_INDEX_PATH or 'catalog.idx')
+        click.echo(f"Indexed {count} libraries")
+
+    @app.cli.command('export-catalog')
+    @click.option('--format', 'export_format', type=click.Choice(['ndjson', 'csv']), default='ndjson',
+                  help='Output format')
+    @click.option('--output', type=click.Path(dir_okay=False, writable=True), help='Output file (defaults to stdout)')
+    @click.option('--language', help='Only export libraries in this language')
+    @click.option('--category-id', type=int, help='Only export libraries in this category')
+    @click.option('--search', help='Only export libraries whose name or description matches')
+    @click.option('--since', help='Only export libraries updated at or after this ISO date/time')
+    def export_catalog(export_format, output, language, category_id, search, since):
+        """Stream the library catalog as NDJSON or CSV"""
+        from app.export import iter_libraries, parse_since, EXPORT_FORMATS
+
+        try:
+            since = parse_since(since)
+        except ValueError:
+            raise click.BadParameter('must be an ISO date or datetime', param_hint='--since')
+
+        renderer, _ = EXPORT_FORMATS[export_format]
+        libraries = iter_libraries(language=language, category_id=category_id, search=search, since=since)
+
+        stream = open(output, 'w', newline='', encoding='utf-8') if output else sys.stdout
+        try:
+            for chunk in renderer(libraries):
+                stream.write(chunk)
+        finally:
+            if output:
+                stream.close()
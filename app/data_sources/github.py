@@ -1,13 +1,16 @@
-import requests
 import os
 import logging
 import time
 from datetime import datetime, timedelta
+from app import metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# GitHub API base URL
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com')
+
 # GitHub API Token
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '')
 
@@ -33,15 +36,15 @@ def get_repository_data(owner, repo):
     """
     try:
         # Get repository data
-        repo_url = f"https://api.github.com/repos/{owner}/{repo}"
-        response = requests.get(repo_url, headers=headers)
+        repo_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}"
+        response = metrics.http_get('github', repo_url, headers=headers)
         
         if response.status_code == 200:
             data = response.json()
             
             # Get release data
-            releases_url = f"https://api.github.com/repos/{owner}/{repo}/releases"
-            releases_response = requests.get(releases_url, headers=headers, params={'per_page': 5})
+            releases_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/releases"
+            releases_response = metrics.http_get('github', releases_url, headers=headers, params={'per_page': 5})
             releases = releases_response.json() if releases_response.status_code == 200 else []
             
             # Get latest release date
@@ -53,9 +56,9 @@ def get_repository_data(owner, repo):
                     pass
             
             # Get commit data for activity
-            commits_url = f"https://api.github.com/repos/{owner}/{repo}/commits"
+            commits_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits"
             since_date = (datetime.now() - timedelta(days=30)).isoformat()
-            commits_response = requests.get(
+            commits_response = metrics.http_get('github', 
                 commits_url, 
                 headers=headers, 
                 params={'per_page': 1, 'since': since_date}
@@ -133,6 +136,62 @@ def get_repository_data(owner, repo):
         logger.error(f"Error getting repository data for {owner}/{repo}: {str(e)}")
         return None
 
+class RateLimitExceeded(Exception):
+    """GitHub refused a request for rate limiting"""
+    
+    def __init__(self, retry_after):
+        super().__init__(f"GitHub API rate limit exceeded, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+def search_repositories(query, page=1, per_page=100, sort='stars', order='desc'):
+    """
+    Get one page of a GitHub repository search
+    
+    Search results stop at 1000 per query, whatever total_count says;
+    see app.discovery for slicing larger result sets.
+    
+    Args:
+        query (str): Search query, e.g. "topic:llm created:2024-01-01..2024-01-31"
+        page (int): Page number, from 1
+        per_page (int): Results per page (at most 100)
+        sort (str): Sort field
+        order (str): Sort order
+        
+    Returns:
+        dict: total_count and items (repository data as from search_ai_repos, with created_at), or None if the search failed
+        
+    Raises:
+        RateLimitExceeded: If GitHub refused the request for rate limiting
+    """
+    search_url = f"{GITHUB_API_URL}/search/repositories"
+    params = {
+        'q': query,
+        'sort': sort,
+        'order': order,
+        'per_page': per_page,
+        'page': page
+    }
+    
+    try:
+        response = metrics.http_get('github', search_url, headers=headers, params=params)
+    except Exception as e:
+        logger.error(f"Error searching repositories for {query} page {page}: {str(e)}")
+        return None
+    
+    if response.status_code in (403, 429) and (response.headers.get('X-RateLimit-Remaining') == '0' or
+                                               'rate limit' in response.text.lower()):
+        raise RateLimitExceeded(_retry_after(response))
+    
+    if response.status_code != 200:
+        logger.warning(f"Failed to search repositories for {query} page {page}. Status code: {response.status_code}")
+        return None
+    
+    data = response.json()
+    return {
+        'total_count': data.get('total_count', 0),
+        'items': [dict(_repo_data(repo), created_at=repo.get('created_at')) for repo in data.get('items', [])]
+    }
+
 def search_ai_repos(query, max_results=20):
     """
     Search for AI/ML repositories on GitHub
@@ -145,7 +204,7 @@ def search_ai_repos(query, max_results=20):
         list: List of repository data
     """
     try:
-        search_url = "https://api.github.com/search/repositories"
+        search_url = f"{GITHUB_API_URL}/search/repositories"
         search_query = f"{query} topic:ai OR topic:machine-learning OR topic:deep-learning"
         
         # Parameters for search
@@ -156,26 +215,13 @@ def search_ai_repos(query, max_results=20):
             'per_page': max_results
         }
         
-        response = requests.get(search_url, headers=headers, params=params)
+        response = metrics.http_get('github', search_url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
             repos = data.get('items', [])
             
-            results = []
-            for repo in repos:
-                repo_data = {
-                    'name': repo['name'],
-                    'full_name': repo['full_name'],
-                    'description': repo['description'],
-                    'stars': repo['stargazers_count'],
-                    'forks': repo['forks_count'],
-                    'url': repo['html_url'],
-                    'language': repo['language']
-                }
-                results.append(repo_data)
-            
-            return results
+            return [_repo_data(repo) for repo in repos]
         
         elif response.status_code == 403 and 'rate limit exceeded' in response.text.lower():
             logger.warning(f"GitHub API rate limit exceeded for search: {query}")
@@ -200,7 +246,7 @@ def get_trending_ai_repos():
     date_month_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
     
     try:
-        search_url = "https://api.github.com/search/repositories"
+        search_url = f"{GITHUB_API_URL}/search/repositories"
         search_query = f"topic:ai OR topic:machine-learning OR topic:deep-learning created:>{date_month_ago}"
         
         # Parameters for search
@@ -211,27 +257,13 @@ def get_trending_ai_repos():
             'per_page': 20
         }
         
-        response = requests.get(search_url, headers=headers, params=params)
+        response = metrics.http_get('github', search_url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
             repos = data.get('items', [])
             
-            results = []
-            for repo in repos:
-                repo_data = {
-                    'name': repo['name'],
-                    'full_name': repo['full_name'],
-                    'description': repo['description'],
-                    'stars': repo['stargazers_count'],
-                    'forks': repo['forks_count'],
-                    'url': repo['html_url'],
-                    'language': repo['language'],
-                    'created_at': repo['created_at']
-                }
-                results.append(repo_data)
-            
-            return results
+            return [dict(_repo_data(repo), created_at=repo['created_at']) for repo in repos]
         
         elif response.status_code == 403 and 'rate limit exceeded' in response.text.lower():
             logger.warning("GitHub API rate limit exceeded for trending repositories")
@@ -243,4 +275,24 @@ def get_trending_ai_repos():
     
     except Exception as e:
         logger.error(f"Error getting trending repositories: {str(e)}")
-        return [] 
\ No newline at end of file
+        return []
+
+def _repo_data(repo):
+    """Repository fields kept from a search result"""
+    return {
+        'name': repo['name'],
+        'full_name': repo['full_name'],
+        'description': repo['description'],
+        'stars': repo['stargazers_count'],
+        'forks': repo['forks_count'],
+        'url': repo['html_url'],
+        'language': repo['language']
+    }
+
+def _retry_after(response):
+    """Seconds until a rate-limited request can be retried"""
+    if response.headers.get('X-RateLimit-Remaining') == '0' and response.headers.get('X-RateLimit-Reset', '').isdigit():
+        return max(1.0, int(response.headers['X-RateLimit-Reset']) - time.time())
+    if response.headers.get('Retry-After', '').isdigit():
+        return float(response.headers['Retry-After'])
+    return 60.0
@@ -1,8 +1,7 @@
-import requests
 import os
 import logging
 from datetime import datetime
-import time
+from app import metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -11,6 +10,9 @@ logger = logging.getLogger(__name__)
 # API URL
 MAVEN_API_URL = os.getenv('MAVEN_API_URL', 'https://search.maven.org/solrsearch/select')
 
+# Pause between package requests, to stay under the registry's rate limits
+MAVEN_REQUEST_DELAY = float(os.getenv('MAVEN_REQUEST_DELAY', 0.2))
+
 def search_libraries(keyword, max_results=100):
     """
     Search for Java libraries using Maven Central Repository API
@@ -32,7 +34,7 @@ def search_libraries(keyword, max_results=100):
             'wt': 'json'
         }
         
-        response = requests.get(MAVEN_API_URL, params=params)
+        response = metrics.http_get('maven', MAVEN_API_URL, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -70,7 +72,7 @@ def search_libraries(keyword, max_results=100):
                 package_id = f"{group_id}:{artifact_id}"
                 
                 # Avoid too many requests in short time
-                time.sleep(0.2)
+                metrics.wait('maven', MAVEN_REQUEST_DELAY)
                 
                 try:
                     # Get package details
@@ -170,7 +172,7 @@ def get_package_details(group_id, artifact_id):
             'wt': 'json'
         }
         
-        response = requests.get(MAVEN_API_URL, params=params)
+        response = metrics.http_get('maven', MAVEN_API_URL, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -199,6 +201,13 @@ def get_package_details(group_id, artifact_id):
                     'artifact_id': artifact_id,
                     'version': latest_version,
                     'versions': [v['version'] for v in versions],
+                    'releases': [
+                        {
+                            'version': v['version'],
+                            'release_date': datetime.utcfromtimestamp(v['timestamp'] / 1000).isoformat() if v['timestamp'] else None
+                        }
+                        for v in versions
+                    ],
                     'repository_url': f"https://search.maven.org/artifact/{group_id}/{artifact_id}/{latest_version}/jar"
                 }
         
@@ -1,8 +1,7 @@
-import requests
 import os
 import logging
 from datetime import datetime
-import time
+from app import metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -11,6 +10,9 @@ logger = logging.getLogger(__name__)
 # API URL
 NPM_API_URL = os.getenv('NPM_API_URL', 'https://registry.npmjs.org')
 
+# Pause between package requests, to stay under the registry's rate limits
+NPM_REQUEST_DELAY = float(os.getenv('NPM_REQUEST_DELAY', 0.2))
+
 def search_libraries(keyword, max_results=100):
     """
     Search for JavaScript libraries using npm Registry API
@@ -26,8 +28,8 @@ def search_libraries(keyword, max_results=100):
     
     try:
         # Use npm Registry Search API
-        search_url = f"https://registry.npmjs.org/-/v1/search?text={keyword}&size={max_results}"
-        response = requests.get(search_url)
+        search_url = f"{NPM_API_URL}/-/v1/search?text={keyword}&size={max_results}"
+        response = metrics.http_get('npm', search_url)
         
         if response.status_code == 200:
             data = response.json()
@@ -71,12 +73,12 @@ def search_libraries(keyword, max_results=100):
                     continue
                 
                 # Avoid too many requests in short time
-                time.sleep(0.2)
+                metrics.wait('npm', NPM_REQUEST_DELAY)
                 
                 try:
                     # Get detailed package data
                     package_url = f"{NPM_API_URL}/{name}"
-                    detailed_response = requests.get(package_url)
+                    detailed_response = metrics.http_get('npm', package_url)
                     
                     if detailed_response.status_code == 200:
                         detailed_data = detailed_response.json()
@@ -181,6 +183,10 @@ def search_libraries(keyword, max_results=100):
                             'categories': list(set(categories)) if categories else ['JavaScript Libraries']
                         }
                         
+                        # Runtime dependencies only; dev and peer dependencies aren't installed for dependents
+                        if version_data:
+                            library_data['dependencies'] = list(version_data.get('dependencies') or {})
+                        
                         libraries.append(library_data)
                         logger.info(f"Collected data for npm package: {name}")
                     
@@ -210,7 +216,7 @@ def get_package_details(package_name):
     """
     try:
         package_url = f"{NPM_API_URL}/{package_name}"
-        response = requests.get(package_url)
+        response = metrics.http_get('npm', package_url)
         
         if response.status_code == 200:
             data = response.json()
@@ -1,8 +1,7 @@
-import requests
 import os
 import logging
 from datetime import datetime
-import time
+from app import metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -11,6 +10,9 @@ logger = logging.getLogger(__name__)
 # API URL
 NUGET_API_URL = os.getenv('NUGET_API_URL', 'https://api.nuget.org/v3')
 
+# Pause between package requests, to stay under the registry's rate limits
+NUGET_REQUEST_DELAY = float(os.getenv('NUGET_REQUEST_DELAY', 0.2))
+
 def search_libraries(keyword, max_results=100):
     """
     Search for .NET libraries using NuGet API
@@ -27,7 +29,7 @@ def search_libraries(keyword, max_results=100):
     try:
         # Use NuGet Search Query Service
         search_url = f"{NUGET_API_URL}/query?q={keyword}&take={max_results}"
-        response = requests.get(search_url)
+        response = metrics.http_get('nuget', search_url)
         
         if response.status_code == 200:
             data = response.json()
@@ -62,7 +64,7 @@ def search_libraries(keyword, max_results=100):
                     continue
                 
                 # Avoid too many requests in short time
-                time.sleep(0.2)
+                metrics.wait('nuget', NUGET_REQUEST_DELAY)
                 
                 try:
                     # Get package details
@@ -153,7 +155,7 @@ def get_package_details(package_id):
     try:
         # Get package registration
         registration_url = f"{NUGET_API_URL}/registration/{package_id.lower()}/index.json"
-        response = requests.get(registration_url)
+        response = metrics.http_get('nuget', registration_url)
         
         if response.status_code == 200:
             data = response.json()
@@ -168,6 +170,17 @@ def get_package_details(package_id):
                     latest_version = latest_versions[-1]
                     catalog_entry = latest_version.get('catalogEntry', {})
                     
+                    # Get version history (only pages inlined in the index)
+                    versions = []
+                    for page in items:
+                        for item in page.get('items', []):
+                            entry = item.get('catalogEntry', {})
+                            if entry.get('version'):
+                                versions.append({
+                                    'version': entry['version'],
+                                    'release_date': entry.get('published')
+                                })
+                    
                     return {
                         'id': catalog_entry.get('id', package_id),
                         'description': catalog_entry.get('description', ''),
@@ -175,7 +188,8 @@ def get_package_details(package_id):
                         'version': catalog_entry.get('version', ''),
                         'project_url': catalog_entry.get('projectUrl', ''),
                         'license': catalog_entry.get('licenseUrl', ''),
-                        'tags': catalog_entry.get('tags', '')
+                        'tags': catalog_entry.get('tags', ''),
+                        'versions': versions
                     }
         
         return None
@@ -1,8 +1,8 @@
-import requests
 import os
+import re
 import logging
 from datetime import datetime
-import time
+from app import metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -11,6 +11,15 @@ logger = logging.getLogger(__name__)
 # API URL
 PYPI_API_URL = os.getenv('PYPI_API_URL', 'https://pypi.org/pypi')
 
+# Pause between package requests, to stay under the registry's rate limits
+PYPI_REQUEST_DELAY = float(os.getenv('PYPI_REQUEST_DELAY', 0.5))
+
+# Project name at the start of a requirement string (PEP 508)
+REQUIREMENT_NAME = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+# Environment marker limiting a requirement to an optional extra
+EXTRA_MARKER = re.compile(r'\bextra\s*==')
+
 def search_libraries(keyword, max_results=100):
     """
     Search for Python libraries using PyPI API
@@ -59,12 +68,12 @@ def search_libraries(keyword, max_results=100):
         
         for package_name in packages:
             # Avoid too many requests in short time
-            time.sleep(0.5)
+            metrics.wait('pypi', PYPI_REQUEST_DELAY)
             
             try:
                 # Get package data from PyPI
                 package_url = f"{PYPI_API_URL}/{package_name}/json"
-                response = requests.get(package_url)
+                response = metrics.http_get('pypi', package_url)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -143,7 +152,8 @@ def search_libraries(keyword, max_results=100):
                         'documentation_url': documentation_url,
                         'package_url': info.get('package_url', f"https://pypi.org/project/{package_name}/"),
                         'downloads': monthly_downloads,
-                        'categories': list(set(categories)) if categories else ['Artificial Intelligence']
+                        'categories': list(set(categories)) if categories else ['Artificial Intelligence'],
+                        'dependencies': parse_requirements(info.get('requires_dist'))
                     }
                     
                     libraries.append(library_data)
@@ -160,6 +170,29 @@ def search_libraries(keyword, max_results=100):
     
     return libraries
 
+def parse_requirements(requires_dist):
+    """
+    Get the names of a package's required dependencies
+    
+    Args:
+        requires_dist (list): Requirement strings from the JSON API, e.g. "numpy (>=1.21); python_version >= '3.8'"
+        
+    Returns:
+        list: Names of the dependencies that aren't limited to an optional extra
+    """
+    names = []
+    
+    for requirement in requires_dist or []:
+        marker = requirement.split(';', 1)[1] if ';' in requirement else ''
+        if EXTRA_MARKER.search(marker):
+            continue
+        
+        match = REQUIREMENT_NAME.match(requirement)
+        if match and match.group(1) not in names:
+            names.append(match.group(1))
+    
+    return names
+
 def get_package_details(package_name):
     """
     Get detailed information about a specific Python package
@@ -172,7 +205,7 @@ def get_package_details(package_name):
     """
     try:
         package_url = f"{PYPI_API_URL}/{package_name}/json"
-        response = requests.get(package_url)
+        response = metrics.http_get('pypi', package_url)
         
         if response.status_code == 200:
             data = response.json()
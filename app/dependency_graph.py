@@ -0,0 +1,222 @@
+import logging
+import os
+import re
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select, update, bindparam
+from app import db
+from app.models import Library, LibraryDependency
+from app.bulk_load import bulk_insert, update_library_column
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Probability of following a dependency edge rather than jumping to a random package
+DAMPING = float(os.getenv('IMPORTANCE_DAMPING', 0.85))
+
+# Power iteration stops once the scores move less than this in total (L1), or after MAX_ITERATIONS
+TOLERANCE = 1e-9
+MAX_ITERATIONS = 200
+
+# Scores that moved less than this are not written back
+SCORE_TOLERANCE = 1e-6
+
+# Ids per IN clause when replacing a batch's edges
+DELETE_CHUNK_SIZE = 500
+
+# Runs of separators that PyPI treats as equivalent (PEP 503)
+PYTHON_NAME_SEPARATORS = re.compile(r'[-_.]+')
+
+def normalise_name(name, language):
+    """
+    Registry name in the form dependencies refer to it by
+
+    Python names compare case-insensitively with -, _ and . equivalent;
+    the other registries compare case-insensitively.
+
+    Args:
+        name (str): Package name
+        language (str): Language of the package's registry
+
+    Returns:
+        str: Normalised name
+    """
+    name = name.strip().lower()
+    if language == 'Python':
+        name = PYTHON_NAME_SEPARATORS.sub('-', name)
+    return name
+
+def save_dependencies(libraries_data, language):
+    """
+    Replace the stored dependencies of collected libraries
+
+    Only libraries whose data carries a 'dependencies' list are touched, so
+    sources that don't report dependencies leave existing edges alone.
+    Dependencies already in the catalog are linked by id; the rest are kept
+    by name and linked by resolve_dependencies once they are collected.
+    Must be followed by a commit.
+
+    Args:
+        libraries_data (list): Library dicts as returned by the data sources
+        language (str): Language of every library in the batch
+
+    Returns:
+        int: Number of dependency edges written
+    """
+    declared = {}
+    for lib_data in libraries_data:
+        if 'dependencies' in lib_data:
+            declared[normalise_name(lib_data['name'], language)] = {
+                normalise_name(name, language) for name in lib_data['dependencies'] or []
+            }
+
+    if not declared:
+        return 0
+
+    catalog = _catalog_ids(language)
+    library_ids = [catalog[name] for name in declared if name in catalog]
+
+    table = LibraryDependency.__table__
+    for start in range(0, len(library_ids), DELETE_CHUNK_SIZE):
+        db.session.execute(table.delete().where(
+            table.c.library_id.in_(library_ids[start:start + DELETE_CHUNK_SIZE])))
+
+    rows = [
+        {'library_id': catalog[name], 'dependency_name': dependency, 'dependency_id': catalog.get(dependency)}
+        for name, dependencies in declared.items() if name in catalog
+        for dependency in sorted(dependencies)
+        # Names too long for the column can't be catalog packages
+        if dependency != name and 0 < len(dependency) <= 100
+    ]
+    bulk_insert(table, rows)
+
+    resolve_dependencies(language, catalog)
+
+    logger.info(f"Saved {len(rows)} dependencies of {len(library_ids)} {language} libraries")
+    return len(rows)
+
+def resolve_dependencies(language, catalog=None):
+    """
+    Link dependencies to catalog packages collected after their dependents
+
+    Args:
+        language (str): Language whose dependents are checked
+        catalog (dict): Normalised name -> library id, if already loaded
+
+    Returns:
+        int: Number of edges linked
+    """
+    unresolved = db.session.execute(
+        select(LibraryDependency.library_id, LibraryDependency.dependency_name).
+        join(Library, Library.id == LibraryDependency.library_id).
+        where(LibraryDependency.dependency_id.is_(None), Library.language == language)
+    ).all()
+
+    if not unresolved:
+        return 0
+
+    if catalog is None:
+        catalog = _catalog_ids(language)
+
+    links = [
+        {'edge_library_id': library_id, 'edge_name': name, 'dependency_id': catalog[name]}
+        for library_id, name in unresolved if name in catalog
+    ]
+
+    if links:
+        table = LibraryDependency.__table__
+        db.session.execute(
+            update(table).
+            where(table.c.library_id == bindparam('edge_library_id'), table.c.dependency_name == bindparam('edge_name')).
+            values(dependency_id=bindparam('dependency_id')),
+            links
+        )
+
+    return len(links)
+
+def compute_importance(sources, targets, n, damping=DAMPING, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    PageRank of a dependency graph by sparse power iteration
+
+    Each package passes its score on to its dependencies, split evenly, so a
+    package relied on by many (or by important) packages ranks high. Packages
+    without dependencies spread their score over the whole graph.
+
+    Args:
+        sources (ndarray): Node index of each edge's dependent
+        targets (ndarray): Node index of each edge's dependency
+        n (int): Number of nodes
+        damping (float): Probability of following an edge
+        tolerance (float): L1 change at which iteration stops
+        max_iterations (int): Upper bound on iterations
+
+    Returns:
+        ndarray: Scores summing to n, so the average node scores 1
+    """
+    out_degree = np.bincount(sources, minlength=n).astype(np.float64)
+    dangling = out_degree == 0
+
+    # Column-stochastic transition matrix: column j spreads node j's score over its dependencies
+    transition = sparse.csr_matrix(
+        (1.0 / out_degree[sources], (targets, sources)), shape=(n, n), dtype=np.float64)
+
+    scores = np.full(n, 1.0 / n)
+    for iteration in range(max_iterations):
+        updated = damping * (transition @ scores + scores[dangling].sum() / n) + (1 - damping) / n
+        change = np.abs(updated - scores).sum()
+        scores = updated
+        if change < tolerance:
+            break
+
+    logger.info(f"PageRank over {n} packages and {len(sources)} edges converged after {iteration + 1} iterations")
+    return scores * n
+
+def recompute_importance():
+    """
+    Recompute every library's importance score from the dependency graph and
+    write back the ones that changed
+
+    Libraries outside the graph (no linked dependencies or dependents) score 0.
+    Must be followed by a commit; the caller's transaction covers the update.
+
+    Returns:
+        int: Number of libraries whose score changed
+    """
+    edges = db.session.execute(
+        select(LibraryDependency.library_id, LibraryDependency.dependency_id).
+        where(LibraryDependency.dependency_id.isnot(None))
+    ).all()
+    current = db.session.execute(select(Library.id, Library.importance_score)).all()
+
+    if not current:
+        return 0
+
+    ids = np.array([row.id for row in current])
+    previous = np.array([row.importance_score if row.importance_score is not None else -1.0 for row in current])
+    scores = np.zeros(len(ids), dtype=np.float64)
+
+    if edges:
+        dependents = np.fromiter((row[0] for row in edges), dtype=np.int64, count=len(edges))
+        dependencies = np.fromiter((row[1] for row in edges), dtype=np.int64, count=len(edges))
+        nodes, index = np.unique(np.concatenate([dependents, dependencies]), return_inverse=True)
+
+        graph_scores = compute_importance(index[:len(edges)], index[len(edges):], len(nodes))
+
+        order = np.argsort(ids)
+        positions = order[np.searchsorted(ids, nodes, sorter=order)]
+        scores[positions] = graph_scores
+
+    changed = np.flatnonzero(np.abs(scores - previous) > SCORE_TOLERANCE)
+    update_library_column('importance_score', ids[changed].tolist(), scores[changed].tolist())
+
+    # The ORM didn't see these writes
+    db.session.expire_all()
+
+    logger.info(f"Recomputed importance for {len(ids)} libraries from {len(edges)} dependencies, {len(changed)} changed")
+    return len(changed)
+
+def _catalog_ids(language):
+    """Normalised name -> id of every library in a language"""
+    rows = db.session.execute(select(Library.id, Library.name).where(Library.language == language))
+    return {normalise_name(name, language): library_id for library_id, name in rows}
@@ -0,0 +1,260 @@
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, and_, or_
+from app import db
+from app.models import Library, Version, Subscription, DigestRun, DigestOutbox, library_categories
+from app.bulk_load import bulk_insert
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Outbox rows per INSERT batch
+DIGEST_BATCH_SIZE = int(os.getenv('DIGEST_BATCH_SIZE', 1000))
+
+# Versions released this long before the previous run are history being
+# backfilled, not news, and are left out of digests
+DIGEST_LOOKBACK = timedelta(days=7)
+
+# Ids this far behind the watermark are checked again on the next run. On
+# PostgreSQL ids are handed out before commit, so a transaction that commits
+# after a run can add versions below its watermark.
+DIGEST_RESCAN_IDS = int(os.getenv('DIGEST_RESCAN_IDS', 10000))
+
+def build_subscription_index():
+    """
+    Build the inverted index from subscription keys to subscriber ids
+
+    Keys are ('language', name) and ('category', id) tuples, so a release is
+    matched by looking up its language and each of its categories.
+
+    Returns:
+        dict: Subscription key -> list of user ids
+    """
+    index = defaultdict(list)
+
+    rows = db.session.execute(
+        select(Subscription.user_id, Subscription.category_id, Subscription.language).
+        execution_options(yield_per=10000)
+    )
+
+    for user_id, category_id, language in rows:
+        if category_id is not None:
+            index[('category', category_id)].append(user_id)
+        if language is not None:
+            index[('language', language)].append(user_id)
+
+    return index
+
+def load_new_versions(after_id, until_id=None, released_after=None, limit=None, pending_ranges=None):
+    """
+    Load the versions inserted after a watermark, with their match keys
+
+    Args:
+        after_id (int): Highest Version id already processed
+        until_id (int): Highest Version id to load
+        released_after (datetime): Skip versions released before this time
+        limit (int): Maximum number of versions to load
+        pending_ranges (list): [first, last] id ranges at or below the watermark to load as well
+
+    Returns:
+        list: (version_id, release dict, set of subscription keys), ordered by id
+    """
+    query = select(Version.id, Version.version_number, Version.release_date,
+                   Library.id, Library.name, Library.language).\
+        join(Library, Library.id == Version.library_id).\
+        where(_id_condition(after_id, until_id, pending_ranges)).\
+        order_by(Version.id)
+
+    if released_after is not None:
+        query = query.where(Version.release_date >= released_after)
+    if limit:
+        query = query.limit(limit)
+
+    rows = db.session.execute(query).all()
+
+    if not rows:
+        return []
+
+    # One query for every category of the affected libraries
+    library_categories_map = defaultdict(set)
+    category_rows = db.session.execute(
+        select(library_categories.c.library_id, library_categories.c.category_id).
+        join(Version, Version.library_id == library_categories.c.library_id).
+        where(_id_condition(after_id, rows[-1][0], pending_ranges)).
+        distinct()
+    )
+    for library_id, category_id in category_rows:
+        library_categories_map[library_id].add(category_id)
+
+    versions = []
+    for version_id, version_number, release_date, library_id, name, language in rows:
+        keys = {('category', category_id) for category_id in library_categories_map[library_id]}
+        if language:
+            keys.add(('language', language))
+
+        versions.append((version_id, {
+            'library_id': library_id,
+            'name': name,
+            'language': language,
+            'version': version_number,
+            'release_date': release_date.isoformat() if release_date else None
+        }, keys))
+
+    return versions
+
+def match_digests(versions, index):
+    """
+    Group matched releases into per-user digests
+
+    Releases are bucketed by subscription key, then each subscriber of a
+    touched key collects the keys it matched. Users who matched the same set
+    of keys receive the same digest, so the release list and its JSON are
+    built once per distinct key set rather than once per user.
+
+    Args:
+        versions (list): Output of load_new_versions
+        index (dict): Output of build_subscription_index
+
+    Returns:
+        list: (user ids, version count, JSON payload) per distinct digest
+    """
+    versions_by_key = defaultdict(list)
+    for position, (_, _, keys) in enumerate(versions):
+        for key in keys:
+            versions_by_key[key].append(position)
+
+    user_keys = defaultdict(set)
+    for key in versions_by_key:
+        for user_id in index.get(key, ()):
+            user_keys[user_id].add(key)
+
+    users_by_keys = defaultdict(list)
+    for user_id, keys in user_keys.items():
+        users_by_keys[frozenset(keys)].append(user_id)
+
+    # Each release is encoded once and spliced into every digest containing it
+    encoded = [json.dumps(release) for _, release, _ in versions]
+
+    digests = []
+    for keys, user_ids in users_by_keys.items():
+        positions = sorted(set().union(*(versions_by_key[key] for key in keys)))
+        payload = '[' + ','.join(encoded[position] for position in positions) + ']'
+        digests.append((sorted(user_ids), len(positions), payload))
+
+    return digests
+
+def fan_out_digests(batch_size=DIGEST_BATCH_SIZE):
+    """
+    Match versions added since the last run against all subscriptions and
+    write one outbox row per subscriber with matches
+
+    The first run only records the current end of the version log, so
+    existing history is never sent out as one huge digest, and backfilled
+    releases older than DIGEST_LOOKBACK are skipped. Ids within
+    DIGEST_RESCAN_IDS of the end that had no row yet are recorded and loaded
+    by the next run if they have been committed since, so a version is
+    neither missed nor sent twice. The outbox rows and the new watermark are
+    committed together.
+
+    Args:
+        batch_size (int): Outbox rows per INSERT batch
+
+    Returns:
+        int: Number of digests written
+    """
+    previous = DigestRun.query.order_by(DigestRun.last_version_id.desc(), DigestRun.id.desc()).first()
+    end_id = db.session.query(func.max(Version.id)).scalar() or 0
+    pending_ranges = missing_version_ranges(max(end_id - DIGEST_RESCAN_IDS, 0), end_id)
+
+    if previous is None:
+        db.session.add(DigestRun(last_version_id=end_id, pending_ranges=json.dumps(pending_ranges)))
+        db.session.commit()
+        logger.info(f"Started subscription digests after Version {end_id}")
+        return 0
+
+    previous_ranges = json.loads(previous.pending_ranges or '[]')
+    if end_id <= previous.last_version_id and pending_ranges == previous_ranges:
+        return 0
+
+    # Ids missing at the last run may have been committed since
+    versions = load_new_versions(previous.last_version_id, until_id=end_id,
+                                 released_after=previous.created_at - DIGEST_LOOKBACK,
+                                 pending_ranges=previous_ranges)
+    # Rows committed after the ranges were read are left to the next run, which loads them as pending
+    versions = [version for version in versions
+                if not any(first <= version[0] <= last for first, last in pending_ranges)]
+    digests = match_digests(versions, build_subscription_index()) if versions else []
+
+    # The watermark moves past skipped history too
+    run = DigestRun(last_version_id=max(end_id, previous.last_version_id), version_count=len(versions),
+                    pending_ranges=json.dumps(pending_ranges))
+    db.session.add(run)
+    db.session.flush()  # Get the ID
+
+    now = datetime.utcnow()
+    batch = []
+    digest_count = 0
+
+    for user_ids, version_count, payload in digests:
+        for user_id in user_ids:
+            batch.append({
+                'user_id': user_id,
+                'run_id': run.id,
+                'version_count': version_count,
+                'payload': payload,
+                'created_at': now,
+                'sent_at': None
+            })
+
+            if len(batch) >= batch_size:
+                bulk_insert(DigestOutbox.__table__, batch)
+                digest_count += len(batch)
+                batch = []
+
+    bulk_insert(DigestOutbox.__table__, batch)
+    digest_count += len(batch)
+
+    run.digest_count = digest_count
+    db.session.commit()
+
+    logger.info(f"Matched {len(versions)} new versions into {digest_count} subscription digests")
+    return digest_count
+
+def missing_version_ranges(start, end):
+    """
+    Ids in (start, end] with no Version row yet
+
+    These are inserts still in flight (or rolled back) when the log was read.
+
+    Args:
+        start (int): Exclusive lower bound
+        end (int): Inclusive upper bound
+
+    Returns:
+        list: [first, last] id ranges
+    """
+    present = db.session.execute(
+        select(Version.id).where(Version.id > start, Version.id <= end).order_by(Version.id)).scalars()
+
+    ranges = []
+    expected = start + 1
+    for version_id in present:
+        if version_id > expected:
+            ranges.append([expected, version_id - 1])
+        expected = version_id + 1
+    if expected <= end:
+        ranges.append([expected, end])
+    return ranges
+
+def _id_condition(after_id, until_id, pending_ranges):
+    """Version ids after the watermark (up to until_id), plus the pending ranges below it"""
+    condition = Version.id > after_id
+    if until_id is not None:
+        condition = and_(condition, Version.id <= until_id)
+    if pending_ranges:
+        condition = or_(condition, *(Version.id.between(first, last) for first, last in pending_ranges))
+    return condition
@@ -0,0 +1,267 @@
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, datetime, timedelta
+from sqlalchemy import select
+from app import db
+from app import metrics
+from app import projects
+from app.bulk_load import bulk_insert
+from app.models import Library, DiscoveredRepository
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# GitHub topics searched for new repositories
+DISCOVERY_TOPICS = [topic.strip() for topic in os.getenv(
+    'DISCOVERY_TOPICS', 'machine-learning,deep-learning,artificial-intelligence,llm,generative-ai').split(',')
+    if topic.strip()]
+
+# Repositories with fewer stars aren't worth queueing
+DISCOVERY_MIN_STARS = int(os.getenv('DISCOVERY_MIN_STARS', 50))
+
+# Earliest creation date of a full sweep (GitHub launched in 2008)
+DISCOVERY_START = os.getenv('DISCOVERY_START', '2008-01-01')
+
+# Creation window of the scheduled run; older repositories are left to full sweeps
+DISCOVERY_RECENT_DAYS = int(os.getenv('DISCOVERY_RECENT_DAYS', 30))
+
+# Searches in flight at once
+DISCOVERY_WORKERS = int(os.getenv('DISCOVERY_WORKERS', 4))
+
+# Search requests per minute (GitHub allows 30 with a token, 10 without); 0 disables pacing
+GITHUB_SEARCH_RATE = float(os.getenv('GITHUB_SEARCH_RATE', 30 if os.getenv('GITHUB_TOKEN') else 10))
+
+# GitHub returns at most this many results per query, however many match
+SEARCH_RESULT_CAP = 1000
+PER_PAGE = 100
+
+# Attempts per page after being rate limited
+MAX_RETRIES = 3
+
+class RateBudget:
+    """
+    Spaces requests from several threads to a shared rate
+
+    Each request takes the next free slot; a rate-limit response pushes
+    every later slot back until the limit resets.
+
+    Args:
+        per_minute (float): Requests per minute, or 0 for no limit
+    """
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait for this request's slot"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+
+        if slot > now:
+            metrics.wait('github', slot - now)
+
+    def pause(self, seconds):
+        """Hold all requests for the given time"""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+class SeenSet:
+    """Repository keys already in the catalog or the queue, held as 20-byte digests"""
+
+    def __init__(self, keys=()):
+        self._digests = {bytes.fromhex(key) for key in keys}
+
+    def add(self, key):
+        """Record a key; True if it wasn't seen before"""
+        digest = bytes.fromhex(key)
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+    def __contains__(self, key):
+        return bytes.fromhex(key) in self._digests
+
+    def __len__(self):
+        return len(self._digests)
+
+def discover_repositories(topics=None, since=None, until=None, min_stars=DISCOVERY_MIN_STARS,
+                          workers=DISCOVERY_WORKERS, rate=GITHUB_SEARCH_RATE):
+    """
+    Search GitHub topics for repositories that aren't known yet and queue them for ingestion
+
+    Each topic is searched over a creation-date range. A range matching more
+    than SEARCH_RESULT_CAP repositories is split into smaller ranges (down to
+    single days) until every slice can be paged through completely. Pages are
+    fetched by a thread pool within the shared search rate; results are
+    deduplicated by repository key against the catalog and the queue.
+    Must be followed by a commit.
+
+    Args:
+        topics (list): Topics to search, defaults to DISCOVERY_TOPICS
+        since (date): Earliest creation date, defaults to DISCOVERY_START
+        until (date): Latest creation date, defaults to today
+        min_stars (int): Minimum stars of a repository
+        workers (int): Searches in flight at once
+        rate (float): Search requests per minute, 0 for no limit
+
+    Returns:
+        dict: Number of searches, failed searches, truncated slices, repositories found and queued
+    """
+    topics = topics or DISCOVERY_TOPICS
+    since = since or date.fromisoformat(DISCOVERY_START)
+    until = until or datetime.utcnow().date()
+
+    seen = SeenSet(_known_keys())
+    budget = RateBudget(rate)
+    candidates = []
+    counts = {'searches': 0, 'failed': 0, 'truncated': 0, 'found': 0, 'queued': 0}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = {}
+
+        def submit(topic, start, end, page):
+            future = pool.submit(_fetch_page, budget, _search_query(topic, start, end, min_stars), page)
+            pending[future] = (topic, start, end, page)
+
+        for topic in topics:
+            submit(topic, since, until, 1)
+
+        # Results are handled on this thread, so the seen-set and session need no locking
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                topic, start, end, page = pending.pop(future)
+                result = future.result()
+                counts['searches'] += 1
+
+                if result is None:
+                    counts['failed'] += 1
+                    continue
+
+                total = result['total_count']
+                if page == 1 and total > SEARCH_RESULT_CAP:
+                    if end > start:
+                        for slice_start, slice_end in split_range(start, end, math.ceil(total / SEARCH_RESULT_CAP)):
+                            submit(topic, slice_start, slice_end, 1)
+                        continue
+
+                    counts['truncated'] += 1
+                    logger.warning(f"{total} repositories for topic {topic} created on {start}; only "
+                                   f"{SEARCH_RESULT_CAP} can be listed")
+
+                if page == 1:
+                    for next_page in range(2, math.ceil(min(total, SEARCH_RESULT_CAP) / PER_PAGE) + 1):
+                        submit(topic, start, end, next_page)
+
+                for repo in result['items']:
+                    counts['found'] += 1
+                    key = projects.repository_key(repo['url'])
+                    if key and seen.add(key):
+                        candidates.append(_candidate(repo, key, topic))
+
+    counts['queued'] = queue_candidates(candidates)
+
+    logger.info(f"Discovery ran {counts['searches']} searches ({counts['failed']} failed), found "
+                f"{counts['found']} repositories and queued {counts['queued']} new ones")
+    return counts
+
+def discover_recent_repositories(days=DISCOVERY_RECENT_DAYS):
+    """Discover repositories created in the last few days; see discover_repositories"""
+    today = datetime.utcnow().date()
+    return discover_repositories(since=today - timedelta(days=days), until=today)
+
+def split_range(start, end, parts):
+    """
+    Split an inclusive date range into consecutive sub-ranges
+
+    Args:
+        start (date): First day
+        end (date): Last day
+        parts (int): Desired number of sub-ranges (at least 2, at most one per day)
+
+    Returns:
+        list: (start, end) pairs covering the range
+    """
+    days = (end - start).days + 1
+    parts = max(2, min(parts, days))
+
+    ranges = []
+    for index in range(parts):
+        slice_start = start + timedelta(days=days * index // parts)
+        slice_end = start + timedelta(days=days * (index + 1) // parts - 1)
+        ranges.append((slice_start, slice_end))
+    return ranges
+
+def queue_candidates(candidates):
+    """
+    Add discovered repositories to the ingestion queue
+
+    Args:
+        candidates (list): Row dicts for DiscoveredRepository
+
+    Returns:
+        int: Number of repositories queued
+    """
+    bulk_insert(DiscoveredRepository.__table__, candidates)
+    return len(candidates)
+
+def _fetch_page(budget, query, page):
+    """Fetch one search page within the rate budget, waiting out rate limits; None if it can't be fetched"""
+    # Imported here so requests loads only when discovery runs
+    from app.data_sources import github
+
+    for attempt in range(MAX_RETRIES + 1):
+        budget.acquire()
+        try:
+            return github.search_repositories(query, page=page, per_page=PER_PAGE)
+        except github.RateLimitExceeded as e:
+            logger.warning(f"Search rate limited, pausing {e.retry_after:.0f}s ({query} page {page})")
+            budget.pause(e.retry_after)
+
+    return None
+
+def _search_query(topic, start, end, min_stars):
+    """GitHub search query for a topic's repositories created in a date range"""
+    query = f"topic:{topic} created:{start.isoformat()}..{end.isoformat()}"
+    if min_stars:
+        query += f" stars:>={min_stars}"
+    return query
+
+def _candidate(repo, key, topic):
+    """Queue row for a search result"""
+    created_at = None
+    if repo.get('created_at'):
+        try:
+            created_at = datetime.strptime(repo['created_at'], '%Y-%m-%dT%H:%M:%SZ')
+        except ValueError:
+            pass
+
+    return {
+        'repository_key': key,
+        'full_name': repo['full_name'],
+        'url': repo['url'],
+        'description': repo.get('description'),
+        'language': repo.get('language'),
+        'stars': repo.get('stars') or 0,
+        'topic': topic,
+        'created_at': created_at,
+        'discovered_at': datetime.utcnow(),
+        'ingested_at': None
+    }
+
+def _known_keys():
+    """Repository keys of the catalog and of repositories already queued"""
+    library_keys = db.session.execute(
+        select(Library.repository_key).where(Library.repository_key.isnot(None)).distinct()).scalars()
+    queued_keys = db.session.execute(select(DiscoveredRepository.repository_key)).scalars()
+    return [*library_keys, *queued_keys]
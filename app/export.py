@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import select, exists, or_
+from app import db
+from app.models import Library, Category, library_categories
+
+# Rows fetched from the database cursor at a time
+EXPORT_CHUNK_SIZE = 1000
+
+# Column order for CSV exports
+CSV_FIELDS = [
+    'id', 'name', 'description', 'language', 'current_version', 'last_update',
+    'repository_url', 'documentation_url', 'package_url', 'popularity_score',
+    'github_stars', 'monthly_downloads', 'categories'
+]
+
+def iter_libraries(language=None, category_id=None, search=None, since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream libraries from the database in id order
+
+    Rows are read through a server-side cursor ``chunk_size`` at a time, and
+    the categories for each chunk are loaded with one extra query, so memory
+    use does not grow with the size of the catalog.
+
+    Args:
+        language (str): Only export libraries in this language
+        category_id (int): Only export libraries in this category
+        search (str): Only export libraries whose name or description matches
+        since (datetime): Only export libraries updated at or after this time
+        chunk_size (int): Number of rows per fetch
+
+    Yields:
+        dict: Library data in the same shape as the API
+    """
+    query = select(Library.__table__).order_by(Library.id)
+
+    if language:
+        query = query.where(Library.language == language)
+
+    if category_id:
+        query = query.where(exists().where(
+            library_categories.c.library_id == Library.id,
+            library_categories.c.category_id == category_id
+        ))
+
+    if search:
+        query = query.where(or_(Library.name.ilike(f'%{search}%'), Library.description.ilike(f'%{search}%')))
+
+    if since:
+        query = query.where(Library.last_update >= since)
+
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+
+    for rows in result.partitions():
+        categories = _categories_for([row.id for row in rows])
+
+        for row in rows:
+            yield {
+                'id': row.id,
+                'name': row.name,
+                'description': row.description,
+                'language': row.language,
+                'current_version': row.current_version,
+                'last_update': row.last_update.isoformat() if row.last_update else None,
+                'repository_url': row.repository_url,
+                'documentation_url': row.documentation_url,
+                'package_url': row.package_url,
+                'popularity_score': row.popularity_score,
+                'github_stars': row.github_stars,
+                'monthly_downloads': row.monthly_downloads,
+                'categories': categories.get(row.id, [])
+            }
+
+def render_ndjson(libraries):
+    """
+    Encode libraries as newline-delimited JSON
+
+    Args:
+        libraries (iterable): Library dicts from iter_libraries
+
+    Yields:
+        str: One JSON document per line
+    """
+    for library in libraries:
+        yield json.dumps(library) + '\n'
+
+def render_csv(libraries, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Encode libraries as CSV with a header row
+
+    Category names are joined with ``|`` in the categories column.
+
+    Args:
+        libraries (iterable): Library dicts from iter_libraries
+        chunk_size (int): Number of rows per yielded string
+
+    Yields:
+        str: Blocks of CSV text
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+
+    for count, library in enumerate(libraries, 1):
+        row = dict(library)
+        row['categories'] = '|'.join(category['name'] for category in library['categories'])
+        writer.writerow(row)
+
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+# Supported export formats: name -> (renderer, mimetype)
+EXPORT_FORMATS = {
+    'ndjson': (render_ndjson, 'application/x-ndjson'),
+    'csv': (render_csv, 'text/csv')
+}
+
+def parse_since(value):
+    """
+    Parse a ``since`` timestamp given as an ISO date or datetime
+
+    Returns:
+        datetime: Parsed value, or None if empty
+
+    Raises:
+        ValueError: If the value is not ISO formatted
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+def _categories_for(library_ids):
+    """Load category dicts for a chunk of library ids with a single query"""
+    if not library_ids:
+        return {}
+
+    rows = db.session.execute(
+        select(library_categories.c.library_id, Category.id, Category.name, Category.category_type).
+        join(Category, Category.id == library_categories.c.category_id).
+        where(library_categories.c.library_id.in_(library_ids))
+    )
+
+    categories = {}
+    for library_id, category_id, name, category_type in rows:
+        categories.setdefault(library_id, []).append({
+            'id': category_id,
+            'name': name,
+            'type': category_type
+        })
+
+    return categories
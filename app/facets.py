@@ -0,0 +1,81 @@
+from sqlalchemy import func
+from app import db
+from app import aggregates
+from app.models import Library, Category, library_categories
+
+def facet_counts(languages=None, category_ids=None, search=None):
+    """
+    Libraries per language and per category for a listing filter
+
+    Served from the catalog index's bitmaps when it is up to date, otherwise
+    from SQL. Each facet is counted under the other facets' selections and the
+    search but not its own, so a count is what the listing would hold with
+    that value (also) selected. Libraries in several selected categories are
+    counted once.
+
+    Args:
+        languages (list): Selected languages
+        category_ids (list): Selected category ids
+        search (str): Case-insensitive substring of the name or description
+
+    Returns:
+        dict: 'total' matching the whole filter, 'languages' (language -> count)
+            and 'categories' (category id -> count)
+    """
+    from app.catalog_index import current_index
+
+    index = current_index()
+    if index is not None:
+        return index.facet_counts(languages, category_ids, search)
+
+    language_rows = filter_libraries(
+        db.session.query(Library.language, func.count(Library.id)).filter(Library.language.isnot(None)),
+        category_ids=category_ids, search=search
+    ).group_by(Library.language).all()
+
+    category_rows = filter_libraries(
+        db.session.query(library_categories.c.category_id, func.count(Library.id)).
+        join(Library, Library.id == library_categories.c.library_id),
+        languages=languages, search=search
+    ).group_by(library_categories.c.category_id).all()
+
+    total = filter_libraries(Library.query, languages, category_ids, search).count()
+
+    # Values with no matches are listed with 0
+    language_counts = {language: 0 for language, _ in aggregates.language_counts()}
+    language_counts.update(language_rows)
+    category_counts = {category_id: 0 for (category_id,) in db.session.query(Category.id)}
+    category_counts.update(category_rows)
+
+    return {
+        'total': total,
+        'languages': dict(sorted(language_counts.items())),
+        'categories': category_counts
+    }
+
+def filter_libraries(query, languages=None, category_ids=None, search=None):
+    """
+    Apply a listing filter to a query over Library
+
+    Categories are matched with EXISTS rather than a join, so a library in
+    several selected categories appears once.
+
+    Args:
+        query (Query): Query selecting from Library
+        languages (list): Languages to keep
+        category_ids (list): Category ids to keep
+        search (str): Case-insensitive substring of the name or description
+
+    Returns:
+        Query: The filtered query
+    """
+    if search:
+        query = query.filter(Library.name.ilike(f'%{search}%') | Library.description.ilike(f'%{search}%'))
+
+    if languages:
+        query = query.filter(Library.language.in_(languages))
+
+    if category_ids:
+        query = query.filter(Library.categories.any(Category.id.in_(category_ids)))
+
+    return query
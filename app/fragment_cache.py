@@ -0,0 +1,148 @@
+import json
+import threading
+from collections import OrderedDict
+from flask import current_app, g, has_app_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+class FragmentCache:
+    """
+    In-process LRU cache of rendered template fragments
+
+    Entries are keyed on the catalog's data generation, so everything rendered
+    before a collection run is dropped as soon as the generation moves on.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def get_or_render(self, generation, key, render):
+        """
+        Return the cached fragment for key, rendering and storing it on a miss
+
+        Args:
+            generation (int): Current data generation
+            key (str): Fragment key, unique per fragment and argument values
+            render (callable): Produces the fragment markup
+
+        Returns:
+            Markup: Rendered fragment
+        """
+        with self._lock:
+            if generation != self._generation:
+                self._entries.clear()
+                self._generation = generation
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        # Render outside the lock; two threads may render the same fragment once each
+        fragment = Markup(render())
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = fragment
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return fragment
+
+    def clear(self):
+        """Drop every cached fragment"""
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+
+class FragmentCacheExtension(Extension):
+    """
+    Jinja ``{% cache %}`` tag
+
+    The first argument names the fragment and any further arguments are the
+    values it depends on::
+
+        {% cache 'libraries-filters', selected_languages, sort %}
+            ...
+        {% endcache %}
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+
+        key_parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key_parts.append(parser.parse_expression())
+
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_cached', [nodes.List(key_parts)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, key_parts, caller):
+        if not has_app_context() or not current_app.config.get('FRAGMENT_CACHE_ENABLED', True):
+            return caller()
+
+        key = json.dumps(key_parts, sort_keys=True, default=str)
+        return current_app.extensions['fragment_cache'].get_or_render(current_generation(), key, caller)
+
+class LazyValue:
+    """
+    Template value computed on first use
+
+    Routes pass expensive query results wrapped in LazyValue so that pages
+    served from cached fragments never run the queries.
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._evaluated = False
+        self._value = None
+
+    @property
+    def value(self):
+        if not self._evaluated:
+            self._value = self._func(*self._args, **self._kwargs)
+            self._evaluated = True
+        return self._value
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __contains__(self, item):
+        return item in self.value
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.value, name)
+
+    def __str__(self):
+        return str(self.value)
+
+def init_fragment_cache(app):
+    """Attach a fragment cache and the {% cache %} tag to the app"""
+    app.extensions['fragment_cache'] = FragmentCache(app.config['FRAGMENT_CACHE_SIZE'])
+    app.jinja_env.add_extension(FragmentCacheExtension)
+
+def current_generation():
+    """Data generation of the catalog, read once per request"""
+    if 'data_generation' not in g:
+        from app.aggregates import catalog_summary
+        g.data_generation = catalog_summary().generation or 0
+    return g.data_generation
@@ -0,0 +1,292 @@
+import functools
+import threading
+import time
+from flask import Response, g, request
+
+# Histogram buckets, in seconds
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SOURCE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+JOB_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Every metric, in the order they are rendered
+REGISTRY = []
+
+class Metric:
+    """
+    A named metric with labelled series, rendered in the Prometheus text format
+
+    Series are created on first use of a label combination; keep label values
+    to small fixed sets (source names, endpoints) so the output stays bounded.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        """Series for the given label values, in labelnames order"""
+        values = tuple(str(value) for value in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = self._new_series()
+            return _Series(self, series)
+
+    def values(self):
+        """Current value of every counter or gauge series, keyed by label values"""
+        with self._lock:
+            return {values: series[0] for values, series in self._series.items()}
+
+    def render(self):
+        """Lines of this metric in the Prometheus text format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                lines.extend(self._render_series(dict(zip(self.labelnames, values)), series))
+        return lines
+
+    def _new_series(self):
+        return [0.0]
+
+    def _render_series(self, labels, series):
+        return [f"{self.name}{_format_labels(labels)} {_format_value(series[0])}"]
+
+class Counter(Metric):
+    """Monotonically increasing total"""
+
+    kind = 'counter'
+
+    def _inc(self, series, amount=1.0):
+        series[0] += amount
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def _set(self, series, value):
+        series[0] = float(value)
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=REQUEST_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_series(self):
+        # Per-bucket counts, then the sum and count of all observations
+        return [0] * len(self.buckets) + [0.0, 0]
+
+    def _observe(self, series, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def _render_series(self, labels, series):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, series):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(dict(labels, le=_format_value(bound)))} {cumulative}")
+        lines.append(f"{self.name}_bucket{_format_labels(dict(labels, le='+Inf'))} {series[-1]}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {series[-1]}")
+        return lines
+
+class _Series:
+    """One labelled series of a metric; updates go through the metric's lock"""
+
+    def __init__(self, metric, series):
+        self._metric = metric
+        self._series = series
+
+    def inc(self, amount=1.0):
+        with self._metric._lock:
+            self._metric._inc(self._series, amount)
+
+    def set(self, value):
+        with self._metric._lock:
+            self._metric._set(self._series, value)
+
+    def observe(self, value):
+        with self._metric._lock:
+            self._metric._observe(self._series, value)
+
+    def get(self):
+        """Current value of a counter or gauge"""
+        with self._metric._lock:
+            return self._series[0]
+
+# Data sources
+SOURCE_REQUESTS = Counter(
+    'genaipulse_source_requests_total', 'Requests sent to a data source, by response status',
+    ('source', 'status'))
+SOURCE_LATENCY = Histogram(
+    'genaipulse_source_request_duration_seconds', 'Data source request latency',
+    ('source',), buckets=SOURCE_BUCKETS)
+SOURCE_BYTES = Counter(
+    'genaipulse_source_response_bytes_total', 'Response body bytes received from a data source',
+    ('source',))
+SOURCE_RATE_LIMITED = Counter(
+    'genaipulse_source_rate_limited_total', 'Responses from a data source refusing a request for rate limiting',
+    ('source',))
+SOURCE_RATE_LIMIT_REMAINING = Gauge(
+    'genaipulse_source_rate_limit_remaining', 'Requests left in the rate limit window, where the source reports it',
+    ('source',))
+SOURCE_WAIT_SECONDS = Counter(
+    'genaipulse_source_wait_seconds_total', 'Time spent pausing between requests to a data source',
+    ('source',))
+
+# Collection jobs
+COLLECTED_PACKAGES = Counter(
+    'genaipulse_collected_packages_total', 'Packages returned by the collectors',
+    ('language',))
+LAST_RUN_PACKAGES = Gauge(
+    'genaipulse_collector_last_run_packages', 'Packages returned by the last collection run',
+    ('language',))
+JOB_DURATION = Histogram(
+    'genaipulse_job_duration_seconds', 'Scheduled job duration',
+    ('job',), buckets=JOB_BUCKETS)
+JOB_LAST_RUN = Gauge(
+    'genaipulse_job_last_run_timestamp_seconds', 'Unix time the job last finished',
+    ('job',))
+
+# Web
+HTTP_LATENCY = Histogram(
+    'genaipulse_http_request_duration_seconds', 'Time to produce a response, by route',
+    ('endpoint', 'method', 'status'))
+
+def http_get(source, url, **kwargs):
+    """
+    requests.get that records the request against a data source
+
+    Goes through the HTTP cassettes when HTTP_CASSETTE_MODE is set.
+
+    Args:
+        source (str): Data source name, e.g. 'pypi'
+        url (str): URL to fetch
+        **kwargs: Passed to requests.get
+
+    Returns:
+        Response: The response
+    """
+    # Imported here so the web app doesn't load requests until a collector runs
+    import requests
+    from app.cassettes import active_cassettes
+
+    cassettes = active_cassettes()
+    started = time.perf_counter()
+    try:
+        response = cassettes.get(source, url, **kwargs) if cassettes else requests.get(url, **kwargs)
+    except requests.RequestException:
+        SOURCE_REQUESTS.labels(source, 'error').inc()
+        SOURCE_LATENCY.labels(source).observe(time.perf_counter() - started)
+        raise
+
+    SOURCE_REQUESTS.labels(source, response.status_code).inc()
+    SOURCE_LATENCY.labels(source).observe(time.perf_counter() - started)
+    SOURCE_BYTES.labels(source).inc(len(response.content))
+
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    if remaining is not None and remaining.isdigit():
+        SOURCE_RATE_LIMIT_REMAINING.labels(source).set(int(remaining))
+
+    if response.status_code == 429 or (response.status_code == 403 and
+                                       (remaining == '0' or 'rate limit' in response.text.lower())):
+        SOURCE_RATE_LIMITED.labels(source).inc()
+
+    return response
+
+def wait(source, seconds):
+    """Pause between requests to a data source and record the time spent"""
+    from app.cassettes import replaying
+
+    # Replayed requests never reach the registry, so there is nothing to be polite to
+    if replaying():
+        return
+
+    time.sleep(seconds)
+    SOURCE_WAIT_SECONDS.labels(source).inc(seconds)
+
+def record_collected(language, count):
+    """Record the number of packages a collection run returned"""
+    COLLECTED_PACKAGES.labels(language).inc(count)
+    LAST_RUN_PACKAGES.labels(language).set(count)
+
+def timed_job(name):
+    """Decorator recording a scheduled job's duration and completion time"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                JOB_DURATION.labels(name).observe(time.perf_counter() - started)
+                JOB_LAST_RUN.labels(name).set(time.time())
+        return wrapper
+    return decorator
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+def init_metrics(app):
+    """Time every request by route and serve /metrics"""
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            HTTP_LATENCY.labels(endpoint, request.method, response.status_code).observe(
+                time.perf_counter() - started)
+        return response
+
+    def metrics():
+        """Prometheus scrape endpoint"""
+        return Response(render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
+
+def _format_labels(labels):
+    """Render a label set as {name="value",...}"""
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return '{' + pairs + '}'
+
+def _escape(value):
+    """Escape a label value"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_value(value):
+    """Render a sample value, without a trailing .0 on whole numbers"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
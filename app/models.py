@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.versioning import version_sort_key, is_prerelease
 
 # Association tables for many-to-many relationships
 library_categories = db.Table('library_categories',
@@ -7,6 +8,12 @@ library_categories = db.Table('library_categories',
     db.Column('category_id', db.Integer, db.ForeignKey('category.id'), primary_key=True)
 )
 
+def _repository_key(context):
+    """Repository key of a library being inserted"""
+    # Imported here because app.projects imports the models
+    from app.projects import repository_key
+    return repository_key(context.get_current_parameters().get('repository_url'))
+
 class Library(db.Model):
     """Model for AI libraries/packages"""
     id = db.Column(db.Integer, primary_key=True)
@@ -16,9 +23,12 @@ class Library(db.Model):
     current_version = db.Column(db.String(50))
     last_update = db.Column(db.DateTime, default=datetime.utcnow)
     repository_url = db.Column(db.String(255))
+    # Hashed canonical repository, shared by a project's packages across registries (see app.projects)
+    repository_key = db.Column(db.String(40), index=True, default=lambda context: _repository_key(context))
     documentation_url = db.Column(db.String(255))
     package_url = db.Column(db.String(255))
     popularity_score = db.Column(db.Float, default=0.0)
+    importance_score = db.Column(db.Float, default=0.0)  # PageRank over the dependency graph, see app.dependency_graph
     monthly_downloads = db.Column(db.Integer, default=0)
     github_stars = db.Column(db.Integer, default=0)
     
@@ -27,6 +37,11 @@ class Library(db.Model):
                               lazy='subquery', backref=db.backref('libraries', lazy=True))
     versions = db.relationship('Version', backref='library', lazy=True)
     
+    # A package is identified by its name within a language's registry
+    __table_args__ = (
+        db.UniqueConstraint('name', 'language', name='uq_library_name_language'),
+    )
+    
     def __repr__(self):
         return f'<Library {self.name}>'
 
@@ -40,6 +55,11 @@ class Category(db.Model):
     def __repr__(self):
         return f'<Category {self.name}>'
 
+def _version_language(context):
+    """Language of the library a version being inserted belongs to, for the key defaults"""
+    library_id = context.get_current_parameters()['library_id']
+    return context.connection.scalar(db.select(Library.language).where(Library.id == library_id))
+
 class Version(db.Model):
     """Model for library version history"""
     id = db.Column(db.Integer, primary_key=True)
@@ -47,6 +67,20 @@ class Version(db.Model):
     version_number = db.Column(db.String(50), nullable=False)
     release_date = db.Column(db.DateTime, default=datetime.utcnow)
     release_notes = db.Column(db.Text)
+    # Derived from version_number and the library's language on insert, see app.versioning;
+    # bulk inserts pass them in to skip the language lookup
+    sort_key = db.Column(db.String(255), default=lambda context: version_sort_key(
+        context.get_current_parameters()['version_number'], _version_language(context)))
+    is_prerelease = db.Column(db.Boolean, default=lambda context: is_prerelease(
+        context.get_current_parameters()['version_number'], _version_language(context)))
+    
+    # Release feed windows are range scans on release_date; a library lists each version once;
+    # version order and latest stable are scans on (library_id, is_prerelease, sort_key)
+    __table_args__ = (
+        db.Index('ix_version_release_date_library', 'release_date', 'library_id'),
+        db.Index('uq_version_library_number', 'library_id', 'version_number', unique=True),
+        db.Index('ix_version_library_stable_key', 'library_id', 'is_prerelease', 'sort_key'),
+    )
     
     def __repr__(self):
         return f'<Version {self.version_number} of Library {self.library_id}>'
@@ -79,4 +113,114 @@ class Subscription(db.Model):
     )
     
     def __repr__(self):
-        return f'<Subscription {self.id} for User {self.user_id}>' 
\ No newline at end of file
+        return f'<Subscription {self.id} for User {self.user_id}>' 
+
+class VersionBackfill(db.Model):
+    """How far a library's version history has been backfilled from its registry"""
+    library_id = db.Column(db.Integer, db.ForeignKey('library.id'), primary_key=True)
+    last_release_date = db.Column(db.DateTime)  # Newest release seen in the registry
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<VersionBackfill {self.library_id} up to {self.last_release_date}>'
+
+class DigestRun(db.Model):
+    """One subscription digest fan-out, recording how far the version log was processed"""
+    id = db.Column(db.Integer, primary_key=True)
+    last_version_id = db.Column(db.Integer, nullable=False)
+    version_count = db.Column(db.Integer, nullable=False, default=0)
+    digest_count = db.Column(db.Integer, nullable=False, default=0)
+    pending_ranges = db.Column(db.Text, nullable=True)  # JSON [first, last] id ranges not yet visible below the watermark
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DigestRun {self.id} up to Version {self.last_version_id}>'
+
+class DigestOutbox(db.Model):
+    """Per-user digest of new releases waiting to be delivered"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('digest_run.id'), nullable=False)
+    version_count = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON list of matched releases
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True, index=True)  # Set by the delivery worker
+    
+    def __repr__(self):
+        return f'<DigestOutbox {self.id} for User {self.user_id}>'
+
+class LibraryDependency(db.Model):
+    """Package a library declares as a dependency, linked to its catalog entry once it has one"""
+    library_id = db.Column(db.Integer, db.ForeignKey('library.id'), primary_key=True)
+    dependency_name = db.Column(db.String(100), primary_key=True)  # Normalised registry name
+    dependency_id = db.Column(db.Integer, db.ForeignKey('library.id'), nullable=True)
+    
+    # Dependents of a library are looked up by dependency_id
+    __table_args__ = (
+        db.Index('ix_library_dependency_dependency', 'dependency_id'),
+    )
+    
+    def __repr__(self):
+        return f'<LibraryDependency {self.library_id} -> {self.dependency_name}>'
+
+class DiscoveredRepository(db.Model):
+    """GitHub repository found by discovery search, queued for ingestion"""
+    id = db.Column(db.Integer, primary_key=True)
+    repository_key = db.Column(db.String(40), nullable=False, unique=True)  # See app.projects
+    full_name = db.Column(db.String(255), nullable=False)
+    url = db.Column(db.String(255))
+    description = db.Column(db.Text)
+    language = db.Column(db.String(50))
+    stars = db.Column(db.Integer, default=0)
+    topic = db.Column(db.String(100))  # Topic search that found it
+    created_at = db.Column(db.DateTime)  # Repository creation on GitHub
+    discovered_at = db.Column(db.DateTime, default=datetime.utcnow)
+    ingested_at = db.Column(db.DateTime, nullable=True, index=True)  # Unset until ingested; nothing ingests the queue yet
+    
+    def __repr__(self):
+        return f'<DiscoveredRepository {self.full_name}>'
+
+class SimilarLibrary(db.Model):
+    """Precomputed nearest neighbour of a library, rebuilt by app.similarity"""
+    library_id = db.Column(db.Integer, db.ForeignKey('library.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    similar_id = db.Column(db.Integer, db.ForeignKey('library.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    
+    def __repr__(self):
+        return f'<SimilarLibrary {self.library_id} #{self.rank}: {self.similar_id}>'
+
+class LanguageStat(db.Model):
+    """Maintained library count per language"""
+    language = db.Column(db.String(50), primary_key=True)
+    library_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<LanguageStat {self.language}: {self.library_count}>'
+
+class CategoryStat(db.Model):
+    """Maintained library count per category"""
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), primary_key=True)
+    library_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<CategoryStat {self.category_id}: {self.library_count}>'
+
+class LanguageCategoryStat(db.Model):
+    """Maintained library count per language and category pair"""
+    language = db.Column(db.String(50), primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), primary_key=True)
+    library_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<LanguageCategoryStat {self.language}/{self.category_id}: {self.library_count}>'
+
+class CatalogStat(db.Model):
+    """Single-row summary of the whole catalog"""
+    id = db.Column(db.Integer, primary_key=True)
+    total_libraries = db.Column(db.Integer, nullable=False, default=0)
+    last_update = db.Column(db.DateTime)
+    generation = db.Column(db.Integer, nullable=False, default=0)  # Bumped whenever catalog data changes
+    
+    def __repr__(self):
+        return f'<CatalogStat {self.total_libraries} libraries>'
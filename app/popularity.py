@@ -0,0 +1,125 @@
+import logging
+import os
+import numpy as np
+from scipy.stats import rankdata
+from sqlalchemy import select
+from app import db
+from app.bulk_load import update_library_column
+from app.models import Library
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Relative weight of each popularity signal
+POPULARITY_WEIGHTS = {
+    'downloads': float(os.getenv('POPULARITY_DOWNLOAD_WEIGHT', 0.7)),
+    'stars': float(os.getenv('POPULARITY_STAR_WEIGHT', 0.3)),
+    'importance': float(os.getenv('POPULARITY_IMPORTANCE_WEIGHT', 0.3))
+}
+
+# Share of each signal taken from log-scaled magnitude rather than rank.
+# Ranks make ecosystems comparable; magnitude keeps the gap between a huge
+# project and the runner-up from collapsing to one rank step.
+LOG_BLEND = float(os.getenv('POPULARITY_LOG_BLEND', 0.3))
+
+# Scores that moved less than this are not written back
+SCORE_TOLERANCE = 1e-6
+
+def compute_scores(languages, downloads, stars, importance=None, weights=None, log_blend=LOG_BLEND):
+    """
+    Score libraries from their downloads, stars and dependency-graph importance, per ecosystem
+
+    Each signal is turned into a percentile rank within the library's
+    language (ties share the average rank, zero counts score zero) blended
+    with log1p(value) / log1p(ecosystem max). Signals an ecosystem doesn't
+    report at all (e.g. Maven downloads) are dropped and the remaining
+    weights renormalised, so every ecosystem spans the same 0-1 range.
+    Importance (see app.dependency_graph) only counts where dependency data
+    has been collected.
+
+    Args:
+        languages (ndarray): Language of each library
+        downloads (ndarray): Monthly downloads of each library
+        stars (ndarray): GitHub stars of each library
+        importance (ndarray): Dependency-graph importance of each library
+        weights (dict): Overrides for POPULARITY_WEIGHTS
+        log_blend (float): Share of each signal from log-scaled magnitude
+
+    Returns:
+        ndarray: Scores between 0 and 1
+    """
+    weights = dict(POPULARITY_WEIGHTS, **(weights or {}))
+    signals = {
+        'downloads': np.maximum(np.nan_to_num(downloads.astype(np.float64)), 0),
+        'stars': np.maximum(np.nan_to_num(stars.astype(np.float64)), 0)
+    }
+    if importance is not None:
+        signals['importance'] = np.maximum(np.nan_to_num(importance.astype(np.float64)), 0)
+    scores = np.zeros(len(languages), dtype=np.float64)
+
+    for language in np.unique(languages):
+        members = np.flatnonzero(languages == language)
+        total = np.zeros(len(members), dtype=np.float64)
+        total_weight = 0.0
+
+        for name, values in signals.items():
+            values = values[members]
+            if not weights.get(name) or not values.any():
+                continue
+
+            nonzero = values > 0
+            ranks = np.zeros(len(values), dtype=np.float64)
+            ranks[nonzero] = rankdata(values[nonzero]) / nonzero.sum()
+
+            magnitude = np.log1p(values) / np.log1p(values.max())
+
+            total += weights[name] * ((1 - log_blend) * ranks + log_blend * magnitude)
+            total_weight += weights[name]
+
+        if total_weight:
+            scores[members] = total / total_weight
+
+    return scores
+
+def recompute_popularity(weights=None):
+    """
+    Recompute every library's popularity score in one pass and write back
+    the ones that changed
+
+    Reads the stored importance scores, so run
+    dependency_graph.recompute_importance first when the graph has changed.
+
+    Must be followed by a commit; the caller's transaction covers the update.
+
+    Args:
+        weights (dict): Overrides for POPULARITY_WEIGHTS
+
+    Returns:
+        int: Number of libraries whose score changed
+    """
+    rows = db.session.execute(
+        select(Library.id, Library.language, Library.monthly_downloads, Library.github_stars,
+               Library.importance_score, Library.popularity_score)
+    ).all()
+
+    if not rows:
+        return 0
+
+    ids = np.array([row.id for row in rows])
+    languages = np.array([row.language or '' for row in rows], dtype=object)
+    downloads = np.array([row.monthly_downloads or 0 for row in rows], dtype=np.float64)
+    stars = np.array([row.github_stars or 0 for row in rows], dtype=np.float64)
+    importance = np.array([row.importance_score or 0 for row in rows], dtype=np.float64)
+    current = np.array([row.popularity_score if row.popularity_score is not None else -1.0 for row in rows])
+
+    scores = compute_scores(languages, downloads, stars, importance, weights=weights)
+    changed = np.flatnonzero(np.abs(scores - current) > SCORE_TOLERANCE)
+
+    update_library_column('popularity_score', ids[changed].tolist(), scores[changed].tolist())
+
+    # The ORM didn't see these writes
+    db.session.expire_all()
+
+    logger.info(f"Recomputed popularity for {len(rows)} libraries, {len(changed)} changed")
+    return len(changed)
@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import re
+from urllib.parse import urlsplit
+from sqlalchemy import select, update, bindparam, func
+from app import db
+from app.models import Library
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Code hosts whose URLs start with /owner/repo; anything else isn't grouped
+CODE_HOSTS = {'github.com', 'gitlab.com', 'bitbucket.org'}
+
+# npm-style shorthands, e.g. "github:owner/repo"
+HOST_SHORTHANDS = {'github': 'github.com', 'gitlab': 'gitlab.com', 'bitbucket': 'bitbucket.org'}
+
+# scp-style git remotes, e.g. "git@github.com:owner/repo.git"
+SCP_REMOTE = re.compile(r'^[\w.-]+@([\w.-]+):(.+)$')
+
+# Rows per UPDATE batch
+UPDATE_CHUNK_SIZE = 1000
+
+def canonical_repository(url):
+    """
+    Reduce a repository URL to host/owner/repo
+
+    Handles the forms the registries report: https and git:// URLs with or
+    without git+ prefixes and .git suffixes, scp-style remotes, npm
+    shorthands and links into a subdirectory or branch of the repository.
+
+    Args:
+        url (str): Repository URL as collected
+
+    Returns:
+        str: Lowercased "host/owner/repo", or None for URLs not on a known code host
+    """
+    url = (url or '').strip()
+    if not url:
+        return None
+
+    if url.startswith('git+'):
+        url = url[4:]
+
+    scp = SCP_REMOTE.match(url)
+    shorthand, _, rest = url.partition(':')
+    if scp and '//' not in url:
+        host, path = scp.groups()
+    elif shorthand in HOST_SHORTHANDS and not rest.startswith('//'):
+        host, path = HOST_SHORTHANDS[shorthand], rest
+    else:
+        parts = urlsplit(url if '//' in url else '//' + url)
+        host, path = parts.hostname or '', parts.path
+
+    host = host.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if host not in CODE_HOSTS:
+        return None
+
+    segments = [segment for segment in path.split('/') if segment]
+    if len(segments) < 2:
+        return None
+
+    owner, repo = segments[0].lower(), segments[1].lower()
+    if repo.endswith('.git'):
+        repo = repo[:-4]
+    if not repo:
+        return None
+
+    return f"{host}/{owner}/{repo}"
+
+def repository_key(url):
+    """
+    Hashed canonical repository of a URL, shared by every library built from that repository
+
+    Args:
+        url (str): Repository URL as collected
+
+    Returns:
+        str: 40-character hex key, or None if the URL can't be canonicalised
+    """
+    canonical = canonical_repository(url)
+    return hashlib.sha1(canonical.encode()).hexdigest() if canonical else None
+
+def assign_repository_keys(missing_only=True):
+    """
+    Store each library's repository key
+
+    Must be followed by a commit.
+
+    Args:
+        missing_only (bool): Only key libraries that have a repository URL but no key yet
+
+    Returns:
+        int: Number of libraries updated
+    """
+    query = select(Library.id, Library.repository_url, Library.repository_key)
+    if missing_only:
+        query = query.where(Library.repository_key.is_(None), Library.repository_url.isnot(None),
+                            Library.repository_url != '')
+
+    changes = []
+    for library_id, url, current in db.session.execute(query):
+        key = repository_key(url)
+        if key != current:
+            changes.append({'library_id': library_id, 'key': key})
+
+    table = Library.__table__
+    for start in range(0, len(changes), UPDATE_CHUNK_SIZE):
+        db.session.execute(
+            update(table).where(table.c.id == bindparam('library_id')).values(repository_key=bindparam('key')),
+            changes[start:start + UPDATE_CHUNK_SIZE]
+        )
+
+    if changes:
+        logger.info(f"Assigned repository keys to {len(changes)} libraries")
+    return len(changes)
+
+def github_repositories():
+    """
+    Every GitHub repository referenced by the catalog, once each
+
+    Returns:
+        dict: Repository key -> (owner, repo)
+    """
+    rows = db.session.execute(
+        select(Library.repository_key, Library.repository_url).
+        where(Library.repository_key.isnot(None), Library.repository_url.ilike('%github%'))
+    )
+
+    repositories = {}
+    for key, url in rows:
+        if key in repositories:
+            continue
+        canonical = canonical_repository(url)
+        if canonical and canonical.startswith('github.com/'):
+            _, owner, repo = canonical.split('/')
+            repositories[key] = (owner, repo)
+
+    return repositories
+
+def apply_github_data(results):
+    """
+    Copy fetched repository data to every library of each repository
+
+    Must be followed by a commit.
+
+    Args:
+        results (dict): Repository key -> data from github.get_repository_data
+
+    Returns:
+        int: Number of libraries updated
+    """
+    changes = [{'key': key, 'stars': data['stars']} for key, data in results.items() if data.get('stars') is not None]
+
+    table = Library.__table__
+    updated = 0
+    for start in range(0, len(changes), UPDATE_CHUNK_SIZE):
+        chunk = changes[start:start + UPDATE_CHUNK_SIZE]
+        db.session.execute(
+            update(table).where(table.c.repository_key == bindparam('key')).values(github_stars=bindparam('stars')),
+            chunk
+        )
+        # executemany rowcounts aren't reliable across drivers
+        updated += db.session.execute(
+            select(func.count()).select_from(table).where(table.c.repository_key.in_([change['key'] for change in chunk]))
+        ).scalar()
+
+    # The ORM didn't see these writes
+    db.session.expire_all()
+    return updated
+
+def project_libraries(library):
+    """
+    The other libraries built from the same repository, e.g. a project's PyPI and npm packages
+
+    Args:
+        library (Library): Library to find siblings of
+
+    Returns:
+        list: Libraries sharing its repository key, by language
+    """
+    if not library.repository_key:
+        return []
+
+    return Library.query.filter(Library.repository_key == library.repository_key, Library.id != library.id).\
+        order_by(Library.language, Library.name).all()
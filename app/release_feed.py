@@ -0,0 +1,189 @@
+import base64
+from datetime import datetime, timedelta
+from sqlalchemy import select, exists, func, or_, and_
+from app import db
+from app.models import Library, Version, library_categories
+
+# Default and maximum releases per page
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+
+# Supported chart bucket sizes
+BUCKETS = ('day', 'week', 'month')
+
+def release_window(days=None, start=None, end=None):
+    """
+    Resolve a release window from a day count or explicit bounds
+
+    Args:
+        days (int): Window length ending at ``end`` (or now)
+        start (datetime): Inclusive lower bound
+        end (datetime): Exclusive upper bound, defaults to now
+
+    Returns:
+        tuple: (start, end) datetimes
+    """
+    end = end or datetime.utcnow()
+    if start is None:
+        start = end - timedelta(days=days if days is not None else 30)
+    return start, end
+
+def query_releases(start, end, language=None, category_id=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Get one page of releases in a window, newest first
+
+    The window is a range scan on the (release_date, library_id) index. Pages
+    are keyset-paginated on (release_date, id), so deep pages cost the same
+    as the first.
+
+    Args:
+        start (datetime): Inclusive lower bound on release_date
+        end (datetime): Exclusive upper bound on release_date
+        language (str): Only releases of libraries in this language
+        category_id (int): Only releases of libraries in this category
+        cursor (str): next_cursor from the previous page
+        limit (int): Releases per page
+
+    Returns:
+        tuple: (list of release dicts, next_cursor or None)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = select(
+        Version.id, Version.version_number, Version.release_date, Version.release_notes,
+        Library.id.label('library_id'), Library.name, Library.language
+    ).join(
+        Library, Library.id == Version.library_id
+    ).where(
+        Version.release_date >= start,
+        Version.release_date < end
+    )
+    query = _apply_filters(query, language, category_id)
+
+    if cursor:
+        release_date, version_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Version.release_date < release_date,
+            and_(Version.release_date == release_date, Version.id < version_id)
+        ))
+
+    # Fetch one extra row to know whether there is a next page
+    rows = db.session.execute(
+        query.order_by(Version.release_date.desc(), Version.id.desc()).limit(limit + 1)
+    ).all()
+
+    releases = [{
+        'id': row.id,
+        'version_number': row.version_number,
+        'release_date': row.release_date.isoformat(),
+        'release_notes': row.release_notes,
+        'library': {
+            'id': row.library_id,
+            'name': row.name,
+            'language': row.language
+        }
+    } for row in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.release_date, last.id)
+
+    return releases, next_cursor
+
+def release_counts(start, end, bucket='day', language=None, category_id=None):
+    """
+    Count releases per day, week or month of a window, for charts
+
+    The database groups by calendar day; days are folded into weeks (starting
+    Monday) or months here, which keeps the SQL portable across backends.
+    Empty buckets are included with a count of zero.
+
+    Args:
+        start (datetime): Inclusive lower bound on release_date
+        end (datetime): Exclusive upper bound on release_date
+        bucket (str): One of BUCKETS
+        language (str): Only releases of libraries in this language
+        category_id (int): Only releases of libraries in this category
+
+    Returns:
+        list: {'start': ISO date, 'count': int} dicts in date order
+    """
+    day = func.date(Version.release_date)
+    query = select(day, func.count(Version.id)).where(
+        Version.release_date >= start,
+        Version.release_date < end
+    )
+
+    if language:
+        query = query.join(Library, Library.id == Version.library_id)
+    query = _apply_filters(query, language, category_id)
+
+    counts = {}
+    for value, count in db.session.execute(query.group_by(day)):
+        # SQLite returns the date as text, PostgreSQL as a date
+        key = _bucket_start(datetime.strptime(str(value)[:10], '%Y-%m-%d').date(), bucket)
+        counts[key] = counts.get(key, 0) + count
+
+    # The end bound is exclusive
+    last_day = (end - timedelta(microseconds=1)).date()
+
+    result = []
+    current = _bucket_start(start.date(), bucket)
+    while current <= last_day:
+        result.append({'start': current.isoformat(), 'count': counts.get(current, 0)})
+        current = _next_bucket(current, bucket)
+
+    return result
+
+def encode_cursor(release_date, version_id):
+    """Opaque page cursor for a (release_date, id) position"""
+    return base64.urlsafe_b64encode(f"{release_date.isoformat()}|{version_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    """
+    Decode a page cursor
+
+    Returns:
+        tuple: (release_date, version_id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        release_date, version_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(release_date), int(version_id)
+    except (TypeError, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def _apply_filters(query, language, category_id):
+    """Add language and category filters; the language filter expects Library to be joined"""
+    if language:
+        query = query.where(Library.language == language)
+
+    if category_id:
+        query = query.where(exists().where(
+            library_categories.c.library_id == Version.library_id,
+            library_categories.c.category_id == category_id
+        ))
+
+    return query
+
+def _bucket_start(day, bucket):
+    """First day of the bucket containing a date"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+def _next_bucket(day, bucket):
+    """First day of the bucket after the one starting at a date"""
+    if bucket == 'week':
+        return day + timedelta(days=7)
+    if bucket == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
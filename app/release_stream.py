@@ -0,0 +1,275 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app import db
+from app.models import Version
+from app.digests import load_new_versions, missing_version_ranges
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Recent releases kept in memory for Last-Event-ID resume
+RELEASE_LOG_SIZE = int(os.getenv('RELEASE_LOG_SIZE', 1000))
+
+# Seconds between checks for releases saved by other processes
+STREAM_POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', 5))
+
+# Seconds of silence before a keep-alive comment is sent
+STREAM_HEARTBEAT = float(os.getenv('STREAM_HEARTBEAT', 15))
+
+# Events buffered per client before a slow client is disconnected
+STREAM_QUEUE_SIZE = 1000
+
+# Older releases showing up in the version log are backfilled history, not news
+STREAM_MAX_AGE = timedelta(days=7)
+
+# Ids this far below the newest version that had no row at a sync are loaded
+# by a later sync once committed (PostgreSQL assigns ids before commit)
+STREAM_RESCAN_IDS = int(os.getenv('STREAM_RESCAN_IDS', 10000))
+
+class ReleaseSubscriber:
+    """A connected stream client and the releases it asked for"""
+
+    def __init__(self, languages=None, category_ids=None):
+        self.languages = set(languages or ())
+        self.category_ids = set(category_ids or ())
+        self.queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.dropped = False
+
+    def matches(self, event):
+        """Whether a release passes this client's language and category filters"""
+        if self.languages and event['language'] not in self.languages:
+            return False
+        if self.category_ids and not self.category_ids.intersection(event['category_ids']):
+            return False
+        return True
+
+class ReleaseBroker:
+    """
+    In-process pub/sub of new releases
+
+    Releases are read from the Version table once per process, by the save
+    path right after a collection commits and by a poller for releases
+    saved in other processes, then pushed to every matching client. A ring
+    buffer of recent releases serves Last-Event-ID resumes without a query.
+    The buffer is in publish order, which is id order except for releases
+    committed after a sync had already passed their id.
+    """
+
+    def __init__(self, log_size=RELEASE_LOG_SIZE):
+        self._log = deque(maxlen=log_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._last_id = None
+        self._pending_ranges = []  # Ids at or below _last_id with no row at the last sync
+        self._log_floor = None  # The log holds every published release after this id
+        self._poller = None
+
+    def sync(self):
+        """
+        Publish every release added since the last sync
+
+        The first sync only fills the log with the most recent releases, for
+        resumes; releases already saved when the broker started are never
+        pushed to clients as new. Ids within STREAM_RESCAN_IDS of the end that
+        had no row yet are loaded by a later sync once committed, as in
+        fan_out_digests. Must be called inside an app context.
+
+        Returns:
+            int: Number of releases published
+        """
+        with self._sync_lock:
+            max_id = db.session.query(func.max(Version.id)).scalar() or 0
+            pending_ranges = missing_version_ranges(max(max_id - STREAM_RESCAN_IDS, 0), max_id)
+            priming = self._last_id is None
+            if priming:
+                # Prime the log with the most recent releases
+                self._last_id = max(0, max_id - self._log.maxlen)
+                self._log_floor = self._last_id
+
+            versions = load_new_versions(self._last_id, until_id=max_id,
+                                         released_after=datetime.utcnow() - STREAM_MAX_AGE,
+                                         pending_ranges=self._pending_ranges)
+            # Rows committed after the ranges were read are left to the next sync, which loads them as pending
+            events = [_release_event(version_id, release, keys) for version_id, release, keys in versions
+                      if not any(first <= version_id <= last for first, last in pending_ranges)]
+            # Don't hold a read transaction open between syncs
+            db.session.rollback()
+
+            self._last_id = max(self._last_id, max_id)
+            self._pending_ranges = pending_ranges
+            if priming:
+                with self._lock:
+                    self._append(events)
+                return 0
+
+            if events:
+                self.publish(events)
+
+            return len(events)
+
+    def publish(self, events):
+        """Append releases to the log and push them to matching clients"""
+        with self._lock:
+            self._append(events)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            for event in events:
+                if not subscriber.matches(event):
+                    continue
+                try:
+                    subscriber.queue.put_nowait(event)
+                except queue.Full:
+                    # The client isn't reading; it can reconnect with Last-Event-ID
+                    subscriber.dropped = True
+                    self.unsubscribe(subscriber)
+                    break
+
+    def _append(self, events):
+        """Add releases to the log; the caller holds the lock"""
+        overflow = len(self._log) + len(events) - self._log.maxlen
+        if overflow > 0:
+            # Late releases make the log out of id order, so the floor is the highest id pushed out
+            evicted = (list(self._log) + list(events))[:overflow]
+            self._log_floor = max([self._log_floor or 0] + [event['id'] for event in evicted])
+        self._log.extend(events)
+
+    def subscribe(self, app, languages=None, category_ids=None):
+        """Register a client, starting the poller on first use"""
+        subscriber = ReleaseSubscriber(languages, category_ids)
+
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, args=(app,), daemon=True)
+                self._poller.start()
+
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a client"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def replay(self, after_id):
+        """
+        Releases after an event id, for a resuming client
+
+        Served from the in-memory log when it reaches back far enough, and from
+        the database otherwise, a page of RELEASE_LOG_SIZE releases at a time.
+        A client whose last event is still in the log gets everything
+        published after it, including late releases with lower ids.
+
+        Args:
+            after_id (int): Last event id the client received
+
+        Returns:
+            iterable: Release events
+        """
+        with self._lock:
+            log = list(self._log)
+            floor = self._log_floor
+
+        for position, event in enumerate(log):
+            if event['id'] == after_id:
+                return log[position + 1:]
+
+        if floor is not None and after_id >= floor:
+            return [event for event in log if event['id'] > after_id]
+
+        return self._replay_from_database(after_id)
+
+    def _replay_from_database(self, after_id):
+        """Release events after an id in id order, read a page at a time"""
+        released_after = datetime.utcnow() - STREAM_MAX_AGE
+        while True:
+            versions = load_new_versions(after_id, released_after=released_after, limit=self._log.maxlen)
+            for version_id, release, keys in versions:
+                yield _release_event(version_id, release, keys)
+
+            if len(versions) < self._log.maxlen:
+                return
+            after_id = versions[-1][0]
+
+    def _poll(self, app):
+        """Background loop picking up releases committed by other processes"""
+        while True:
+            try:
+                with app.app_context():
+                    self.sync()
+            except Exception as e:
+                logger.error(f"Error polling for new releases: {str(e)}")
+
+            time.sleep(STREAM_POLL_INTERVAL)
+
+broker = ReleaseBroker()
+
+def publish_new_releases():
+    """Push releases committed by the save path to connected stream clients"""
+    try:
+        broker.sync()
+    except Exception as e:
+        logger.error(f"Error publishing new releases: {str(e)}")
+        db.session.rollback()
+
+def iter_events(app, languages=None, category_ids=None, last_event_id=None):
+    """
+    Yield a client's Server-Sent Events stream
+
+    The client is subscribed before the replay is read, so no release falls
+    between the two; releases in both are sent once. Live releases are sent
+    whatever their id, since one committed late can have a lower id than
+    releases the client already has.
+
+    Args:
+        app (Flask): Application, for the poller's app context
+        languages (list): Only stream releases in these languages
+        category_ids (list): Only stream releases in these categories
+        last_event_id (int): Resume after this event id
+
+    Yields:
+        str: SSE frames
+    """
+    subscriber = broker.subscribe(app, languages, category_ids)
+    replayed_ids = set()
+
+    try:
+        # Reconnect delay for EventSource, in milliseconds
+        yield "retry: 3000\n\n"
+
+        if last_event_id is not None:
+            for event in broker.replay(last_event_id):
+                if subscriber.matches(event):
+                    yield _format_event(event)
+                    replayed_ids.add(event['id'])
+            db.session.rollback()
+
+        while not subscriber.dropped:
+            try:
+                event = subscriber.queue.get(timeout=STREAM_HEARTBEAT)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+
+            if event['id'] not in replayed_ids:
+                yield _format_event(event)
+    finally:
+        broker.unsubscribe(subscriber)
+
+def _release_event(version_id, release, keys):
+    """Stream event for a version loaded by load_new_versions"""
+    return dict(release, id=version_id,
+                category_ids=sorted(value for kind, value in keys if kind == 'category'))
+
+def _format_event(event):
+    """Encode a release as an SSE frame"""
+    return f"id: {event['id']}\nevent: release\ndata: {json.dumps(event)}\n\n"
@@ -1,8 +1,13 @@
-from flask import Blueprint, jsonify, request
-from app.models import Library, Category, Version
-from app import db
-from sqlalchemy import func
-from datetime import datetime
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
+from app.models import Library, Category, Version, CategoryStat, LibraryDependency
+from app import aggregates
+from app import release_stream
+from app import release_feed
+from app import versioning
+from app import projects
+from app import facets
+from sqlalchemy import tuple_
+from datetime import datetime, timedelta
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -17,36 +22,46 @@ def get_libraries():
     offset = request.args.get('offset', 0, type=int)
     sort = request.args.get('sort', 'popularity')
     
-    # Base query
-    query = Library.query
-    
-    # Apply filters
-    if language:
-        query = query.filter(Library.language == language)
-    
-    if category_id:
-        query = query.join(Library.categories).filter(Category.id == category_id)
-    
-    if search:
-        query = query.filter(Library.name.ilike(f'%{search}%') | 
-                           Library.description.ilike(f'%{search}%'))
-    
-    # Apply sorting
-    if sort == 'popularity':
-        query = query.order_by(Library.popularity_score.desc())
-    elif sort == 'newest':
-        query = query.order_by(Library.last_update.desc())
-    elif sort == 'name':
-        query = query.order_by(Library.name)
-    
-    # Get total count
-    total_count = query.count()
-    
-    # Apply pagination
-    query = query.limit(limit).offset(offset)
-    
-    # Execute query
-    libraries = query.all()
+    # Filter and sort on the memory-mapped catalog index when it is up to date
+    from app.catalog_index import current_index, load_libraries
+    index = current_index()
+    
+    if index is not None:
+        ids, total_count = index.query(languages=[language] if language else None,
+                                       category_ids=[category_id] if category_id else None,
+                                       search=search, sort=sort, offset=offset, limit=limit)
+        libraries = load_libraries(ids)
+    else:
+        # Base query
+        query = Library.query
+        
+        # Apply filters
+        if language:
+            query = query.filter(Library.language == language)
+        
+        if category_id:
+            query = query.join(Library.categories).filter(Category.id == category_id)
+        
+        if search:
+            query = query.filter(Library.name.ilike(f'%{search}%') | 
+                               Library.description.ilike(f'%{search}%'))
+        
+        # Apply sorting
+        if sort == 'popularity':
+            query = query.order_by(Library.popularity_score.desc())
+        elif sort == 'newest':
+            query = query.order_by(Library.last_update.desc())
+        elif sort == 'name':
+            query = query.order_by(Library.name)
+        
+        # Get total count
+        total_count = query.count()
+        
+        # Apply pagination
+        query = query.limit(limit).offset(offset)
+        
+        # Execute query
+        libraries = query.all()
     
     # Format results
     result = {
@@ -63,15 +78,206 @@ def get_library(library_id):
     """API endpoint to get details of a specific library"""
     library = Library.query.get_or_404(library_id)
     
-    # Get versions
-    versions = Version.query.filter_by(library_id=library_id).order_by(Version.release_date.desc()).all()
+    # Get versions, highest first (unparseable version strings last)
+    versions = Version.query.filter_by(library_id=library_id).\
+               order_by(Version.sort_key.is_(None), Version.sort_key.desc()).all()
+    
+    # Get the highest stable version
+    latest_stable = versioning.latest_stable_versions([library_id]).get(library_id)
     
     # Format library with versions
     result = format_library(library)
+    result['latest_stable_version'] = latest_stable.version_number if latest_stable else None
     result['versions'] = [format_version(v) for v in versions]
     
+    # The same project's packages in other registries
+    result['project_libraries'] = [
+        {'id': lib.id, 'name': lib.name, 'language': lib.language, 'current_version': lib.current_version}
+        for lib in projects.project_libraries(library)
+    ]
+    
+    return jsonify(result)
+
+@api_bp.route('/libraries/<int:library_id>/dependencies')
+def get_library_dependencies(library_id):
+    """API endpoint to get the packages a library depends on"""
+    library = Library.query.get_or_404(library_id)
+    
+    edges = LibraryDependency.query.filter_by(library_id=library.id).\
+            order_by(LibraryDependency.dependency_name).all()
+    
+    # Dependencies in the catalog, loaded in one query
+    dependency_ids = [edge.dependency_id for edge in edges if edge.dependency_id is not None]
+    libraries = {lib.id: lib for lib in Library.query.filter(Library.id.in_(dependency_ids)).all()} \
+                if dependency_ids else {}
+    
+    result = {
+        'library_id': library.id,
+        'total': len(edges),
+        'dependencies': [
+            {
+                'name': edge.dependency_name,
+                'library': format_library(libraries[edge.dependency_id]) if edge.dependency_id in libraries else None
+            }
+            for edge in edges
+        ]
+    }
+    
+    return jsonify(result)
+
+@api_bp.route('/libraries/<int:library_id>/dependents')
+def get_library_dependents(library_id):
+    """API endpoint to get the catalog libraries that depend on a library, most important first"""
+    library = Library.query.get_or_404(library_id)
+    limit = request.args.get('limit', 100, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    
+    query = Library.query.join(LibraryDependency, LibraryDependency.library_id == Library.id).\
+            filter(LibraryDependency.dependency_id == library.id)
+    
+    total_count = query.count()
+    dependents = query.order_by(Library.importance_score.desc(), Library.id).limit(limit).offset(offset).all()
+    
+    result = {
+        'library_id': library.id,
+        'total': total_count,
+        'limit': limit,
+        'offset': offset,
+        'dependents': [format_library(lib) for lib in dependents]
+    }
+    
+    return jsonify(result)
+
+@api_bp.route('/libraries/batch', methods=['GET', 'POST'])
+def get_libraries_batch():
+    """API endpoint to get several libraries with their versions in one call"""
+    # Ids come from ?ids=1,2,3 or a JSON body of {"ids": [...], "libraries": [{"name": ..., "language": ...}]}
+    if request.method == 'POST':
+        payload = request.get_json(silent=True) or {}
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'Body must be a JSON object with ids and/or libraries'}), 400
+        raw_ids = payload.get('ids') or []
+        raw_pairs = payload.get('libraries') or []
+        # Strings would otherwise be read one character at a time
+        if not isinstance(raw_ids, list) or not isinstance(raw_pairs, list):
+            return jsonify({'error': 'ids and libraries must be lists'}), 400
+    else:
+        raw_ids = [i for i in request.args.get('ids', '').split(',') if i.strip()]
+        raw_pairs = []
+    
+    try:
+        library_ids = [int(i) for i in raw_ids]
+        pairs = [_pair(p) for p in raw_pairs]
+    except (TypeError, ValueError, KeyError, IndexError):
+        return jsonify({'error': 'ids must be integers and libraries must be (name, language) pairs of strings'}), 400
+    
+    max_batch = current_app.config['API_MAX_BATCH_SIZE']
+    if len(library_ids) + len(pairs) > max_batch:
+        return jsonify({'error': f'Batch size exceeds the maximum of {max_batch}'}), 400
+    
+    # One query per lookup kind, however large the batch
+    found = []
+    if library_ids:
+        found.extend(Library.query.filter(Library.id.in_(library_ids)).all())
+    if pairs:
+        found.extend(Library.query.filter(tuple_(Library.name, Library.language).in_(pairs)).all())
+    
+    by_id = {lib.id: lib for lib in found}
+    by_pair = {(lib.name, lib.language): lib for lib in found}
+    
+    # Get versions for every library at once
+    versions_by_library = {}
+    if by_id:
+        versions = Version.query.filter(Version.library_id.in_(list(by_id))).\
+                   order_by(Version.sort_key.is_(None), Version.sort_key.desc()).all()
+        for version in versions:
+            versions_by_library.setdefault(version.library_id, []).append(version)
+    
+    # Keep the request order, listing each library once
+    ordered = []
+    seen = set()
+    missing_ids = []
+    missing_pairs = []
+    
+    for library_id in library_ids:
+        lib = by_id.get(library_id)
+        if lib is None:
+            missing_ids.append(library_id)
+        elif lib.id not in seen:
+            seen.add(lib.id)
+            ordered.append(lib)
+    
+    for name, language in pairs:
+        lib = by_pair.get((name, language))
+        if lib is None:
+            missing_pairs.append({'name': name, 'language': language})
+        elif lib.id not in seen:
+            seen.add(lib.id)
+            ordered.append(lib)
+    
+    # Format results
+    libraries = []
+    for lib in ordered:
+        formatted = format_library(lib)
+        formatted['versions'] = [format_version(v) for v in versions_by_library.get(lib.id, [])]
+        libraries.append(formatted)
+    
+    result = {
+        'libraries': libraries,
+        'not_found': {
+            'ids': missing_ids,
+            'libraries': missing_pairs
+        }
+    }
+    
     return jsonify(result)
 
+@api_bp.route('/export')
+def export_libraries():
+    """API endpoint to stream the whole catalog as NDJSON or CSV"""
+    from app.export import iter_libraries, parse_since, EXPORT_FORMATS
+    
+    # Get query parameters
+    export_format = request.args.get('format', 'ndjson')
+    language = request.args.get('language')
+    category_id = request.args.get('category_id', type=int)
+    search = request.args.get('search')
+    
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    try:
+        since = parse_since(request.args.get('since'))
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO date or datetime'}), 400
+    
+    renderer, mimetype = EXPORT_FORMATS[export_format]
+    libraries = iter_libraries(language=language, category_id=category_id, search=search, since=since)
+    
+    # Rows are rendered as they are fetched; nothing is buffered
+    response = Response(stream_with_context(renderer(libraries)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=genai_pulse_libraries.{export_format}'
+    return response
+
+@api_bp.route('/stream')
+def stream_releases():
+    """Server-Sent Events stream of new releases, resumable with Last-Event-ID"""
+    languages = request.args.getlist('language')
+    category_ids = request.args.getlist('category_id', type=int)
+    
+    # EventSource sends Last-Event-ID on reconnect; the query parameter is for first connects
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get('last_event_id', type=int)
+    
+    events = release_stream.iter_events(current_app._get_current_object(), languages=languages,
+                                        category_ids=category_ids, last_event_id=last_event_id)
+    
+    response = Response(stream_with_context(events), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @api_bp.route('/categories')
 def get_categories():
     """API endpoint to get all categories"""
@@ -86,22 +292,15 @@ def get_categories():
         query = query.filter(Category.category_type == type_filter)
     
     # Add library count
-    subquery = db.session.query(
-        Category.id.label('category_id'),
-        func.count(Library.id).label('library_count')
-    ).join(
-        Category.libraries
-    ).group_by(
-        Category.id
-    ).subquery()
+    library_count = aggregates.category_count_column()
     
     query = query.outerjoin(
-        subquery, 
-        Category.id == subquery.c.category_id
+        CategoryStat, 
+        Category.id == CategoryStat.category_id
     ).add_columns(
-        func.coalesce(subquery.c.library_count, 0).label('library_count')
+        library_count.label('library_count')
     ).order_by(
-        func.coalesce(subquery.c.library_count, 0).desc()
+        library_count.desc()
     )
     
     # Execute query
@@ -125,28 +324,23 @@ def get_categories():
 @api_bp.route('/trends')
 def get_trends():
     """API endpoint to get trending libraries and statistics"""
-    # Get trending libraries
-    trending_libraries = Library.query.order_by(Library.popularity_score.desc()).limit(10).all()
-    
-    # Get language distribution
-    language_stats = db.session.query(
-        Library.language,
-        func.count(Library.id).label('count')
-    ).group_by(
-        Library.language
-    ).all()
-    
-    # Get category distribution
-    category_stats = db.session.query(
-        Category.name,
-        func.count(Library.id).label('count')
-    ).join(
-        Category.libraries
-    ).group_by(
-        Category.name
-    ).order_by(
-        func.count(Library.id).desc()
-    ).limit(10).all()
+    from app.catalog_index import current_index, load_libraries
+    index = current_index()
+    
+    if index is not None:
+        # Precomputed popularity order and counts from the catalog index
+        trending_libraries = load_libraries(index.query(sort='popularity', limit=10)[0])
+        language_stats = index.language_counts()
+        category_stats = index.category_counts(limit=10)
+    else:
+        # Get trending libraries
+        trending_libraries = Library.query.order_by(Library.popularity_score.desc()).limit(10).all()
+        
+        # Get language distribution
+        language_stats = aggregates.language_counts()
+        
+        # Get category distribution
+        category_stats = aggregates.category_counts(limit=10)
     
     # Format results
     result = {
@@ -156,8 +350,39 @@ def get_trends():
             for lang, count in language_stats
         ],
         'category_distribution': [
-            {'category': cat, 'count': count}
-            for cat, count in category_stats
+            {'category': name, 'count': count}
+            for _, name, count in category_stats
+        ]
+    }
+    
+    return jsonify(result)
+
+@api_bp.route('/facets')
+def get_facets():
+    """API endpoint to get library counts per language and category for a filter"""
+    # Repeat language or category_id to select several; values within a facet are alternatives
+    languages = request.args.getlist('language')
+    category_ids = request.args.getlist('category_id', type=int)
+    search = request.args.get('search')
+    
+    counts = facets.facet_counts(languages, category_ids, search)
+    categories = Category.query.order_by(Category.name).all()
+    
+    result = {
+        'total': counts['total'],
+        'languages': [
+            {'language': language, 'count': count, 'selected': language in languages}
+            for language, count in counts['languages'].items()
+        ],
+        'categories': [
+            {
+                'id': category.id,
+                'name': category.name,
+                'type': category.category_type,
+                'count': counts['categories'].get(category.id, 0),
+                'selected': category.id in category_ids
+            }
+            for category in categories
         ]
     }
     
@@ -172,39 +397,87 @@ def get_latest():
     
     # Calculate cutoff date
     cutoff_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    cutoff_date = cutoff_date.replace(day=cutoff_date.day - days)
+    cutoff_date = cutoff_date - timedelta(days=days)
     
     # Get latest libraries
     latest_libraries = Library.query.filter(Library.last_update >= cutoff_date).\
                       order_by(Library.last_update.desc()).\
                       limit(limit).all()
     
+    # Get latest releases from the version history
+    latest_releases, _ = release_feed.query_releases(cutoff_date, datetime.now(), limit=limit)
+    
     # Format results
     result = {
         'latest_libraries': [format_library(lib) for lib in latest_libraries],
+        'latest_releases': latest_releases,
         'cutoff_date': cutoff_date.isoformat(),
         'days': days
     }
     
     return jsonify(result)
 
+@api_bp.route('/releases')
+def get_releases():
+    """API endpoint to page through releases in a time window, newest first"""
+    try:
+        start, end = _release_window_args()
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO dates or datetimes'}), 400
+    
+    language = request.args.get('language')
+    category_id = request.args.get('category_id', type=int)
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', release_feed.DEFAULT_PAGE_SIZE, type=int)
+    
+    try:
+        releases, next_cursor = release_feed.query_releases(start, end, language=language, category_id=category_id,
+                                                            cursor=cursor, limit=limit)
+    except ValueError:
+        return jsonify({'error': 'invalid cursor'}), 400
+    
+    return jsonify({
+        'releases': releases,
+        'next_cursor': next_cursor,
+        'start': start.isoformat(),
+        'end': end.isoformat()
+    })
+
+@api_bp.route('/releases/counts')
+def get_release_counts():
+    """API endpoint to count releases per day, week or month of a time window"""
+    try:
+        start, end = _release_window_args()
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO dates or datetimes'}), 400
+    
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in release_feed.BUCKETS:
+        return jsonify({'error': f"bucket must be one of: {', '.join(release_feed.BUCKETS)}"}), 400
+    
+    counts = release_feed.release_counts(start, end, bucket=bucket, language=request.args.get('language'),
+                                         category_id=request.args.get('category_id', type=int))
+    
+    return jsonify({
+        'bucket': bucket,
+        'counts': counts,
+        'start': start.isoformat(),
+        'end': end.isoformat()
+    })
+
 @api_bp.route('/stats')
 def get_stats():
     """API endpoint to get general statistics"""
     # Get total counts
-    total_libraries = Library.query.count()
+    catalog = aggregates.catalog_summary()
+    total_libraries = catalog.total_libraries
     total_categories = Category.query.count()
     
     # Get language counts
-    language_counts = db.session.query(
-        Library.language,
-        func.count(Library.id).label('count')
-    ).group_by(
-        Library.language
-    ).all()
+    language_counts = aggregates.language_counts()
     
     # Get last update time
-    last_update = db.session.query(func.max(Library.last_update)).scalar()
+    last_update = catalog.last_update
     
     # Format results
     result = {
@@ -220,6 +493,31 @@ def get_stats():
     return jsonify(result)
 
 # Helper functions
+def _release_window_args():
+    """Read a release window from the days, start and end query parameters"""
+    start = request.args.get('start')
+    end = request.args.get('end')
+    
+    return release_feed.release_window(
+        days=request.args.get('days', type=int),
+        start=datetime.fromisoformat(start) if start else None,
+        end=datetime.fromisoformat(end) if end else None
+    )
+
+def _pair(value):
+    """(name, language) from a {"name", "language"} object or a two-item list"""
+    if isinstance(value, dict):
+        name, language = value['name'], value['language']
+    elif isinstance(value, list) and len(value) == 2:
+        name, language = value
+    else:
+        raise ValueError(f"Not a (name, language) pair: {value!r}")
+
+    # Pairs are looked up as dict keys, so both must be hashable scalars
+    if not isinstance(name, str) or not (language is None or isinstance(language, str)):
+        raise ValueError(f"Name and language must be strings: {value!r}")
+    return name, language
+
 def format_library(library):
     """Format a library object for API response"""
     return {
@@ -233,6 +531,7 @@ def format_library(library):
         'documentation_url': library.documentation_url,
         'package_url': library.package_url,
         'popularity_score': library.popularity_score,
+        'importance_score': library.importance_score,
         'github_stars': library.github_stars,
         'monthly_downloads': library.monthly_downloads,
         'categories': [
@@ -251,5 +550,6 @@ def format_version(version):
         'id': version.id,
         'version_number': version.version_number,
         'release_date': version.release_date.isoformat() if version.release_date else None,
-        'release_notes': version.release_notes
+        'release_notes': version.release_notes,
+        'is_prerelease': version.is_prerelease
     } 
\ No newline at end of file
@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
-from app.models import Library, Category, Version
-from app import db
-from sqlalchemy import func, desc
+from app.models import Library, Category, Version, CategoryStat, SimilarLibrary
+from app import aggregates
+from app.fragment_cache import LazyValue
+from app.facets import facet_counts, filter_libraries
+from sqlalchemy import desc
 from datetime import datetime, timedelta
 
 main_bp = Blueprint('main', __name__)
@@ -9,15 +11,15 @@ main_bp = Blueprint('main', __name__)
 @main_bp.route('/')
 def index():
     """Home page showing dashboard with library trends"""
+    # Queries are lazy so cached fragments don't run them
     # Get trending libraries sorted by popularity score
-    trending_libraries = Library.query.order_by(Library.popularity_score.desc()).limit(10).all()
+    trending_libraries = LazyValue(Library.query.order_by(Library.popularity_score.desc()).limit(10).all)
     
     # Get newest libraries sorted by last update
-    newest_libraries = Library.query.order_by(Library.last_update.desc()).limit(10).all()
+    newest_libraries = LazyValue(Library.query.order_by(Library.last_update.desc()).limit(10).all)
     
     # Get languages statistics
-    languages = db.session.query(Library.language, func.count(Library.id)).\
-                group_by(Library.language).all()
+    languages = LazyValue(aggregates.language_counts)
     
     return render_template('index.html', 
                            trending_libraries=trending_libraries,
@@ -36,58 +38,66 @@ def libraries():
     view = request.args.get('view', 'grid')
     selected_languages = request.args.getlist('language')
     selected_categories = request.args.getlist('category')
+    category_ids = [int(cat_id) for cat_id in selected_categories]
+    
+    # Filter and sort on the memory-mapped catalog index when it is up to date
+    from app.catalog_index import current_index, load_libraries
+    index = current_index()
+    
+    if index is not None:
+        ids, total = index.query(languages=selected_languages, category_ids=category_ids, search=q,
+                                 sort=sort, offset=(max(page, 1) - 1) * per_page, limit=per_page)
+        items = load_libraries(ids)
+        total_pages = -(-total // per_page)
+        has_next = max(page, 1) < total_pages
+    else:
+        # Search, language and category filters (a library in several categories is listed once)
+        query = filter_libraries(Library.query, selected_languages, category_ids, q)
+        
+        # Apply sorting
+        if sort == 'popularity':
+            query = query.order_by(Library.popularity_score.desc())
+        elif sort == 'newest':
+            query = query.order_by(Library.last_update.desc())
+        elif sort == 'name':
+            query = query.order_by(Library.name)
+        
+        # Paginate results
+        libraries = query.paginate(page=page, per_page=per_page, error_out=False)
+        items = libraries.items
+        total_pages = libraries.pages
+        has_next = libraries.has_next
     
-    # Base query
-    query = Library.query
-    
-    # Apply search filter
-    if q:
-        query = query.filter(Library.name.ilike(f'%{q}%') | Library.description.ilike(f'%{q}%'))
-    
-    # Apply language filter
-    if selected_languages:
-        query = query.filter(Library.language.in_(selected_languages))
-    
-    # Apply category filter
-    if selected_categories:
-        query = query.join(Library.categories).filter(Category.id.in_([int(cat_id) for cat_id in selected_categories]))
-    
-    # Apply sorting
-    if sort == 'popularity':
-        query = query.order_by(Library.popularity_score.desc())
-    elif sort == 'newest':
-        query = query.order_by(Library.last_update.desc())
-    elif sort == 'name':
-        query = query.order_by(Library.name)
-    
-    # Paginate results
-    libraries = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Get all categories for filter sidebar (lazy, the sidebar is a cached fragment)
+    categories = LazyValue(Category.query.order_by(Category.name).all)
     
-    # Get all categories for filter sidebar
-    categories = Category.query.order_by(Category.name).all()
+    # Sidebar counts for the current filter
+    facets = LazyValue(facet_counts, selected_languages, category_ids, q)
     
     # Get total count and last updated time
-    total_libraries = Library.query.count()
-    last_updated = db.session.query(func.max(Library.last_update)).scalar()
+    catalog = aggregates.catalog_summary()
+    total_libraries = catalog.total_libraries
+    last_updated = catalog.last_update
     
     # Calculate pagination info
-    next_page = page + 1 if libraries.has_next else None
-    prev_page = page - 1 if libraries.has_prev else None
-    total_pages = libraries.pages or 1
+    next_page = page + 1 if has_next else None
+    prev_page = page - 1 if page > 1 else None
+    total_pages = total_pages or 1
     
     return render_template('libraries.html',
-                           libraries=libraries.items,
+                           libraries=items,
                            page=page,
                            total_pages=total_pages,
                            next_page=next_page,
                            prev_page=prev_page,
                            total_libraries=total_libraries,
                            categories=categories,
+                           facets=facets,
                            selected_languages=selected_languages,
                            selected_categories=selected_categories,
                            sort=sort,
                            view=view,
-                           languages=db.session.query(Library.language, func.count(Library.id)).group_by(Library.language).all(),
+                           languages=LazyValue(aggregates.language_counts),
                            last_updated=last_updated)
 
 @main_bp.route('/libraries/<int:library_id>')
@@ -96,28 +106,19 @@ def library_detail(library_id):
     library = Library.query.get_or_404(library_id)
     
     # Get version history
-    versions = Version.query.filter_by(library_id=library_id).order_by(Version.release_date.desc()).all()
+    versions = Version.query.filter_by(library_id=library_id).\
+               order_by(Version.sort_key.is_(None), Version.sort_key.desc()).all()
     
-    # Get similar libraries (same categories or language)
-    similar_libraries = []
-    if library.categories:
-        category_ids = [c.id for c in library.categories]
-        similar_by_category = Library.query.join(Library.categories).\
-                              filter(Category.id.in_(category_ids)).\
-                              filter(Library.id != library_id).\
-                              order_by(Library.popularity_score.desc()).\
-                              limit(3).all()
-        similar_libraries.extend(similar_by_category)
+    # Get similar libraries from the precomputed index
+    similar_libraries = Library.query.\
+                        join(SimilarLibrary, SimilarLibrary.similar_id == Library.id).\
+                        filter(SimilarLibrary.library_id == library_id).\
+                        order_by(SimilarLibrary.rank).\
+                        limit(5).all()
     
-    # Add some by language if needed
-    if len(similar_libraries) < 5:
-        similar_by_language = Library.query.\
-                             filter(Library.language == library.language).\
-                             filter(Library.id != library_id).\
-                             filter(~Library.id.in_([l.id for l in similar_libraries])).\
-                             order_by(Library.popularity_score.desc()).\
-                             limit(5 - len(similar_libraries)).all()
-        similar_libraries.extend(similar_by_language)
+    # Fall back to same categories or language until the index has been built
+    if not similar_libraries:
+        similar_libraries = find_similar_libraries(library)
     
     return render_template('library_detail.html', 
                            library=library,
@@ -144,22 +145,15 @@ def categories():
         query = query.filter(Category.category_type.in_(selected_types))
     
     # Add library count to each category
-    subquery = db.session.query(
-        Category.id.label('category_id'),
-        func.count(Library.id).label('library_count')
-    ).join(
-        Category.libraries
-    ).group_by(
-        Category.id
-    ).subquery()
+    library_count = aggregates.category_count_column()
     
     query = query.outerjoin(
-        subquery, 
-        Category.id == subquery.c.category_id
+        CategoryStat, 
+        Category.id == CategoryStat.category_id
     ).add_columns(
-        func.coalesce(subquery.c.library_count, 0).label('library_count')
+        library_count.label('library_count')
     ).order_by(
-        func.coalesce(subquery.c.library_count, 0).desc()
+        library_count.desc()
     )
     
     # Paginate results
@@ -190,19 +184,8 @@ def categories():
             
         categories_with_count.append(category)
     
-    # Get top categories for chart
-    top_categories = db.session.query(
-        Category.id,
-        Category.name,
-        func.count(Library.id).label('library_count')
-    ).join(
-        Category.libraries
-    ).group_by(
-        Category.id,
-        Category.name
-    ).order_by(
-        func.count(Library.id).desc()
-    ).limit(10).all()
+    # Get top categories for chart (lazy, the chart is a cached fragment)
+    top_categories = LazyValue(aggregates.category_counts, limit=10)
     
     # Calculate pagination info
     next_page = page + 1 if paginated.has_next else None
@@ -210,7 +193,7 @@ def categories():
     total_pages = paginated.pages or 1
     
     # Get last updated time
-    last_updated = db.session.query(func.max(Library.last_update)).scalar()
+    last_updated = aggregates.catalog_summary().last_update
     
     return render_template('categories.html',
                            categories=categories_with_count,
@@ -227,20 +210,40 @@ def categories():
 def about():
     """About page with project information"""
     # Get basic stats
-    total_libraries = Library.query.count()
-    categories = Category.query.all()
-    last_updated = db.session.query(func.max(Library.last_update)).scalar()
+    catalog = aggregates.catalog_summary()
+    total_libraries = catalog.total_libraries
+    categories = LazyValue(Category.query.all)
+    last_updated = catalog.last_update
     
     # Get language statistics
-    language_stats = db.session.query(
-        Library.language,
-        func.count(Library.id)
-    ).group_by(
-        Library.language
-    ).all()
+    language_stats = LazyValue(aggregates.language_counts)
     
     return render_template('about.html',
                            total_libraries=total_libraries,
                            categories=categories,
                            last_updated=last_updated,
-                           language_stats=language_stats) 
\ No newline at end of file
+                           language_stats=language_stats)
+
+def find_similar_libraries(library, limit=5):
+    """Find libraries sharing a category or language with the given one, most popular first"""
+    similar_libraries = []
+    if library.categories:
+        category_ids = [c.id for c in library.categories]
+        similar_by_category = Library.query.join(Library.categories).\
+                              filter(Category.id.in_(category_ids)).\
+                              filter(Library.id != library.id).\
+                              order_by(Library.popularity_score.desc()).\
+                              limit(3).all()
+        similar_libraries.extend(similar_by_category)
+    
+    # Add some by language if needed
+    if len(similar_libraries) < limit:
+        similar_by_language = Library.query.\
+                             filter(Library.language == library.language).\
+                             filter(Library.id != library.id).\
+                             filter(~Library.id.in_([l.id for l in similar_libraries])).\
+                             order_by(Library.popularity_score.desc()).\
+                             limit(limit - len(similar_libraries)).all()
+        similar_libraries.extend(similar_by_language)
+    
+    return similar_libraries
@@ -1,18 +1,29 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
 import os
 import logging
 from datetime import datetime
 from app import db
 from app.models import Library, Category, Version
-from app.data_sources import pypi, npm, nuget, maven, github
+from app import aggregates
+from app import bulk_load
+from app import release_stream
+from app import metrics
+from app import projects
+
+# APScheduler and the data sources (which pull in requests) are imported
+# inside the functions that use them, so importing this module stays cheap
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Libraries saved per transaction, so readers are never blocked for a whole run
+SAVE_BATCH_SIZE = int(os.getenv('SAVE_BATCH_SIZE', 50))
+
 def init_scheduler(app):
     """Initialize the scheduler with all data collection jobs"""
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.interval import IntervalTrigger
+    
     with app.app_context():
         scheduler = BackgroundScheduler()
         
@@ -57,14 +68,41 @@ def init_scheduler(app):
             replace_existing=True
         )
         
+        scheduler.add_job(
+            func=discover_github_repositories,
+            trigger=IntervalTrigger(hours=24),
+            id='github_discovery_job',
+            name='Discover GitHub Repositories',
+            replace_existing=True
+        )
+        
+        scheduler.add_job(
+            func=backfill_version_history,
+            trigger=IntervalTrigger(hours=24),
+            id='version_history_job',
+            name='Backfill Version History',
+            replace_existing=True
+        )
+        
+        scheduler.add_job(
+            func=build_similarity_index,
+            trigger=IntervalTrigger(hours=24),
+            id='similarity_index_job',
+            name='Build Similar Libraries Index',
+            replace_existing=True
+        )
+        
         # Start the scheduler
         scheduler.start()
         logger.info("Scheduler started!")
         
         return scheduler
 
+@metrics.timed_job('collect_python_libraries')
 def collect_python_libraries():
     """Collect AI-related Python libraries from PyPI"""
+    from app.data_sources import pypi
+    
     logger.info("Collecting Python libraries...")
     
     try:
@@ -76,16 +114,33 @@ def collect_python_libraries():
         for keyword in keywords:
             libraries.extend(pypi.search_libraries(keyword))
         
+        metrics.record_collected('Python', len(libraries))
+        
         # Process and store the libraries
         save_libraries(libraries, 'Python')
         
+        # Rescore the catalog with the new download counts
+        recompute_popularity()
+        
+        # Queue digests for subscribers of the new releases
+        fan_out_digests()
+        
+        # Columnar copy of the catalog for analytics
+        export_snapshot()
+        
+        # Read index the listing endpoints filter and sort on
+        build_catalog_index()
+        
         logger.info(f"Successfully collected {len(libraries)} Python libraries")
     
     except Exception as e:
         logger.error(f"Error collecting Python libraries: {str(e)}")
 
+@metrics.timed_job('collect_javascript_libraries')
 def collect_javascript_libraries():
     """Collect AI-related JavaScript libraries from npm"""
+    from app.data_sources import npm
+    
     logger.info("Collecting JavaScript libraries...")
     
     try:
@@ -97,16 +152,33 @@ def collect_javascript_libraries():
         for keyword in keywords:
             libraries.extend(npm.search_libraries(keyword))
         
+        metrics.record_collected('JavaScript', len(libraries))
+        
         # Process and store the libraries
         save_libraries(libraries, 'JavaScript')
         
+        # Rescore the catalog with the new download counts
+        recompute_popularity()
+        
+        # Queue digests for subscribers of the new releases
+        fan_out_digests()
+        
+        # Columnar copy of the catalog for analytics
+        export_snapshot()
+        
+        # Read index the listing endpoints filter and sort on
+        build_catalog_index()
+        
         logger.info(f"Successfully collected {len(libraries)} JavaScript libraries")
     
     except Exception as e:
         logger.error(f"Error collecting JavaScript libraries: {str(e)}")
 
+@metrics.timed_job('collect_dotnet_libraries')
 def collect_dotnet_libraries():
     """Collect AI-related .NET libraries from NuGet"""
+    from app.data_sources import nuget
+    
     logger.info("Collecting .NET libraries...")
     
     try:
@@ -118,16 +190,33 @@ def collect_dotnet_libraries():
         for keyword in keywords:
             libraries.extend(nuget.search_libraries(keyword))
         
+        metrics.record_collected('.NET', len(libraries))
+        
         # Process and store the libraries
         save_libraries(libraries, '.NET')
         
+        # Rescore the catalog with the new download counts
+        recompute_popularity()
+        
+        # Queue digests for subscribers of the new releases
+        fan_out_digests()
+        
+        # Columnar copy of the catalog for analytics
+        export_snapshot()
+        
+        # Read index the listing endpoints filter and sort on
+        build_catalog_index()
+        
         logger.info(f"Successfully collected {len(libraries)} .NET libraries")
     
     except Exception as e:
         logger.error(f"Error collecting .NET libraries: {str(e)}")
 
+@metrics.timed_job('collect_java_libraries')
 def collect_java_libraries():
     """Collect AI-related Java libraries from Maven"""
+    from app.data_sources import maven
+    
     logger.info("Collecting Java libraries...")
     
     try:
@@ -139,78 +228,207 @@ def collect_java_libraries():
         for keyword in keywords:
             libraries.extend(maven.search_libraries(keyword))
         
+        metrics.record_collected('Java', len(libraries))
+        
         # Process and store the libraries
         save_libraries(libraries, 'Java')
         
+        # Rescore the catalog with the new download counts
+        recompute_popularity()
+        
+        # Queue digests for subscribers of the new releases
+        fan_out_digests()
+        
+        # Columnar copy of the catalog for analytics
+        export_snapshot()
+        
+        # Read index the listing endpoints filter and sort on
+        build_catalog_index()
+        
         logger.info(f"Successfully collected {len(libraries)} Java libraries")
     
     except Exception as e:
         logger.error(f"Error collecting Java libraries: {str(e)}")
 
+@metrics.timed_job('update_github_data')
 def update_github_data():
     """Update GitHub data (stars, commits, etc.) for all libraries"""
+    from app.data_sources import github
+    
     logger.info("Updating GitHub data...")
     
     try:
-        # Get all libraries with a repository URL containing 'github.com'
-        libraries = Library.query.filter(Library.repository_url.ilike('%github.com%')).all()
-        
-        for library in libraries:
-            # Extract owner and repo from the repository URL
-            if 'github.com' in library.repository_url:
-                parts = library.repository_url.split('github.com/')
-                if len(parts) > 1:
-                    owner_repo = parts[1].strip('/')
-                    owner, repo = owner_repo.split('/') if '/' in owner_repo else (None, None)
-                    
-                    if owner and repo:
-                        # Get GitHub data
-                        github_data = github.get_repository_data(owner, repo)
-                        
-                        if github_data:
-                            # Update library data
-                            library.github_stars = github_data.get('stars', library.github_stars)
-                            
-                            # Recalculate popularity score based on downloads and stars
-                            library.popularity_score = calculate_popularity_score(
-                                library.monthly_downloads, 
-                                library.github_stars
-                            )
-                            
-                            db.session.add(library)
+        # Libraries collected before repository keys existed, or whose key was lost
+        projects.assign_repository_keys()
+        
+        # Fetch each repository once, however many registries publish packages from it
+        repositories = projects.github_repositories()
+        
+        results = {}
+        for key, (owner, repo) in repositories.items():
+            github_data = github.get_repository_data(owner, repo)
+            
+            if github_data:
+                results[key] = github_data
+        
+        # Fan the results out to every library of each repository
+        updated = projects.apply_github_data(results)
+        
+        # Rescore the whole catalog with the new star counts
+        from app.popularity import recompute_popularity
+        recompute_popularity()
         
+        aggregates.bump_generation()
         db.session.commit()
-        logger.info(f"Successfully updated GitHub data for {len(libraries)} libraries")
+        
+        export_snapshot()
+        build_catalog_index()
+        logger.info(f"Successfully updated GitHub data for {updated} libraries from {len(repositories)} repositories")
     
     except Exception as e:
         logger.error(f"Error updating GitHub data: {str(e)}")
         db.session.rollback()
 
+@metrics.timed_job('discover_github_repositories')
+def discover_github_repositories():
+    """Queue recently created AI repositories on GitHub that aren't in the catalog yet"""
+    logger.info("Discovering GitHub repositories...")
+    
+    try:
+        from app.discovery import discover_recent_repositories
+        
+        counts = discover_recent_repositories()
+        db.session.commit()
+        logger.info(f"Successfully queued {counts['queued']} of {counts['found']} discovered repositories")
+    
+    except Exception as e:
+        logger.error(f"Error discovering GitHub repositories: {str(e)}")
+        db.session.rollback()
+
+@metrics.timed_job('build_similarity_index')
+def build_similarity_index():
+    """Rebuild the precomputed similar-libraries index"""
+    logger.info("Building similar libraries index...")
+    
+    try:
+        # Imported here so numpy/scipy load only when the job runs
+        from app.similarity import build_similarity_index as build_index
+        
+        count = build_index()
+        logger.info(f"Successfully built similar libraries index with {count} entries")
+    
+    except Exception as e:
+        logger.error(f"Error building similar libraries index: {str(e)}")
+        db.session.rollback()
+
+@metrics.timed_job('backfill_version_history')
+def backfill_version_history():
+    """Ingest release histories from the registries, only fetching what is new"""
+    logger.info("Backfilling version history...")
+    
+    try:
+        from app.version_history import backfill_version_history as backfill
+        
+        counts = backfill()
+        logger.info(f"Successfully backfilled {counts['versions']} versions for {counts['libraries']} libraries")
+    
+    except Exception as e:
+        logger.error(f"Error backfilling version history: {str(e)}")
+        db.session.rollback()
+
+def recompute_popularity():
+    """Recompute every library's dependency-graph importance and popularity score in vectorized passes"""
+    try:
+        # Imported here so numpy/scipy load only when the job runs
+        from app.dependency_graph import recompute_importance
+        from app.popularity import recompute_popularity as recompute
+        
+        recompute_importance()
+        recompute()
+        aggregates.bump_generation()
+        db.session.commit()
+    
+    except Exception as e:
+        logger.error(f"Error recomputing popularity scores: {str(e)}")
+        db.session.rollback()
+
+def fan_out_digests():
+    """Write subscription digests for versions added since the last run"""
+    try:
+        from app.digests import fan_out_digests as fan_out
+        
+        fan_out()
+    
+    except Exception as e:
+        logger.error(f"Error writing subscription digests: {str(e)}")
+        db.session.rollback()
+
+def export_snapshot():
+    """Write the partitioned Parquet/Arrow snapshot of the catalog, unless SNAPSHOT_DIR is empty"""
+    try:
+        # Imported here so pyarrow loads only when the job runs
+        from app.snapshots import write_snapshot, SNAPSHOT_DIR
+        
+        if SNAPSHOT_DIR:
+            write_snapshot()
+    
+    except Exception as e:
+        logger.error(f"Error writing catalog snapshot: {str(e)}")
+        db.session.rollback()
+
+def build_catalog_index():
+    """Rebuild the memory-mapped catalog index, unless CATALOG_INDEX_PATH is empty"""
+    try:
+        # Imported here so numpy loads only when the job runs
+        from app.catalog_index import build_catalog_index as build, CATALOG_INDEX_PATH
+        
+        if CATALOG_INDEX_PATH:
+            build()
+    
+    except Exception as e:
+        logger.error(f"Error building catalog index: {str(e)}")
+        db.session.rollback()
+
 def save_libraries(libraries_data, language):
     """Save or update libraries in the database"""
+    # PostgreSQL takes the COPY + INSERT ... ON CONFLICT fast path
+    if bulk_load.supports_copy():
+        try:
+            from app.dependency_graph import save_dependencies
+            
+            bulk_load.save_libraries(libraries_data, language)
+            save_dependencies(libraries_data, language)
+            db.session.commit()
+            release_stream.publish_new_releases()
+        
+        except Exception as e:
+            logger.error(f"Error bulk saving libraries: {str(e)}")
+            db.session.rollback()
+        
+        return
+    
     try:
-        for lib_data in libraries_data:
+        for count, lib_data in enumerate(libraries_data, 1):
             # Check if library already exists
             existing_lib = Library.query.filter_by(name=lib_data['name'], language=language).first()
             
             if existing_lib:
+                previous_version = existing_lib.current_version
+                previous_update = existing_lib.last_update
+                
                 # Update existing library
                 existing_lib.description = lib_data.get('description', existing_lib.description)
                 existing_lib.current_version = lib_data.get('version', existing_lib.current_version)
                 existing_lib.last_update = lib_data.get('last_update', existing_lib.last_update)
                 existing_lib.repository_url = lib_data.get('repository_url', existing_lib.repository_url)
+                existing_lib.repository_key = projects.repository_key(existing_lib.repository_url)
                 existing_lib.documentation_url = lib_data.get('documentation_url', existing_lib.documentation_url)
                 existing_lib.package_url = lib_data.get('package_url', existing_lib.package_url)
                 existing_lib.monthly_downloads = lib_data.get('downloads', existing_lib.monthly_downloads)
                 
-                # Update popularity score
-                existing_lib.popularity_score = calculate_popularity_score(
-                    existing_lib.monthly_downloads,
-                    existing_lib.github_stars
-                )
-                
-                # Add new version if it's different
-                if existing_lib.current_version != lib_data.get('version') and lib_data.get('version'):
+                # Add new version if it's different and not already in the history
+                if previous_version != lib_data.get('version') and lib_data.get('version') and \
+                        not Version.query.filter_by(library_id=existing_lib.id, version_number=lib_data['version']).first():
                     new_version = Version(
                         library_id=existing_lib.id,
                         version_number=lib_data.get('version'),
@@ -220,6 +438,7 @@ def save_libraries(libraries_data, language):
                     db.session.add(new_version)
                 
                 db.session.add(existing_lib)
+                aggregates.record_library_update(existing_lib, previous_update)
             
             else:
                 # Create new library
@@ -261,27 +480,24 @@ def save_libraries(libraries_data, language):
                             db.session.flush()
                         
                         new_lib.categories.append(cat)
+                
+                # Keep the language/category aggregate tables in step
+                aggregates.record_new_library(new_lib)
+            
+            # Commit in short batches to keep the write lock brief
+            if count % SAVE_BATCH_SIZE == 0:
+                db.session.commit()
+        
+        # Imported here so numpy/scipy load only when a collector runs
+        from app.dependency_graph import save_dependencies
+        save_dependencies(libraries_data, language)
         
+        aggregates.bump_generation()
         db.session.commit()
+        
+        # Push the new versions to connected stream clients
+        release_stream.publish_new_releases()
     
     except Exception as e:
         logger.error(f"Error saving libraries: {str(e)}")
         db.session.rollback()
-
-def calculate_popularity_score(downloads, stars):
-    """Calculate a popularity score based on downloads and GitHub stars"""
-    # Normalize and weight the factors
-    download_weight = 0.7
-    star_weight = 0.3
-    
-    # Avoid division by zero or negative values
-    downloads = max(0, downloads or 0)
-    stars = max(0, stars or 0)
-    
-    # Simple scoring algorithm - can be refined
-    # Assuming most popular packages have around 1M downloads and 10K stars
-    normalized_downloads = min(1.0, downloads / 1000000)
-    normalized_stars = min(1.0, stars / 10000)
-    
-    score = (normalized_downloads * download_weight) + (normalized_stars * star_weight)
-    return score 
\ No newline at end of file
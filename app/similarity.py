@@ -0,0 +1,280 @@
+import logging
+import math
+import re
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from app import db
+from app.models import Library, LibraryDependency, SimilarLibrary, library_categories
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Number of neighbours stored per library
+TOP_K = 10
+
+# Relative weight of each similarity signal
+SIMILARITY_WEIGHTS = {
+    'categories': 0.35,
+    'description': 0.40,
+    'dependencies': 0.15,
+    'language': 0.05,
+    'popularity': 0.05
+}
+
+# Rough bound on candidate pairs held in memory at once (sum of the rows' candidates per block)
+BLOCK_CELLS = 5000000
+
+# Columns shared by more libraries than this (a broad category, a common term) don't propose
+# candidates, which would make the candidate sets quadratic; they still score the candidates
+CANDIDATE_POSTINGS = 500
+
+# Broad columns of a signal are held as a dense array when there are at most this many
+DENSE_BROAD_COLUMNS = 64
+
+# Rows per INSERT batch when writing the index
+WRITE_CHUNK_SIZE = 5000
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]')
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'into', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with', 'your', 'you', 'library', 'package'
+}
+
+def build_similarity_index(top_k=TOP_K, weights=None):
+    """
+    Rebuild the precomputed similar-libraries index
+
+    Categories, descriptions and dependencies are each encoded as a
+    row-normalised sparse matrix. Candidate neighbours are the libraries
+    sharing a column held by at most CANDIDATE_POSTINGS libraries, found as
+    a sparse product of the selective columns; the broad columns' part of
+    each candidate's cosine similarity is added per pair. Language and
+    popularity only re-rank candidates and never add one. Products are
+    evaluated a block of rows at a time, sized so each block holds about
+    BLOCK_CELLS candidates, and only the top-k candidates of each row are kept.
+
+    Args:
+        top_k (int): Number of neighbours to keep per library
+        weights (dict): Overrides for SIMILARITY_WEIGHTS
+
+    Returns:
+        int: Number of neighbour rows written
+    """
+    weights = dict(SIMILARITY_WEIGHTS, **(weights or {}))
+
+    rows = db.session.execute(
+        select(Library.id, Library.name, Library.description, Library.language, Library.popularity_score).
+        order_by(Library.id)
+    ).all()
+
+    if not rows:
+        return 0
+
+    ids = np.array([row.id for row in rows])
+    position = {library_id: i for i, library_id in enumerate(ids.tolist())}
+
+    signals = []
+    if weights['categories']:
+        signals.append((weights['categories'], _category_matrix(position)))
+    if weights['description']:
+        signals.append((weights['description'], _tfidf_matrix([f"{row.name} {row.description or ''}" for row in rows])))
+    if weights['dependencies']:
+        dependencies = _dependency_matrix(position)
+        if dependencies is not None:
+            signals.append((weights['dependencies'], dependencies))
+
+    # Same-language candidates get the language weight; libraries without a language match none
+    codes = {}
+    languages = np.array([codes.setdefault(row.language, len(codes)) if row.language else -1 for row in rows])
+
+    # Popularity is a per-candidate prior, not a pairwise similarity
+    popularity = np.array([row.popularity_score or 0.0 for row in rows], dtype=np.float32)
+    if popularity.max() > 0:
+        popularity = popularity / popularity.max()
+    popularity *= weights['popularity']
+
+    n = len(rows)
+    k = min(top_k, n - 1)
+    split = [(weight, *_split_columns(matrix)) for weight, matrix in signals]
+    transposed = [selective.T.tocsr() for _, selective, _ in split]
+    entries = []
+
+    for start, stop in _row_blocks([selective for _, selective, _ in split], n) if k > 0 else []:
+        scores = sparse.csr_matrix((stop - start, n), dtype=np.float32)
+        for (weight, selective, _), selective_t in zip(split, transposed):
+            scores = scores + weight * (selective[start:stop] @ selective_t)
+
+        scores = scores.tocoo()
+        related = (scores.data > 0) & (scores.row + start != scores.col)
+        block_rows = scores.row[related]
+        candidates = scores.col[related]
+        candidate_scores = scores.data[related]
+
+        for weight, _, broad in split:
+            if broad.shape[1]:
+                candidate_scores = candidate_scores + weight * _pair_dots(broad, block_rows + start, candidates)
+
+        same_language = (languages[block_rows + start] == languages[candidates]) & (languages[candidates] >= 0)
+        candidate_scores = candidate_scores + weights['language'] * same_language + popularity[candidates]
+
+        # Best candidates first within each row, then keep the first k of every row
+        order = np.argsort(block_rows * (candidate_scores.max(initial=0) + 1) - candidate_scores, kind='stable')
+        block_rows, candidates, candidate_scores = block_rows[order], candidates[order], candidate_scores[order]
+        row_starts = np.searchsorted(block_rows, np.arange(stop - start))
+        ranks = np.arange(len(block_rows)) - row_starts[block_rows]
+        kept = ranks < k
+
+        for offset, neighbour, rank, score in zip(block_rows[kept].tolist(), candidates[kept].tolist(),
+                                                  ranks[kept].tolist(), candidate_scores[kept].tolist()):
+            entries.append({
+                'library_id': int(ids[start + offset]),
+                'rank': rank,
+                'similar_id': int(ids[neighbour]),
+                'score': score
+            })
+
+    # Swap the index in a single transaction
+    SimilarLibrary.query.delete()
+    for chunk_start in range(0, len(entries), WRITE_CHUNK_SIZE):
+        db.session.execute(SimilarLibrary.__table__.insert(), entries[chunk_start:chunk_start + WRITE_CHUNK_SIZE])
+    db.session.commit()
+
+    logger.info(f"Built similarity index: {len(entries)} neighbours for {n} libraries")
+    return len(entries)
+
+def _split_columns(matrix):
+    """
+    Split a matrix into its selective columns and its broad ones (see CANDIDATE_POSTINGS)
+
+    Returns:
+        tuple: (selective CSR matrix, broad columns as a CSR matrix or, when
+        there are few, a dense array)
+    """
+    column_counts = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    broad = column_counts > CANDIDATE_POSTINGS
+
+    selective_part = (matrix @ sparse.diags((~broad).astype(np.float32))).tocsr()
+    selective_part.eliminate_zeros()
+    broad_part = matrix[:, np.flatnonzero(broad)].tocsr()
+    if broad_part.shape[1] <= DENSE_BROAD_COLUMNS:
+        broad_part = broad_part.toarray()
+    return selective_part, broad_part
+
+def _pair_dots(matrix, rows, columns):
+    """Dot products of the given pairs of rows of a CSR matrix or dense array"""
+    if isinstance(matrix, np.ndarray):
+        return np.einsum('ij,ij->i', matrix[rows], matrix[columns])
+    return np.asarray(matrix[rows].multiply(matrix[columns]).sum(axis=1), dtype=np.float32).ravel()
+
+def _row_blocks(matrices, n):
+    """
+    Split the rows into (start, stop) blocks of about BLOCK_CELLS candidates
+
+    A row's candidates are bounded by the number of libraries sharing each of
+    its nonzero columns, summed over the matrices.
+    """
+    estimate = np.zeros(n)
+    for matrix in matrices:
+        column_counts = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        estimate += matrix.sign() @ column_counts
+
+    block_index = np.cumsum(estimate) // BLOCK_CELLS
+    bounds = [0] + (np.flatnonzero(np.diff(block_index)) + 1).tolist() + [n]
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+def _category_matrix(position):
+    """Library x category incidence matrix with L2-normalised rows"""
+    links = db.session.execute(select(library_categories.c.library_id, library_categories.c.category_id)).all()
+
+    rows = []
+    columns = {}
+    for library_id, category_id in links:
+        if library_id in position:
+            rows.append((position[library_id], columns.setdefault(category_id, len(columns))))
+
+    return _normalised_incidence(rows, len(position), len(columns))
+
+def _dependency_matrix(position):
+    """
+    Library x dependency incidence matrix, or None when no dependency data exists
+
+    Two libraries that depend on the same packages score as similar.
+    Dependencies are matched by name within an ecosystem, whether or not
+    they are in the catalog.
+    """
+    links = db.session.execute(
+        select(LibraryDependency.library_id, Library.language, LibraryDependency.dependency_name).
+        join(Library, Library.id == LibraryDependency.library_id)
+    ).all()
+
+    if not links:
+        return None
+
+    rows = []
+    columns = {}
+    for library_id, language, name in links:
+        if library_id in position:
+            rows.append((position[library_id], columns.setdefault((language, name), len(columns))))
+
+    return _normalised_incidence(rows, len(position), len(columns))
+
+def _normalised_incidence(pairs, n_rows, n_columns):
+    """Build a binary CSR matrix from (row, column) pairs and L2-normalise its rows"""
+    if not pairs:
+        return sparse.csr_matrix((n_rows, max(1, n_columns)), dtype=np.float32)
+
+    row_index, column_index = zip(*set(pairs))
+    matrix = sparse.csr_matrix(
+        (np.ones(len(row_index), dtype=np.float32), (row_index, column_index)),
+        shape=(n_rows, n_columns)
+    )
+    return _l2_normalise(matrix)
+
+def _tfidf_matrix(documents):
+    """
+    TF-IDF matrix of the given documents with sublinear term frequency and L2-normalised rows
+
+    Terms that appear in only one document or in more than half of them carry
+    no similarity signal and are dropped.
+    """
+    vocabulary = {}
+    row_index = []
+    column_index = []
+    counts = []
+
+    for i, document in enumerate(documents):
+        terms = {}
+        for token in TOKEN_PATTERN.findall(document.lower()):
+            if token not in STOP_WORDS and len(token) > 1:
+                terms[token] = terms.get(token, 0) + 1
+
+        for token, count in terms.items():
+            row_index.append(i)
+            column_index.append(vocabulary.setdefault(token, len(vocabulary)))
+            counts.append(1 + math.log(count))
+
+    n = len(documents)
+    if not vocabulary:
+        return sparse.csr_matrix((n, 1), dtype=np.float32)
+
+    matrix = sparse.csr_matrix(
+        (np.array(counts, dtype=np.float32), (row_index, column_index)),
+        shape=(n, len(vocabulary))
+    )
+
+    document_frequency = np.bincount(matrix.indices, minlength=len(vocabulary))
+    idf = np.log((1 + n) / (1 + document_frequency)).astype(np.float32) + 1
+    idf[(document_frequency < 2) | (document_frequency > max(2, n // 2))] = 0
+
+    matrix = matrix @ sparse.diags(idf)
+    matrix.eliminate_zeros()
+    return _l2_normalise(matrix.tocsr())
+
+def _l2_normalise(matrix):
+    """Scale each row of a sparse matrix to unit length"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return (sparse.diags(1 / norms) @ matrix).astype(np.float32).tocsr()
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from app import db
+from app.models import Library, Category, Version, library_categories
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Where snapshots are written; empty disables the export after collection runs
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'snapshots')
+
+# 'parquet' (zstd-compressed, smallest) or 'arrow' (uncompressed Arrow IPC, memory-mappable without decoding)
+SNAPSHOT_FORMAT = os.getenv('SNAPSHOT_FORMAT', 'parquet')
+
+MANIFEST_NAME = 'manifest.json'
+
+# Directory name Hive-style readers use for a missing partition value
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+LIBRARY_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('name', pa.string()),
+    ('description', pa.string()),
+    ('current_version', pa.string()),
+    ('last_update', pa.timestamp('us')),
+    ('repository_url', pa.string()),
+    ('repository_key', pa.string()),
+    ('documentation_url', pa.string()),
+    ('package_url', pa.string()),
+    ('monthly_downloads', pa.int64()),
+    ('github_stars', pa.int64()),
+    ('popularity_score', pa.float64()),
+    ('importance_score', pa.float64())
+])
+
+VERSION_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('library_id', pa.int64()),
+    ('version_number', pa.string()),
+    ('release_date', pa.timestamp('us')),
+    ('is_prerelease', pa.bool_()),
+    ('sort_key', pa.string())
+])
+
+LIBRARY_CATEGORY_SCHEMA = pa.schema([
+    ('library_id', pa.int64()),
+    ('category_id', pa.int64())
+])
+
+CATEGORY_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('name', pa.string()),
+    ('description', pa.string()),
+    ('category_type', pa.string())
+])
+
+METRIC_SCHEMA = pa.schema([
+    ('library_id', pa.int64()),
+    ('language', pa.string()),
+    ('monthly_downloads', pa.int64()),
+    ('github_stars', pa.int64()),
+    ('popularity_score', pa.float64()),
+    ('importance_score', pa.float64())
+])
+
+def write_snapshot(directory=SNAPSHOT_DIR, file_format=SNAPSHOT_FORMAT, force=False):
+    """
+    Write the catalog as a partitioned columnar dataset, rewriting only partitions whose data changed
+
+    Layout, readable as Hive-partitioned datasets by pyarrow, pandas, DuckDB or Spark:
+
+        libraries/language=<language>/part-0.<ext>
+        versions/language=<language>/part-0.<ext>
+        library_categories/language=<language>/part-0.<ext>
+        categories/part-0.<ext>
+        metrics/date=<YYYY-MM-DD>/part-0.<ext>   (one partition per day, kept as history)
+        manifest.json
+
+    Each partition is built as an Arrow table and fingerprinted; partitions
+    whose fingerprint matches the manifest are left untouched, so readers
+    holding files open and incremental copies only see real changes. Files are
+    written to a temporary name and renamed into place, and the manifest is
+    replaced last.
+
+    Args:
+        directory (str): Snapshot root
+        file_format (str): 'parquet' or 'arrow'
+        force (bool): Rewrite every partition
+
+    Returns:
+        dict: Number of partitions written, unchanged and removed
+    """
+    if file_format not in ('parquet', 'arrow'):
+        raise ValueError(f"Unknown snapshot format {file_format}")
+
+    os.makedirs(directory, exist_ok=True)
+    manifest = _read_manifest(directory)
+    previous = {} if force or manifest.get('format') != file_format else manifest.get('partitions', {})
+
+    partitions = {}
+    counts = {'written': 0, 'unchanged': 0, 'removed': 0}
+
+    def store(path, table):
+        fingerprint = _fingerprint(table)
+        entry = previous.get(path)
+        if entry and entry['fingerprint'] == fingerprint and os.path.exists(os.path.join(directory, path)):
+            partitions[path] = entry
+            counts['unchanged'] += 1
+            return
+
+        _write_table(table, os.path.join(directory, path), file_format)
+        partitions[path] = {'fingerprint': fingerprint, 'rows': table.num_rows,
+                            'written_at': datetime.utcnow().isoformat()}
+        counts['written'] += 1
+
+    extension = 'parquet' if file_format == 'parquet' else 'arrow'
+    languages = [language for (language,) in db.session.execute(select(Library.language).distinct())]
+
+    for language in languages:
+        partition = f"language={_partition_value(language)}/part-0.{extension}"
+        store(f"libraries/{partition}", _library_table(language))
+        store(f"versions/{partition}", _version_table(language))
+        store(f"library_categories/{partition}", _library_category_table(language))
+
+    store(f"categories/part-0.{extension}", _category_table())
+
+    # Earlier days stay in the manifest as metric history
+    today = datetime.utcnow().date().isoformat()
+    for path, entry in previous.items():
+        if path.startswith('metrics/') and not path.startswith(f"metrics/date={today}/"):
+            partitions[path] = entry
+    store(f"metrics/date={today}/part-0.{extension}", _metric_table())
+
+    # Partitions of languages that no longer exist, and every file of a different format
+    for path in set(manifest.get('partitions', {})) - set(partitions):
+        _remove_partition(directory, path)
+        counts['removed'] += 1
+
+    _write_manifest(directory, {
+        'format': file_format,
+        'generated_at': datetime.utcnow().isoformat(),
+        'partitions': partitions
+    })
+
+    logger.info(f"Wrote catalog snapshot to {directory}: {counts['written']} partitions written, "
+                f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+    return counts
+
+def _library_table(language):
+    """Libraries of one language"""
+    rows = _connection().execute(
+        select(Library.id, Library.name, Library.description, Library.current_version, Library.last_update,
+               Library.repository_url, Library.repository_key, Library.documentation_url, Library.package_url,
+               Library.monthly_downloads, Library.github_stars, Library.popularity_score, Library.importance_score).
+        where(_language_filter(language)).order_by(Library.id)
+    ).all()
+    return _table(rows, LIBRARY_SCHEMA)
+
+def _version_table(language):
+    """Versions of one language's libraries"""
+    rows = _connection().execute(
+        select(Version.id, Version.library_id, Version.version_number, Version.release_date,
+               Version.is_prerelease, Version.sort_key).
+        join(Library, Library.id == Version.library_id).
+        where(_language_filter(language)).order_by(Version.library_id, Version.id)
+    ).all()
+    return _table(rows, VERSION_SCHEMA)
+
+def _library_category_table(language):
+    """Category links of one language's libraries"""
+    rows = _connection().execute(
+        select(library_categories.c.library_id, library_categories.c.category_id).
+        join(Library, Library.id == library_categories.c.library_id).
+        where(_language_filter(language)).
+        order_by(library_categories.c.library_id, library_categories.c.category_id)
+    ).all()
+    return _table(rows, LIBRARY_CATEGORY_SCHEMA)
+
+def _category_table():
+    """Every category"""
+    rows = _connection().execute(
+        select(Category.id, Category.name, Category.description, Category.category_type).order_by(Category.id)
+    ).all()
+    return _table(rows, CATEGORY_SCHEMA)
+
+def _metric_table():
+    """Current popularity signals of every library"""
+    rows = _connection().execute(
+        select(Library.id, Library.language, Library.monthly_downloads, Library.github_stars,
+               Library.popularity_score, Library.importance_score).order_by(Library.id)
+    ).all()
+    return _table(rows, METRIC_SCHEMA)
+
+def _table(rows, schema):
+    """Arrow table from result rows whose columns follow the schema"""
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.Table.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+
+def _connection():
+    """Core connection of the session; skips ORM row processing, which dominates on large tables"""
+    return db.session.connection()
+
+def _language_filter(language):
+    """Condition selecting one language partition"""
+    return Library.language.is_(None) if language is None else Library.language == language
+
+def _partition_value(value):
+    """Directory name of a partition value"""
+    return NULL_PARTITION if value is None else value.replace('/', '_')
+
+def _fingerprint(table):
+    """Hash of a table's schema and contents"""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return hashlib.sha1(sink.getvalue()).hexdigest()
+
+def _write_table(table, path, file_format):
+    """Write a table to a temporary file and move it into place"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+
+    if file_format == 'parquet':
+        pq.write_table(table, temporary, compression='zstd')
+    else:
+        feather.write_feather(table, temporary, compression='uncompressed')
+
+    os.replace(temporary, path)
+
+def _remove_partition(directory, path):
+    """Delete a partition file and its directory once empty"""
+    full_path = os.path.join(directory, path)
+    if os.path.exists(full_path):
+        os.remove(full_path)
+
+    partition_dir = os.path.dirname(full_path)
+    if os.path.isdir(partition_dir) and not os.listdir(partition_dir):
+        shutil.rmtree(partition_dir)
+
+def _read_manifest(directory):
+    """The manifest of the previous snapshot, or {} if there is none"""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+def _write_manifest(directory, manifest):
+    """Atomically replace the manifest"""
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(f"{path}.tmp", 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
@@ -0,0 +1,195 @@
+import hmac
+import logging
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Slow requests and statements go to their own logger, so they can be routed to a file
+slow_query_logger = logging.getLogger('app.slow_queries')
+
+# Longest statement text and parameter repr logged; IN lists can be huge
+MAX_STATEMENT_LENGTH = 2000
+MAX_PARAMETER_LENGTH = 500
+
+def init_sql_profiling(app, db):
+    """
+    Record the SQL each request runs, when profiling is switched on
+
+    SQL_PROFILING is 'off', 'header' (only requests sending SQL_PROFILE_HEADER,
+    whose value must match SQL_PROFILE_TOKEN when one is set) or 'all'.
+    Profiled requests get a Server-Timing header with their statement count
+    and database time. Requests that asked for a profile by header have it
+    logged with EXPLAIN plans of the slowest statements; any profiled request
+    or statement over SLOW_REQUEST_MS / SLOW_QUERY_MS is written to the
+    slow-query log.
+
+    Must run after db.init_app.
+
+    Args:
+        app (Flask): The application
+        db (SQLAlchemy): The extension bound to the app
+    """
+    if app.config['SQL_PROFILING'] == 'off':
+        return
+
+    if app.config['SLOW_QUERY_LOG']:
+        handler = logging.FileHandler(app.config['SLOW_QUERY_LOG'])
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_logger.addHandler(handler)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_profile():
+        if _profile_requested(app):
+            g.sql_profile = SqlProfile(detailed=_header_sent(app))
+
+    @app.after_request
+    def add_timing_header(response):
+        profile = g.get('sql_profile')
+        if profile is not None:
+            response.headers.add(
+                'Server-Timing', f'db;dur={profile.total_ms:.1f};desc="{len(profile.statements)} statements"')
+        return response
+
+    @app.teardown_request
+    def report_profile(exc):
+        # Runs after streamed responses finish, so their queries are included
+        profile = g.pop('sql_profile', None)
+        if profile is not None:
+            profile.report(request.method, request.full_path.rstrip('?'), app.config)
+
+class SqlProfile:
+    """Statements run while serving one request; detailed profiles are logged with query plans"""
+
+    def __init__(self, detailed=False):
+        self.detailed = detailed
+        self.statements = []
+        self.started = time.perf_counter()
+
+    @property
+    def total_ms(self):
+        """Database time across all statements, in milliseconds"""
+        return sum(statement['duration_ms'] for statement in self.statements)
+
+    def record(self, engine, statement, parameters, duration_ms, executemany):
+        """Add one executed statement"""
+        self.statements.append({
+            'engine': engine,
+            'statement': statement,
+            'parameters': parameters,
+            'duration_ms': duration_ms,
+            'executemany': executemany
+        })
+
+    def slowest(self, limit):
+        """The longest-running statements, slowest first"""
+        return sorted(self.statements, key=lambda statement: statement['duration_ms'], reverse=True)[:limit]
+
+    def report(self, method, path, config):
+        """
+        Log the profile and any slow statements
+
+        Args:
+            method (str): Request method
+            path (str): Request path and query string
+            config (dict): App config with the profiling thresholds
+        """
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        summary = (f"{method} {path}: {len(self.statements)} statements, "
+                   f"{self.total_ms:.1f}ms in the database, {elapsed_ms:.1f}ms total")
+
+        slow_statements = [statement for statement in self.statements
+                           if statement['duration_ms'] >= config['SLOW_QUERY_MS']]
+        slow_request = elapsed_ms >= config['SLOW_REQUEST_MS']
+
+        if self.detailed:
+            logger.info(f"SQL profile {summary}\n" + self._format(self.slowest(config['SQL_PROFILE_TOP'])))
+
+        if slow_statements or slow_request:
+            slow_query_logger.warning(f"Slow request {summary}\n" + self._format(
+                slow_statements or self.slowest(config['SQL_PROFILE_TOP'])))
+
+    def _format(self, statements):
+        """Describe statements with their parameters and query plans"""
+        entries = []
+        for statement in statements:
+            sql = ' '.join(statement['statement'].split())
+            entry = (f"  {statement['duration_ms']:.1f}ms {_truncate(sql, MAX_STATEMENT_LENGTH)}\n"
+                     f"    parameters: {_truncate(repr(statement['parameters']), MAX_PARAMETER_LENGTH)}")
+            plan = explain(statement)
+            if plan:
+                entry += "\n    plan:\n" + '\n'.join(f"      {line}" for line in plan)
+            entries.append(entry)
+        return '\n'.join(entries)
+
+def explain(statement):
+    """
+    Get the query plan of a recorded SELECT
+
+    Args:
+        statement (dict): Statement recorded by SqlProfile
+
+    Returns:
+        list: Plan lines, or [] for statements that can't be explained
+    """
+    sql = statement['statement'].strip()
+    if statement['executemany'] or sql.split(None, 1)[0].upper() not in ('SELECT', 'WITH'):
+        return []
+
+    engine = statement['engine']
+    prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+
+    try:
+        with engine.connect() as connection:
+            rows = connection.exec_driver_sql(prefix + sql, statement['parameters']).all()
+    except Exception as e:
+        return [f"unavailable: {str(e)}"]
+
+    if engine.dialect.name == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+def _profile_requested(app):
+    """Whether the current request should be profiled"""
+    return app.config['SQL_PROFILING'] == 'all' or (app.config['SQL_PROFILING'] == 'header' and _header_sent(app))
+
+def _header_sent(app):
+    """Whether the request asked for a profile with the profiling header"""
+    value = request.headers.get(app.config['SQL_PROFILE_HEADER'])
+    if not value:
+        return False
+    token = app.config['SQL_PROFILE_TOKEN']
+    return hmac.compare_digest(value, token) if token else True
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Note when a statement starts, if the current request is being profiled"""
+    if has_request_context() and g.get('sql_profile') is not None:
+        conn.info['sql_profile_started'] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Record a finished statement against the current request's profile"""
+    started = conn.info.pop('sql_profile_started', None)
+    if started is None:
+        return
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    profile = g.get('sql_profile') if has_request_context() else None
+    if profile is not None:
+        profile.record(conn.engine, statement, parameters, duration_ms, executemany)
+
+def _truncate(text, length):
+    """Shorten long statements and parameter lists for the log"""
+    if len(text) <= length:
+        return text
+    return text[:length] + '...'
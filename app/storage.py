@@ -0,0 +1,102 @@
+import logging
+from contextlib import contextmanager
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bind key of the read-only engine used by request handlers
+READER_BIND = 'reader'
+
+def configure_storage(app):
+    """
+    Apply the STORAGE_MODE setting to the app config
+
+    Must run before db.init_app. In 'wal' mode on SQLite a second, read-only
+    engine is registered under READER_BIND; request handlers read through it
+    while collectors keep the default engine as their writer.
+
+    Args:
+        app (Flask): The application being configured
+    """
+    if app.config['STORAGE_MODE'] != 'wal':
+        return
+
+    if not _is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        logger.warning("STORAGE_MODE=wal only applies to SQLite databases; ignoring it")
+        app.config['STORAGE_MODE'] = 'default'
+        return
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds.setdefault(READER_BIND, app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+def init_storage(app, db):
+    """
+    Install per-connection pragmas on the app's SQLite engines
+
+    Must run after db.init_app.
+
+    Args:
+        app (Flask): The application
+        db (SQLAlchemy): The extension bound to the app
+    """
+    if app.config['STORAGE_MODE'] != 'wal':
+        return
+
+    pragmas = {
+        'busy_timeout': app.config['SQLITE_BUSY_TIMEOUT'],
+        'synchronous': app.config['SQLITE_SYNCHRONOUS'],
+        'mmap_size': app.config['SQLITE_MMAP_SIZE'],
+        'cache_size': app.config['SQLITE_CACHE_SIZE']
+    }
+
+    with app.app_context():
+        engines = db.engines
+        writer = engines[None]
+        reader = engines[READER_BIND]
+
+    event.listen(writer, 'connect', _pragma_listener(dict(pragmas, journal_mode='WAL')))
+    event.listen(reader, 'connect', _pragma_listener(dict(pragmas, query_only='ON')))
+
+@contextmanager
+def use_writer():
+    """Send the current request's queries to the writer engine, for handlers that modify data"""
+    previous = g.get('db_writer', False)
+    g.db_writer = True
+    try:
+        yield
+    finally:
+        g.db_writer = previous
+
+class RoutingSession(Session):
+    """Session that sends request-handler reads to the read-only engine when one is configured"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and not g.get('db_writer', False):
+            reader = self._db.engines.get(READER_BIND)
+            if reader is not None:
+                return reader
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _pragma_listener(pragmas):
+    """Build a connect listener that applies the given pragmas to every new connection"""
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return set_pragmas
+
+def _is_sqlite(uri):
+    """Whether a database URI points at an on-disk SQLite database"""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
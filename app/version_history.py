@@ -0,0 +1,200 @@
+import logging
+import os
+from datetime import datetime, timezone
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db, metrics
+from app.models import Library, Version, VersionBackfill
+from app.versioning import parse_version
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Libraries whose histories are inserted and committed together
+BACKFILL_BATCH_SIZE = int(os.getenv('BACKFILL_BATCH_SIZE', 50))
+
+# Pause between registry requests, like the collectors
+REQUEST_DELAY = float(os.getenv('BACKFILL_REQUEST_DELAY', 0.2))
+
+# Data source each language's histories come from
+LANGUAGE_SOURCES = {'Python': 'pypi', 'JavaScript': 'npm', '.NET': 'nuget', 'Java': 'maven'}
+
+def fetch_version_history(library):
+    """
+    Get a library's complete release list from its registry
+
+    Args:
+        library (Library): Library to look up
+
+    Returns:
+        list: (version_number, release_date) tuples; release_date may be None
+    """
+    if library.language == 'Python':
+        from app.data_sources import pypi
+        details = pypi.get_package_details(library.name)
+        releases = details.get('versions', []) if details else []
+    elif library.language == 'JavaScript':
+        from app.data_sources import npm
+        details = npm.get_package_details(library.name)
+        releases = details.get('versions', []) if details else []
+    elif library.language == '.NET':
+        from app.data_sources import nuget
+        details = nuget.get_package_details(library.name)
+        releases = details.get('versions', []) if details else []
+    elif library.language == 'Java' and ':' in library.name:
+        from app.data_sources import maven
+        group_id, artifact_id = library.name.split(':', 1)
+        details = maven.get_package_details(group_id, artifact_id)
+        releases = details.get('releases', []) if details else []
+    else:
+        releases = []
+
+    return [(release['version'], parse_release_date(release.get('release_date')))
+            for release in releases if release.get('version')]
+
+def parse_release_date(value):
+    """
+    Parse a registry timestamp into a naive UTC datetime
+
+    Returns:
+        datetime: Parsed value, or None if missing or unparseable
+    """
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def backfill_version_history(fetch=fetch_version_history, language=None, batch_size=BACKFILL_BATCH_SIZE,
+                             request_delay=REQUEST_DELAY):
+    """
+    Ingest the full version history of every library
+
+    The first pass for a library inserts its whole release list. Later passes
+    only insert releases newer than the newest one seen last time, tracked per
+    library in VersionBackfill. Versions already in the table are skipped by
+    the unique (library_id, version_number) index, so overlapping runs and
+    versions recorded by the collectors never duplicate.
+
+    Args:
+        fetch (callable): Returns (version_number, release_date) tuples for a library
+        language (str): Only backfill libraries in this language
+        batch_size (int): Libraries per insert and commit
+        request_delay (float): Seconds to wait between registry requests
+
+    Returns:
+        dict: Number of libraries processed and versions inserted
+    """
+    query = Library.query.order_by(Library.id)
+    if language:
+        query = query.filter(Library.language == language)
+
+    library_ids = [row.id for row in query.with_entities(Library.id)]
+    counts = {'libraries': 0, 'versions': 0}
+
+    for start in range(0, len(library_ids), batch_size):
+        batch_ids = library_ids[start:start + batch_size]
+        libraries = Library.query.filter(Library.id.in_(batch_ids)).all()
+        watermarks = dict(db.session.query(VersionBackfill.library_id, VersionBackfill.last_release_date).
+                          filter(VersionBackfill.library_id.in_(batch_ids)))
+
+        # Every history of the batch is fetched before anything is written, so a
+        # write transaction (and SQLite's write lock) never spans registry requests
+        rows = []
+        newest_dates = {}
+        for library in libraries:
+            try:
+                history = fetch(library)
+            except Exception as e:
+                logger.error(f"Error fetching version history for {library.name}: {str(e)}")
+                continue
+
+            watermark = watermarks.get(library.id)
+            if watermark:
+                history = [(number, date) for number, date in history if date and date > watermark]
+
+            for number, date in history:
+                # Keys are passed in so the column defaults don't look up the language per row
+                sort_key, prerelease = parse_version(number[:50], library.language)
+                rows.append({
+                    'library_id': library.id,
+                    'version_number': number[:50],
+                    'release_date': date,
+                    'release_notes': '',
+                    'sort_key': sort_key,
+                    'is_prerelease': prerelease
+                })
+
+            newest = max((date for _, date in history if date), default=None)
+            newest_dates[library.id] = max(filter(None, (watermark, newest)), default=None)
+
+            if request_delay:
+                metrics.wait(LANGUAGE_SOURCES.get(library.language, 'other'), request_delay)
+
+        counts['versions'] += _insert_new_versions(rows)
+        for library_id, last_release_date in newest_dates.items():
+            _record_watermark(library_id, last_release_date)
+        counts['libraries'] += len(libraries)
+        db.session.commit()
+
+        logger.info(f"Backfilled version history for {counts['libraries']}/{len(library_ids)} libraries")
+
+    return counts
+
+def remove_duplicate_versions():
+    """
+    Delete repeated (library_id, version_number) rows, keeping the oldest
+
+    Run before the unique index is created on databases that predate it.
+
+    Returns:
+        int: Number of rows deleted
+    """
+    keep = select(func.min(Version.id)).group_by(Version.library_id, Version.version_number)
+    result = db.session.execute(delete(Version).where(Version.id.not_in(keep)))
+    db.session.commit()
+    return result.rowcount
+
+def _insert_new_versions(rows):
+    """Insert version rows that aren't stored yet and return how many were inserted"""
+    if not rows:
+        return 0
+
+    known = set(db.session.query(Version.library_id, Version.version_number).
+                filter(Version.library_id.in_({row['library_id'] for row in rows})))
+
+    new_rows = {}
+    for row in rows:
+        key = (row['library_id'], row['version_number'])
+        if key not in known:
+            new_rows.setdefault(key, row)
+
+    if new_rows:
+        db.session.execute(_insert_ignoring_duplicates(), list(new_rows.values()))
+    return len(new_rows)
+
+def _insert_ignoring_duplicates():
+    """INSERT into version that skips rows violating the unique index, where the backend supports it"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(Version.__table__).on_conflict_do_nothing()
+    if dialect == 'sqlite':
+        return sqlite.insert(Version.__table__).on_conflict_do_nothing()
+    return Version.__table__.insert()
+
+def _record_watermark(library_id, last_release_date):
+    """Store how far a library's history has been backfilled"""
+    state = db.session.get(VersionBackfill, library_id)
+    if state is None:
+        state = VersionBackfill(library_id=library_id)
+        db.session.add(state)
+
+    state.last_release_date = last_release_date
+    state.synced_at = datetime.utcnow()
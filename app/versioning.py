@@ -0,0 +1,239 @@
+import re
+
+# Longest sort key stored; longer keys are truncated, which only affects
+# versions with absurd numbers of components
+MAX_KEY_LENGTH = 255
+
+# Qualifier ranks, lowest first. A release with no qualifier ranks as RELEASE,
+# so anything below it is a pre-release and anything above it a post-release.
+# NUMERIC is a semver pre-release that starts with a number (1.0.0-1), which
+# semver orders before any alphanumeric one.
+NUMERIC = 0
+DEV = 1
+ALPHA = 2
+BETA = 3
+MILESTONE = 4
+OTHER_PRERELEASE = 5
+RC = 6
+SNAPSHOT = 7
+RELEASE = 8
+POST = 9
+
+# Qualifier labels across PEP 440, semver/NuGet and Maven
+QUALIFIER_RANKS = {
+    'dev': DEV,
+    'a': ALPHA, 'alpha': ALPHA,
+    'b': BETA, 'beta': BETA,
+    'm': MILESTONE, 'milestone': MILESTONE,
+    'c': RC, 'rc': RC, 'cr': RC, 'pre': RC, 'preview': RC,
+    'snapshot': SNAPSHOT,
+    'canary': OTHER_PRERELEASE, 'next': OTHER_PRERELEASE, 'nightly': OTHER_PRERELEASE,
+    'ea': OTHER_PRERELEASE, 'experimental': OTHER_PRERELEASE, 'insiders': OTHER_PRERELEASE,
+    'final': RELEASE, 'ga': RELEASE, 'release': RELEASE,
+    'post': POST, 'rev': POST, 'r': POST, 'sp': POST
+}
+
+# Version scheme of each language's registry; other languages get the generic
+# rules, which treat every unknown label as a pre-release
+LANGUAGE_SCHEMES = {
+    'Python': 'pep440',
+    'JavaScript': 'semver',
+    '.NET': 'semver',
+    'Java': 'maven'
+}
+
+VERSION_PATTERN = re.compile(r'^v?(?:(\d+)!)?(\d+(?:\.\d+)*)(.*)$')
+TOKEN_PATTERN = re.compile(r'\d+|[a-z]+')
+
+def parse_version(version_number, language=None):
+    """
+    Compute the sort key and pre-release flag of a version string
+
+    Handles PEP 440 (1.0a1, 1.0rc2, 1.0.post1, 1.0.dev3, 1!2.0), semver and
+    NuGet (1.0.0-beta.2, 1.0.0.1, build metadata after +) and Maven
+    (1.0.0-M2.1, 1.0-SNAPSHOT, 1.0.Final, 1.0-sp1) version schemes.
+
+    The key is a string whose byte order is the version order, so it can be
+    indexed and compared in SQL. Numbers are length-prefixed so that 0.0.150
+    sorts after 0.0.52, trailing zero components are dropped so that 1.0 and
+    1.0.0 are equal, and each qualifier is ranked so that dev < alpha < beta
+    < milestone < rc < snapshot < release < post.
+
+    Keys are only compared between versions of one library, so the rules can
+    follow the library's registry: Maven build variants (31.1-jre) rank as the
+    release itself, and semver identifiers compare numbers before labels
+    (1.0.0-alpha.1 < 1.0.0-alpha.beta).
+
+    Args:
+        version_number (str): Version as published by the registry
+        language (str): Language of the library, which selects the scheme
+
+    Returns:
+        tuple: (sort key, is_prerelease), or (None, None) if the string is
+        not a version (e.g. npm's 'latest')
+    """
+    if not version_number:
+        return None, None
+
+    # Build metadata and PEP 440 local versions don't affect ordering
+    match = VERSION_PATTERN.match(version_number.strip().lower().split('+', 1)[0])
+    if not match:
+        return None, None
+
+    epoch, release, rest = match.groups()
+
+    components = [int(part) for part in release.split('.')]
+    while len(components) > 1 and components[-1] == 0:
+        components.pop()
+
+    scheme = LANGUAGE_SCHEMES.get(language)
+    qualifiers = _parse_qualifiers(rest, scheme)
+
+    key = _encode_numbers([int(epoch or 0)]) + _encode_numbers(components)
+    for index, (rank, numbers) in enumerate(qualifiers):
+        # In semver a label after the numbers outranks another number there
+        label_follows = scheme == 'semver' and index + 1 < len(qualifiers)
+        key += str(rank) + _encode_numbers(numbers, end='2' if label_follows else '0')
+    key += str(RELEASE) + _encode_numbers([])
+
+    is_prerelease = any(rank < RELEASE for rank, _ in qualifiers)
+    return key[:MAX_KEY_LENGTH], is_prerelease
+
+def version_sort_key(version_number, language=None):
+    """Sort key of a version string, or None if it isn't one"""
+    return parse_version(version_number, language)[0]
+
+def is_prerelease(version_number, language=None):
+    """Whether a version string is a pre-release, or None if it isn't a version"""
+    return parse_version(version_number, language)[1]
+
+def _parse_qualifiers(rest, scheme=None):
+    """
+    Split the text after the release numbers into ranked qualifiers
+
+    Numbers following a label belong to it (rc2, M2.1); a number without a
+    label is a numeric pre-release identifier. In Maven, an unknown label
+    right after the release numbers names a build of that release (Guava's
+    31.1-jre and 31.1-android) and is dropped along with its numbers.
+    """
+    qualifiers = []
+    variant = False
+
+    for token in TOKEN_PATTERN.findall(rest):
+        if token.isdigit():
+            if variant:
+                continue
+            if qualifiers:
+                qualifiers[-1][1].append(int(token))
+            else:
+                qualifiers.append((NUMERIC if scheme == 'semver' else OTHER_PRERELEASE, [int(token)]))
+            continue
+
+        rank = QUALIFIER_RANKS.get(token)
+        if rank is None and not qualifiers and scheme == 'maven':
+            variant = True
+            continue
+        variant = False
+        if rank == RELEASE:
+            # Maven's 1.0.Final is the 1.0 release
+            continue
+        qualifiers.append((rank or OTHER_PRERELEASE, []))
+
+    return qualifiers
+
+def _encode_numbers(numbers, end='0'):
+    """
+    Encode a list of integers so that string order matches list order
+
+    Each number is written as '1', its two-digit length and its digits, and
+    the list ends with end: '0' sorts a list before any longer list it
+    prefixes, '2' after it.
+    """
+    encoded = ''
+    for number in numbers:
+        digits = str(number)[:99]
+        encoded += f"1{len(digits):02d}{digits}"
+    return encoded + end
+
+def latest_stable_versions(library_ids):
+    """
+    Get the highest stable version of each library
+
+    Uses the (library_id, is_prerelease, sort_key) index: one index seek per
+    library rather than loading and parsing every version.
+
+    Args:
+        library_ids (list): Library ids to look up
+
+    Returns:
+        dict: Library id -> Version
+    """
+    from sqlalchemy import func
+    from app import db
+    from app.models import Version
+
+    if not library_ids:
+        return {}
+
+    newest = db.session.query(
+        Version.library_id,
+        func.max(Version.sort_key).label('sort_key')
+    ).filter(
+        Version.library_id.in_(library_ids),
+        Version.is_prerelease.is_(False)
+    ).group_by(
+        Version.library_id
+    ).subquery()
+
+    versions = Version.query.join(
+        newest, (Version.library_id == newest.c.library_id) & (Version.sort_key == newest.c.sort_key)
+    ).all()
+
+    return {version.library_id: version for version in versions}
+
+def populate_version_keys(batch_size=5000, recompute=False):
+    """
+    Compute sort keys for versions stored before the columns existed
+
+    Args:
+        batch_size (int): Versions per update and commit
+        recompute (bool): Recompute every stored key, e.g. after the
+            qualifier ranking changed, rather than only the missing ones
+
+    Returns:
+        int: Number of versions updated
+    """
+    from sqlalchemy import bindparam, update
+    from app import db
+    from app.models import Library, Version
+
+    statement = update(Version.__table__).where(Version.__table__.c.id == bindparam('version_id')).values(
+        sort_key=bindparam('key'), is_prerelease=bindparam('prerelease'))
+
+    updated = 0
+    last_id = 0
+    while True:
+        query = db.session.query(Version.id, Version.version_number, Library.language, Version.sort_key,
+                                 Version.is_prerelease).join(Library, Library.id == Version.library_id).filter(
+            Version.id > last_id)
+        if not recompute:
+            query = query.filter(Version.sort_key.is_(None))
+        rows = query.order_by(Version.id).limit(batch_size).all()
+
+        if not rows:
+            break
+
+        params = []
+        for version_id, version_number, language, stored_key, stored_prerelease in rows:
+            key, prerelease = parse_version(version_number, language)
+            if key is not None and (key, prerelease) != (stored_key, stored_prerelease):
+                params.append({'version_id': version_id, 'key': key, 'prerelease': prerelease})
+
+        if params:
+            db.session.execute(statement, params)
+        db.session.commit()
+
+        updated += len(params)
+        last_id = rows[-1][0]
+
+    return updated
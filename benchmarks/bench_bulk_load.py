@@ -0,0 +1,76 @@
+"""
+Ingest throughput benchmark for the PostgreSQL COPY path
+
+Saves batches of collector-shaped library dicts through save_libraries, once
+through the row-by-row ORM path and once through the COPY + INSERT ... ON
+CONFLICT path, first as inserts and then again as updates.
+
+Usage:
+    createdb genai_pulse_bench
+    python -m benchmarks.bench_bulk_load --database postgresql://localhost/genai_pulse_bench --libraries 20000
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.catalog import NAME_PREFIXES, NAME_SUFFIXES, DESCRIPTION_WORDS
+
+CATEGORIES = ['Machine Learning', 'Deep Learning', 'Natural Language Processing', 'Computer Vision',
+              'Generative AI', 'Large Language Models']
+
+def make_libraries(prefix, count, version):
+    """Build library dicts in the shape the data sources return"""
+    now = datetime.utcnow()
+    return [{
+        'name': f"{prefix}-{NAME_PREFIXES[i % len(NAME_PREFIXES)]}{NAME_SUFFIXES[i % len(NAME_SUFFIXES)]}-{i}",
+        'description': ' '.join(DESCRIPTION_WORDS[(i + j) % len(DESCRIPTION_WORDS)] for j in range(8)),
+        'version': version,
+        'last_update': now - timedelta(minutes=i),
+        'repository_url': f"https://github.com/bench/{prefix}-{i}",
+        'documentation_url': f"https://docs.example.com/{prefix}-{i}",
+        'package_url': f"https://pypi.org/project/{prefix}-{i}/",
+        'downloads': (i * 7919) % 2000000,
+        'categories': [CATEGORIES[i % len(CATEGORIES)], CATEGORIES[(i * 3) % len(CATEGORIES)]]
+    } for i in range(count)]
+
+def time_save(libraries, batch_size):
+    """Save libraries in collector-sized batches and return libraries per second"""
+    from app.scheduler import save_libraries
+
+    started = time.perf_counter()
+    for start in range(0, len(libraries), batch_size):
+        save_libraries(libraries[start:start + batch_size], 'Python')
+    return len(libraries) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PostgreSQL bulk ingest')
+    parser.add_argument('--database', required=True, help='PostgreSQL database URI')
+    parser.add_argument('--libraries', type=int, default=20000, help='Libraries per run')
+    parser.add_argument('--batch-size', type=int, default=2000, help='Libraries per save_libraries call')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URI'] = args.database
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from app import create_app, bulk_load
+
+    app = create_app()
+    with app.app_context():
+        if not bulk_load.supports_copy():
+            parser.error('the COPY path needs a postgresql+psycopg2 database')
+
+        run_id = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+        print(f"{'path':<6}  {'insert libs/s':>14}  {'update libs/s':>14}")
+
+        for label, enabled in (('orm', False), ('copy', True)):
+            bulk_load.BULK_LOAD_ENABLED = enabled
+            prefix = f"bench-{run_id}-{label}"
+
+            inserted = time_save(make_libraries(prefix, args.libraries, '1.0.0'), args.batch_size)
+            updated = time_save(make_libraries(prefix, args.libraries, '1.1.0'), args.batch_size)
+            print(f"{label:<6}  {inserted:>14.0f}  {updated:>14.0f}")
+
+if __name__ == '__main__':
+    main()
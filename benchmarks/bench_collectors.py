@@ -0,0 +1,225 @@
+"""
+Offline collector benchmark
+
+Starts a mock registry server (see benchmarks/mock_registry.py) and runs
+each collection job against it in a fresh interpreter, with the data
+sources' politeness delays switched off. With --replay, the jobs read HTTP
+cassettes recorded from the real registries instead (see app/cassettes.py). Reports packages/sec, requests
+issued, failed and rate-limited requests, and the job's peak memory.
+Results can be appended to a JSON lines file to track crawler performance
+from run to run.
+
+Usage:
+    python -m benchmarks.bench_collectors --latency-ms 20 --output collector_runs.jsonl
+    python -m benchmarks.bench_collectors --job collect_python_libraries --error-rate 0.05
+    python -m benchmarks.bench_collectors --replay cassettes
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.mock_registry import MockRegistry, registry_env
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scheduled jobs benchmarked, in run order, with the data source each one reads
+JOBS = (
+    ('collect_python_libraries', 'pypi'),
+    ('collect_javascript_libraries', 'npm'),
+    ('collect_dotnet_libraries', 'nuget'),
+    ('collect_java_libraries', 'maven'),
+    ('update_github_data', 'github'),
+    ('discover_github_repositories', 'github')
+)
+
+# Language whose package count each collector records
+JOB_LANGUAGES = {
+    'collect_python_libraries': 'Python',
+    'collect_javascript_libraries': 'JavaScript',
+    'collect_dotnet_libraries': '.NET',
+    'collect_java_libraries': 'Java'
+}
+
+def run_job(name, source):
+    """
+    Run one scheduled job against the configured registries and database
+
+    Returns:
+        dict: Elapsed seconds, packages processed, the source's request
+        counters and memory use in MB
+    """
+    import logging
+    logging.disable(logging.WARNING)
+
+    from app import create_app, db, metrics, scheduler
+    from app.models import Library, DiscoveredRepository
+
+    app = create_app()
+
+    with app.app_context():
+        if name == 'update_github_data':
+            packages = Library.query.filter(Library.repository_url.ilike('%github.com%')).count()
+        queued_before = DiscoveredRepository.query.count()
+
+        baseline_mb = _max_rss_mb()
+        started = time.perf_counter()
+        getattr(scheduler, name)()
+        elapsed = time.perf_counter() - started
+
+        if name in JOB_LANGUAGES:
+            packages = metrics.LAST_RUN_PACKAGES.labels(JOB_LANGUAGES[name]).get()
+        elif name == 'discover_github_repositories':
+            packages = DiscoveredRepository.query.count() - queued_before
+        db.session.remove()
+
+    statuses = {status: count for (request_source, status), count in metrics.SOURCE_REQUESTS.values().items()
+                if request_source == source}
+
+    return {
+        'elapsed': elapsed,
+        'packages': int(packages),
+        'requests': int(sum(statuses.values())),
+        'errors': int(sum(count for status, count in statuses.items() if status == 'error' or int(status) >= 500)),
+        'rate_limited': int(metrics.SOURCE_RATE_LIMITED.labels(source).get()),
+        'response_mb': metrics.SOURCE_BYTES.labels(source).get() / 1024 / 1024,
+        'peak_mb': _max_rss_mb(),
+        'growth_mb': _max_rss_mb() - baseline_mb
+    }
+
+def run_benchmark(database_uri, jobs, registry=None, cassette_dir=None, request_delay=0.0, discovery_days=365):
+    """
+    Run each job in its own interpreter against the mock registry or recorded cassettes
+
+    Args:
+        database_uri (str): Database the jobs write to
+        jobs (list): Job names, from JOBS
+        registry (MockRegistry): Running mock registry
+        cassette_dir (str): Replay HTTP cassettes from here instead
+        request_delay (float): Pause between registry requests, overriding the sources' defaults
+        discovery_days (int): Creation window searched by the discovery job
+
+    Returns:
+        list: Result dicts, one per job
+    """
+    env = dict(os.environ, DATABASE_URI=database_uri)
+    if cassette_dir:
+        env.update(HTTP_CASSETTE_MODE='replay', HTTP_CASSETTE_DIR=cassette_dir)
+    else:
+        env.update(registry_env(registry.url))
+    for prefix in ('PYPI', 'NPM', 'NUGET', 'MAVEN'):
+        env[f"{prefix}_REQUEST_DELAY"] = str(request_delay)
+    env['GITHUB_SEARCH_RATE'] = str(60 / request_delay if request_delay else 0)
+    env['DISCOVERY_RECENT_DAYS'] = str(discovery_days)
+    # Time the crawl itself; snapshots and the read index are only written when asked for
+    env.setdefault('SNAPSHOT_DIR', '')
+    env.setdefault('CATALOG_INDEX_PATH', '')
+
+    results = []
+    for name, source in JOBS:
+        if name not in jobs:
+            continue
+
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_collectors', '--child', name, '--child-source', source],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+        result.update({
+            'job': name,
+            'source': source,
+            'packages_per_sec': result['packages'] / result['elapsed'] if result['elapsed'] else 0
+        })
+        results.append(result)
+
+    return results
+
+def format_results(results):
+    """Render results as a text table"""
+    lines = [f"{'job':<30}  {'packages':>8}  {'pkg/s':>8}  {'requests':>8}  {'errors':>6}  "
+             f"{'limited':>7}  {'resp MB':>7}  {'peak MB':>7}  {'+MB':>6}"]
+    for result in results:
+        lines.append(
+            f"{result['job']:<30}  {result['packages']:>8}  {result['packages_per_sec']:>8.1f}  "
+            f"{result['requests']:>8}  {result['errors']:>6}  {result['rate_limited']:>7}  "
+            f"{result['response_mb']:>7.2f}  {result['peak_mb']:>7.1f}  {result['growth_mb']:>6.1f}")
+    return '\n'.join(lines)
+
+def _max_rss_mb():
+    """Peak resident memory of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def _git_revision():
+    """Current commit, so stored results can be matched to code"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the collectors against a mock registry')
+    parser.add_argument('--job', action='append', choices=[name for name, _ in JOBS], help='Only run these jobs')
+    parser.add_argument('--database', help='Database URI (defaults to a fresh SQLite file)')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Registry response delay')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Random +/- variation of the delay')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of registry requests failing with 503')
+    parser.add_argument('--rate-limit', type=int, default=None, help='Registry requests per source per window')
+    parser.add_argument('--rate-limit-window', type=float, default=60, help='Rate limit window in seconds')
+    parser.add_argument('--search-size', type=int, default=100, help='Most results per registry search')
+    parser.add_argument('--versions', type=int, default=20, help='Releases per mock package')
+    parser.add_argument('--payload-dir', help='Directory of recorded payloads to serve')
+    parser.add_argument('--replay', metavar='CASSETTE_DIR',
+                        help='Replay HTTP cassettes recorded from real registries instead of the mock server')
+    parser.add_argument('--request-delay', type=float, default=0, help='Pause between registry requests')
+    parser.add_argument('--discovery-days', type=int, default=365,
+                        help='Creation window searched by the discovery job (the mock lists 3 repositories a day)')
+    parser.add_argument('--output', help='Append the results to this JSON lines file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--child-source', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_job(args.child, args.child_source)))
+        return
+
+    registry = None if args.replay else MockRegistry(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                            rate_limit=args.rate_limit, rate_limit_window=args.rate_limit_window,
+                            search_size=args.search_size, versions=args.versions,
+                            payload_dir=args.payload_dir).start()
+    workdir = None if args.database else tempfile.mkdtemp(prefix='genai_pulse_collectors_')
+    database_uri = args.database or f"sqlite:///{os.path.join(workdir, 'collectors.db')}"
+
+    try:
+        results = run_benchmark(database_uri, args.job or [name for name, _ in JOBS], registry=registry,
+                                cassette_dir=args.replay, request_delay=args.request_delay,
+                                discovery_days=args.discovery_days)
+    finally:
+        if registry:
+            registry.stop()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(format_results(results))
+
+    if args.output:
+        settings = {key: value for key, value in vars(args).items() if key not in ('child', 'output', 'database')}
+        with open(args.output, 'a') as output:
+            output.write(json.dumps({
+                'timestamp': datetime.utcnow().isoformat(),
+                'revision': _git_revision(),
+                'settings': settings,
+                'results': results
+            }) + '\n')
+
+if __name__ == '__main__':
+    main()
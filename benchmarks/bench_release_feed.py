@@ -0,0 +1,83 @@
+"""
+Release feed benchmark
+
+Times /api/releases and /api/releases/counts over different windows, filters
+and page depths. Run it against a large synthetic catalog; the generator
+writes several versions per library, so 1m libraries give millions of
+version rows.
+
+Usage:
+    python -m benchmarks.catalog --size 1m --database sqlite:////tmp/catalog_1m.db
+    python -m benchmarks.bench_release_feed --database sqlite:////tmp/catalog_1m.db
+"""
+import argparse
+import os
+from datetime import timedelta
+
+from benchmarks.bench_routes import run_benchmark, format_results
+
+WINDOWS = (7, 30, 365)
+
+def build_cases(app, page_depths=(10, 100)):
+    """
+    Build (label, [urls]) cases for the release feed routes
+
+    Windows end at the newest release in the catalog so synthetic data of any
+    age is exercised. Cursors for deep pages are collected by walking the feed.
+    """
+    from sqlalchemy import func
+    from app import db
+    from app.models import Version, Category
+
+    with app.app_context():
+        newest = db.session.query(func.max(Version.release_date)).scalar()
+        category_id = db.session.query(func.min(Category.id)).scalar()
+
+    if newest is None:
+        return []
+
+    end = (newest + timedelta(seconds=1)).isoformat()
+    cases = []
+
+    for days in WINDOWS:
+        base = f"days={days}&end={end}"
+        cases.extend([
+            (f"/api/releases {days}d", [f"/api/releases?{base}"]),
+            (f"/api/releases {days}d language", [f"/api/releases?{base}&language=Python"]),
+            (f"/api/releases {days}d category", [f"/api/releases?{base}&category_id={category_id}"]),
+            (f"/api/releases/counts {days}d day", [f"/api/releases/counts?{base}&bucket=day"]),
+            (f"/api/releases/counts {days}d month", [f"/api/releases/counts?{base}&bucket=month"])
+        ])
+
+    # Deep pages of the widest window
+    client = app.test_client()
+    url = f"/api/releases?days={WINDOWS[-1]}&end={end}&limit=100"
+    cursor = None
+
+    for page in range(1, max(page_depths) + 1):
+        if page in page_depths and cursor:
+            cases.append((f"/api/releases {WINDOWS[-1]}d page {page}", [f"{url}&cursor={cursor}"]))
+
+        cursor = client.get(f"{url}&cursor={cursor}" if cursor else url).get_json()['next_cursor']
+        if not cursor:
+            break
+
+    return cases
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the release feed')
+    parser.add_argument('--database', help='Database URI (defaults to DATABASE_URI)')
+    parser.add_argument('--iterations', type=int, default=20, help='Timed requests per case')
+    parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per case')
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ['DATABASE_URI'] = args.database
+
+    from app import create_app
+    app = create_app()
+
+    print(format_results(run_benchmark(app, build_cases(app), iterations=args.iterations, warmup=args.warmup)))
+
+if __name__ == '__main__':
+    main()
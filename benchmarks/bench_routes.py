@@ -0,0 +1,184 @@
+"""
+Route benchmark suite
+
+Times every route registered by the main and api blueprints against the
+configured database and reports SQL query counts and p50/p99 latency.
+
+Usage:
+    python -m benchmarks.catalog --size 100k --database sqlite:////tmp/catalog_100k.db
+    python -m benchmarks.bench_routes --database sqlite:////tmp/catalog_100k.db
+"""
+import argparse
+import logging
+import math
+import os
+import random
+import statistics
+import time
+
+from sqlalchemy import event
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Blueprints whose routes are benchmarked
+BLUEPRINTS = ('main', 'api')
+
+# Endpoints that never finish a response on their own
+SKIP_ENDPOINTS = {'api.stream_releases'}
+
+def build_cases(app, rng, samples=5):
+    """
+    Build the list of URLs to time
+
+    Every route in BLUEPRINTS is included; path arguments are filled with ids
+    sampled from the catalog, and a few filtered variants are added for the
+    list pages.
+
+    Args:
+        app (Flask): The application
+        rng (random.Random): Random source for sampling ids
+        samples (int): Number of distinct ids to sample per parameterised route
+
+    Returns:
+        list: (label, [urls]) tuples
+    """
+    from app import db
+    from app.models import Library, Category
+    from sqlalchemy import func
+
+    with app.app_context():
+        max_id = db.session.query(func.max(Library.id)).scalar() or 1
+        library_ids = [rng.randint(1, max_id) for _ in range(samples)]
+        category_ids = [c.id for c in Category.query.all()] or [1]
+
+    cases = []
+    for rule in app.url_map.iter_rules():
+        blueprint = rule.endpoint.split('.')[0]
+        if blueprint not in BLUEPRINTS or rule.endpoint in SKIP_ENDPOINTS or 'GET' not in rule.methods:
+            continue
+
+        if 'library_id' in rule.arguments:
+            urls = [rule.rule.replace('<int:library_id>', str(library_id)) for library_id in library_ids]
+        elif rule.arguments:
+            logger.warning(f"Skipping {rule.rule}: don't know how to fill {sorted(rule.arguments)}")
+            continue
+        else:
+            urls = [rule.rule]
+
+        cases.append((rule.rule, urls))
+
+    # Filtered variants of the list pages
+    category_id = rng.choice(category_ids)
+    cases.extend([
+        ('/api/libraries?language=...', ['/api/libraries?language=Python&sort=newest']),
+        ('/api/libraries?category_id=...', [f'/api/libraries?category_id={category_id}']),
+        ('/api/libraries?search=...', ['/api/libraries?search=vision']),
+        ('/libraries?category=...', [f'/libraries?category={category_id}&category={rng.choice(category_ids)}']),
+        ('/libraries?sort=name', ['/libraries?sort=name&view=list'])
+    ])
+
+    return cases
+
+def run_benchmark(app, cases, iterations=20, warmup=2):
+    """
+    Time each case with the Flask test client
+
+    Args:
+        app (Flask): The application
+        cases (list): (label, [urls]) tuples from build_cases
+        iterations (int): Timed requests per case
+        warmup (int): Untimed requests per case before measuring
+
+    Returns:
+        list: One result dict per case
+    """
+    from app import db
+
+    query_count = [0]
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        query_count[0] += 1
+
+    # Every bind, so reads routed to the WAL reader engine are counted too
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', count_query)
+
+    client = app.test_client()
+    results = []
+
+    try:
+        for label, urls in cases:
+            for i in range(warmup):
+                client.get(urls[i % len(urls)])
+
+            latencies = []
+            queries = []
+            statuses = set()
+
+            for i in range(iterations):
+                url = urls[i % len(urls)]
+                query_count[0] = 0
+
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+                queries.append(query_count[0])
+                statuses.add(response.status_code)
+
+            results.append({
+                'route': label,
+                'status': ','.join(str(s) for s in sorted(statuses)),
+                'queries': statistics.median(queries),
+                'p50_ms': percentile(latencies, 50),
+                'p99_ms': percentile(latencies, 99),
+                'max_ms': max(latencies)
+            })
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', count_query)
+
+    return results
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def format_results(results):
+    """Render benchmark results as a plain-text table"""
+    width = max([len(r['route']) for r in results] + [5])
+    lines = [f"{'route':<{width}}  {'status':>7}  {'queries':>7}  {'p50 ms':>9}  {'p99 ms':>9}  {'max ms':>9}"]
+    for r in results:
+        lines.append(f"{r['route']:<{width}}  {r['status']:>7}  {r['queries']:>7g}  "
+                     f"{r['p50_ms']:>9.2f}  {r['p99_ms']:>9.2f}  {r['max_ms']:>9.2f}")
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark GenAIPulse routes')
+    parser.add_argument('--database', help='Database URI (defaults to DATABASE_URI)')
+    parser.add_argument('--iterations', type=int, default=20, help='Timed requests per route')
+    parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per route')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for sampled ids')
+    parser.add_argument('--route', action='append', help='Only run routes containing this text')
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ['DATABASE_URI'] = args.database
+
+    from app import create_app
+    app = create_app()
+
+    cases = build_cases(app, random.Random(args.seed))
+    if args.route:
+        cases = [case for case in cases if any(text in case[0] for text in args.route)]
+
+    print(format_results(run_benchmark(app, cases, iterations=args.iterations, warmup=args.warmup)))
+
+if __name__ == '__main__':
+    main()
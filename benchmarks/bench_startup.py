@@ -0,0 +1,133 @@
+"""
+Worker startup benchmark
+
+Measures what each web worker pays before it can serve its first request:
+
+- development: a fresh interpreter running create_app() with schema creation
+  and the sample-data check
+- production: a fresh interpreter running create_app() with APP_ENV=production
+- preload-fork: a worker forked from a parent that already built and warmed the
+  app, as with gunicorn --preload
+
+Usage:
+    python -m benchmarks.bench_startup --database sqlite:////tmp/catalog_10k.db
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter for the cold-start modes
+CHILD_SCRIPT = r'''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+booted = time.perf_counter()
+app.test_client().get(sys.argv[1])
+served = time.perf_counter()
+print(json.dumps({'boot_ms': (booted - started) * 1000, 'first_request_ms': (served - booted) * 1000}))
+'''
+
+def measure_cold(url, app_env, runs):
+    """
+    Boot the app in fresh interpreters
+
+    Returns:
+        list: Timing dicts with boot_ms, first_request_ms and process_ms
+    """
+    env = dict(os.environ, APP_ENV=app_env)
+    results = []
+
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT, url],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        timing = json.loads(output.strip().splitlines()[-1])
+        timing['process_ms'] = (time.perf_counter() - started) * 1000
+        results.append(timing)
+
+    return results
+
+def measure_fork(url, runs):
+    """
+    Fork workers from a parent that has already created and warmed the app
+
+    Returns:
+        list: Timing dicts with boot_ms (fork until ready) and first_request_ms
+    """
+    os.environ['APP_ENV'] = 'production'
+    from app import create_app, warm_up, db
+
+    app = create_app()
+    warm_up(app)
+    results = []
+
+    for _ in range(runs):
+        read_fd, write_fd = os.pipe()
+        started = time.perf_counter()
+        pid = os.fork()
+
+        if pid == 0:
+            os.close(read_fd)
+            with app.app_context():
+                db.engine.dispose(close=False)
+            booted = time.perf_counter()
+            app.test_client().get(url)
+            served = time.perf_counter()
+            os.write(write_fd, json.dumps({
+                'boot_ms': (booted - started) * 1000,
+                'first_request_ms': (served - booted) * 1000
+            }).encode())
+            os._exit(0)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            output = pipe.read()
+        os.waitpid(pid, 0)
+        results.append(json.loads(output))
+
+    return results
+
+def summarize(label, results):
+    """Format median timings for one mode"""
+    line = f"{label:<14}"
+    for key in ('process_ms', 'boot_ms', 'first_request_ms'):
+        values = [r[key] for r in results if key in r]
+        line += f"  {statistics.median(values):>16.1f}" if values else f"  {'-':>16}"
+    return line
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-worker startup cost')
+    parser.add_argument('--database', help='Database URI (defaults to DATABASE_URI)')
+    parser.add_argument('--runs', type=int, default=5, help='Boots per mode')
+    parser.add_argument('--url', default='/', help='Path requested as the first request')
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ['DATABASE_URI'] = args.database
+
+    # Initialize the schema once, as `flask init-db` would
+    subprocess.run([sys.executable, '-c', 'from app import create_app; create_app(init_db=True)'],
+                   cwd=ROOT, env=dict(os.environ), check=True, capture_output=True)
+
+    rows = [
+        ('development', measure_cold(args.url, 'development', args.runs)),
+        ('production', measure_cold(args.url, 'production', args.runs))
+    ]
+    if hasattr(os, 'fork'):
+        rows.append(('preload-fork', measure_fork(args.url, args.runs)))
+
+    print(f"{'mode':<14}  {'process ms':>16}  {'boot ms':>16}  {'first request ms':>16}")
+    for label, results in rows:
+        print(summarize(label, results))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Concurrent read + write load test for the SQLite storage modes
+
+Copies a catalog database, then runs reader threads against the page and API
+routes while a writer thread saves batches of new libraries through
+save_libraries, once per STORAGE_MODE. Reports read latency, failed reads and
+write throughput.
+
+Usage:
+    python -m benchmarks.catalog --size 100k --database sqlite:////tmp/catalog_100k.db
+    python -m benchmarks.bench_storage --source /tmp/catalog_100k.db --duration 20
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.bench_routes import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Routes hit by the reader threads, round-robin
+READ_URLS = ['/api/libraries', '/api/stats', '/libraries', '/api/libraries?language=Python&sort=newest', '/']
+
+MODES = ('default', 'wal')
+
+def run_load(duration, readers, write_batch):
+    """
+    Run the load test against the configured DATABASE_URI and STORAGE_MODE
+
+    Returns:
+        dict: Read latency percentiles, read errors and write throughput
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from app import create_app, db
+    from app.models import Library
+    from app.scheduler import save_libraries
+
+    app = create_app(init_db=False)
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = []
+    failures = [0]
+
+    def read_loop(offset):
+        client = app.test_client()
+        i = offset
+        while not stop.is_set():
+            url = READ_URLS[i % len(READ_URLS)]
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code >= 500:
+                    failures[0] += 1
+            i += 1
+
+    def write_loop():
+        batch = 0
+        with app.app_context():
+            while not stop.is_set():
+                save_libraries([{
+                    'name': f"loadtest-{os.getpid()}-{batch}-{i}",
+                    'description': 'Synthetic library written by the storage load test',
+                    'version': '1.0.0',
+                    'last_update': datetime.utcnow(),
+                    'categories': ['Machine Learning']
+                } for i in range(write_batch)], 'Python')
+                batch += 1
+
+    with app.app_context():
+        before = Library.query.count()
+
+    threads = [threading.Thread(target=read_loop, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=write_loop))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        written = Library.query.count() - before
+        db.session.remove()
+
+    return {
+        'reads': len(latencies),
+        'read_failures': failures[0],
+        'read_p50_ms': percentile(latencies, 50) if latencies else 0,
+        'read_p99_ms': percentile(latencies, 99) if latencies else 0,
+        'reads_per_sec': len(latencies) / elapsed,
+        'writes_per_sec': written / elapsed
+    }
+
+def run_mode(source, mode, args):
+    """Copy the source database and run the load test for one mode in a fresh interpreter"""
+    workdir = tempfile.mkdtemp(prefix='genai_pulse_storage_')
+    path = os.path.join(workdir, 'catalog.db')
+
+    try:
+        shutil.copy(source, path)
+
+        # WAL is persistent in the file, so reset it for the default mode
+        connection = sqlite3.connect(path)
+        connection.execute('PRAGMA journal_mode=WAL' if mode == 'wal' else 'PRAGMA journal_mode=DELETE')
+        connection.close()
+
+        env = dict(os.environ, DATABASE_URI=f"sqlite:///{path}", STORAGE_MODE=mode)
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_storage', '--child',
+             '--duration', str(args.duration), '--readers', str(args.readers), '--write-batch', str(args.write_batch)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent read/write load test for the storage modes')
+    parser.add_argument('--source', help='SQLite catalog file to copy for each run')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per mode')
+    parser.add_argument('--readers', type=int, default=8, help='Concurrent reader threads')
+    parser.add_argument('--write-batch', type=int, default=200, help='Libraries per save_libraries call')
+    parser.add_argument('--mode', choices=MODES, action='append', help='Only run these modes')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_load(args.duration, args.readers, args.write_batch)))
+        return
+
+    if not args.source:
+        parser.error('--source is required')
+
+    print(f"{'mode':<8}  {'reads/s':>9}  {'read p50 ms':>11}  {'read p99 ms':>11}  {'failed reads':>12}  {'writes/s':>9}")
+    for mode in args.mode or MODES:
+        r = run_mode(args.source, mode, args)
+        print(f"{mode:<8}  {r['reads_per_sec']:>9.1f}  {r['read_p50_ms']:>11.2f}  {r['read_p99_ms']:>11.2f}  "
+              f"{r['read_failures']:>12}  {r['writes_per_sec']:>9.1f}")
+
+if __name__ == '__main__':
+    main()
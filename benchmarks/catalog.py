@@ -0,0 +1,234 @@
+"""
+Synthetic large-catalog generator
+
+Fills a GenAIPulse database with a realistic catalog of libraries, version
+histories, category links and dependencies so routes can be measured at
+production scale.
+
+Usage:
+    python -m benchmarks.catalog --size 100k --database sqlite:////tmp/catalog_100k.db
+"""
+import argparse
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Named catalog sizes
+SIZES = {
+    '10k': 10000,
+    '100k': 100000,
+    '1m': 1000000
+}
+
+# Share of the catalog per language, roughly matching the real registries
+LANGUAGE_WEIGHTS = {
+    'Python': 0.40,
+    'JavaScript': 0.35,
+    '.NET': 0.12,
+    'Java': 0.13
+}
+
+# Extra categories the collectors create on top of the seeded ones
+EXTRA_CATEGORIES = [
+    'Recommendation Systems', 'AutoML', 'Scientific Computing',
+    'JavaScript Libraries', '.NET Libraries', 'Java Libraries'
+]
+
+NAME_PREFIXES = ['deep', 'neuro', 'tensor', 'lang', 'vision', 'text', 'auto', 'fast', 'open',
+                 'smart', 'gen', 'brain', 'torch', 'cog', 'sense', 'infer', 'vector', 'graph']
+NAME_SUFFIXES = ['kit', 'flow', 'net', 'lab', 'core', 'ml', 'ai', 'hub', 'chain', 'lens',
+                 'forge', 'stack', 'mind', 'bench', 'serve', 'engine', 'js', 'lite']
+DESCRIPTION_WORDS = ['fast', 'scalable', 'lightweight', 'production-ready', 'toolkit', 'framework',
+                     'library', 'for', 'training', 'inference', 'serving', 'embeddings', 'models',
+                     'transformers', 'agents', 'retrieval', 'vision', 'speech', 'text', 'tabular',
+                     'reinforcement', 'learning', 'neural', 'networks', 'generative', 'LLM', 'GPU']
+
+# Rows per INSERT batch
+CHUNK_SIZE = 5000
+
+def generate_catalog(size, seed=42, max_versions=8, max_dependencies=6):
+    """
+    Insert a synthetic catalog into the database of the current app context
+
+    Library ids are assigned up front so versions and category links can be
+    bulk inserted without reading anything back.
+
+    Args:
+        size (int): Number of libraries to create
+        seed (int): Random seed, so runs are reproducible
+        max_versions (int): Upper bound on versions per library
+        max_dependencies (int): Upper bound on dependencies per library
+
+    Returns:
+        dict: Number of libraries, versions, category links and dependencies inserted
+    """
+    from app import db
+    from app.models import Library, Category, Version, LibraryDependency, library_categories
+    from app.aggregates import rebuild_aggregates
+    from app.dependency_graph import normalise_name, recompute_importance
+    from app.projects import repository_key
+    from app.popularity import recompute_popularity
+    from app.bulk_load import bulk_insert
+    from app.versioning import parse_version
+    from sqlalchemy import func, text
+
+    rng = random.Random(seed)
+    # Separate stream, so libraries and versions stay the same as catalogs generated without dependencies
+    dependency_rng = random.Random(seed + 1)
+    now = datetime.utcnow()
+
+    # Make sure every category the collectors know about exists
+    existing = {c.name for c in Category.query.all()}
+    for name in EXTRA_CATEGORIES:
+        if name not in existing:
+            db.session.add(Category(name=name, category_type='functionality'))
+    db.session.commit()
+
+    category_ids = [c.id for c in Category.query.order_by(Category.id).all()]
+    languages = list(LANGUAGE_WEIGHTS)
+    language_weights = list(LANGUAGE_WEIGHTS.values())
+
+    next_id = (db.session.query(func.max(Library.id)).scalar() or 0) + 1
+    counts = {'libraries': 0, 'versions': 0, 'category_links': 0, 'dependencies': 0}
+
+    # (id, normalised name) of the libraries generated so far, per language
+    generated = {language: [] for language in languages}
+
+    for start in range(0, size, CHUNK_SIZE):
+        library_rows = []
+        version_rows = []
+        link_rows = []
+        dependency_rows = []
+
+        for library_id in range(next_id + start, next_id + min(start + CHUNK_SIZE, size)):
+            language = rng.choices(languages, language_weights)[0]
+            name = f"{rng.choice(NAME_PREFIXES)}{rng.choice(NAME_SUFFIXES)}-{library_id}"
+
+            # Popularity is heavy-tailed: a few huge projects, a long tail of small ones
+            downloads = 0 if language == 'Java' else int(rng.paretovariate(1.2) * 500)
+            stars = int(rng.paretovariate(1.1) * 20)
+            last_update = now - timedelta(days=rng.expovariate(1 / 120), seconds=rng.randint(0, 86400))
+
+            version_count = rng.randint(1, max_versions)
+            major, minor, patch = 0, rng.randint(0, 5), 0
+            release_date = last_update - timedelta(days=30 * version_count)
+            version_number = ''
+
+            for _ in range(version_count):
+                roll = rng.random()
+                if roll < 0.1:
+                    major, minor, patch = major + 1, 0, 0
+                elif roll < 0.4:
+                    minor, patch = minor + 1, 0
+                else:
+                    patch += 1
+
+                version_number = f"{major}.{minor}.{patch}"
+                release_date = min(last_update, release_date + timedelta(days=rng.randint(1, 60)))
+                sort_key, is_prerelease = parse_version(version_number, language)
+                version_rows.append({
+                    'library_id': library_id,
+                    'version_number': version_number,
+                    'release_date': release_date,
+                    'release_notes': f"Version {version_number} release with improvements and bug fixes.",
+                    'sort_key': sort_key,
+                    'is_prerelease': is_prerelease
+                })
+
+            # Every tenth library comes from a repository that publishes several packages
+            if library_id % 10:
+                repository_url = f"https://github.com/synthetic-{library_id % 5000}/{name}"
+            else:
+                repository_url = f"https://github.com/synthetic-project-{library_id // 10 % 2000}/core"
+
+            library_rows.append({
+                'id': library_id,
+                'name': name,
+                'description': ' '.join(rng.choices(DESCRIPTION_WORDS, k=rng.randint(5, 12))),
+                'language': language,
+                'current_version': version_number,
+                'last_update': last_update,
+                'repository_url': repository_url,
+                'repository_key': repository_key(repository_url),
+                'documentation_url': f"https://docs.example.com/{name}",
+                'package_url': f"https://packages.example.com/{language.lower()}/{name}",
+                'monthly_downloads': downloads,
+                'github_stars': stars
+            })
+
+            for category_id in rng.sample(category_ids, rng.randint(1, 4)):
+                link_rows.append({'library_id': library_id, 'category_id': category_id})
+
+            # Depend on earlier packages, favouring the oldest, so a few end up with most of the dependents
+            earlier = generated[language]
+            dependencies = {}
+            for _ in range(dependency_rng.randint(0, max_dependencies) if earlier else 0):
+                dependency_id, dependency_name = earlier[int(len(earlier) * dependency_rng.random() ** 3)]
+                dependencies[dependency_name] = dependency_id
+            for dependency_name, dependency_id in dependencies.items():
+                dependency_rows.append({'library_id': library_id, 'dependency_name': dependency_name,
+                                        'dependency_id': dependency_id})
+            earlier.append((library_id, normalise_name(name, language)))
+
+        # COPY on PostgreSQL, executemany elsewhere
+        bulk_insert(Library.__table__, library_rows)
+        bulk_insert(Version.__table__, version_rows)
+        bulk_insert(library_categories, link_rows)
+        bulk_insert(LibraryDependency.__table__, dependency_rows)
+        db.session.commit()
+
+        counts['libraries'] += len(library_rows)
+        counts['versions'] += len(version_rows)
+        counts['category_links'] += len(link_rows)
+        counts['dependencies'] += len(dependency_rows)
+        logger.info(f"Inserted {counts['libraries']}/{size} synthetic libraries")
+
+    # Explicit ids bypass PostgreSQL's id sequence; move it past them
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text("SELECT setval(pg_get_serial_sequence('library', 'id'), (SELECT MAX(id) FROM library))"))
+        db.session.commit()
+
+    recompute_importance()
+    recompute_popularity()
+    db.session.commit()
+
+    rebuild_aggregates()
+
+    return counts
+
+def parse_size(value):
+    """Parse a catalog size given as a number or one of the named SIZES"""
+    return SIZES.get(value.lower()) or int(value)
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic GenAIPulse catalog')
+    parser.add_argument('--size', default='10k', help='Number of libraries, or one of: ' + ', '.join(SIZES))
+    parser.add_argument('--database', help='Database URI (defaults to DATABASE_URI)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--max-versions', type=int, default=8, help='Maximum versions per library')
+    parser.add_argument('--max-dependencies', type=int, default=6, help='Maximum dependencies per library')
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ['DATABASE_URI'] = args.database
+
+    from app import create_app
+    app = create_app()
+
+    with app.app_context():
+        started = time.perf_counter()
+        counts = generate_catalog(parse_size(args.size), seed=args.seed, max_versions=args.max_versions,
+                                  max_dependencies=args.max_dependencies)
+        elapsed = time.perf_counter() - started
+
+    logger.info(f"Generated {counts['libraries']} libraries, {counts['versions']} versions, "
+                f"{counts['category_links']} category links and {counts['dependencies']} dependencies in {elapsed:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,510 @@
+"""
+Mock package registry server
+
+Serves PyPI, npm, NuGet, Maven Central and GitHub API responses from one
+local HTTP server so the collectors can run without the internet. Each
+registry lives under its own path prefix (/pypi, /npm, /nuget, /maven,
+/github); registry_env() gives the settings that point the data sources at
+it. Responses have the shape of the real APIs and are generated
+deterministically from the requested names, or read from a directory of
+recorded payloads. Latency, error rate and rate limiting are configurable.
+
+Usage:
+    python -m benchmarks.mock_registry --port 8900 --latency-ms 50 --error-rate 0.01 --rate-limit 1000
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+SOURCES = ('pypi', 'npm', 'nuget', 'maven', 'github')
+
+# Fixed point the generated release dates count back from, so payloads are stable
+EPOCH = datetime(2025, 1, 1)
+
+KEYWORDS = ['machine-learning', 'deep-learning', 'nlp', 'vision', 'llm', 'neural', 'speech', 'generative']
+
+# Repositories created per day in date-filtered GitHub searches
+GITHUB_REPOS_PER_DAY = 3
+
+# Packages the mock PyPI projects depend on, most of them collected too
+PYPI_DEPENDENCIES = ['numpy', 'scipy', 'pandas', 'torch', 'tensorflow', 'transformers', 'requests', 'tqdm']
+
+class MockRegistry:
+    """
+    Threaded HTTP server imitating the registries the collectors read from
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind, 0 for any free port
+        latency_ms (float): Delay added to every response
+        jitter_ms (float): Random +/- variation of the delay
+        error_rate (float): Fraction of requests answered with 503
+        rate_limit (int): Requests allowed per source per window, None for unlimited
+        rate_limit_window (float): Rate limit window in seconds
+        search_size (int): Most results returned by a search
+        versions (int): Releases in each package's history
+        payload_dir (str): Directory of recorded payloads served in place of generated ones
+        seed (int): Random seed for latency jitter and errors
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0, jitter_ms=0, error_rate=0.0, rate_limit=None,
+                 rate_limit_window=60.0, search_size=100, versions=20, payload_dir=None, seed=42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.search_size = search_size
+        self.versions = versions
+        self.payload_dir = payload_dir
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._thread = None
+        self.reset_counts()
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.registry = self
+
+    @property
+    def url(self):
+        """Base URL of the server"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve requests on the calling thread until interrupted"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """Shut the server down"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counts(self):
+        """Zero the per-source request counters"""
+        with self._lock:
+            self.counts = {source: {'requests': 0, 'errors': 0, 'rate_limited': 0, 'bytes': 0} for source in SOURCES}
+
+    def snapshot(self):
+        """Copy of the per-source request counters"""
+        with self._lock:
+            return {source: dict(counts) for source, counts in self.counts.items()}
+
+    def respond(self, source, path, query):
+        """
+        Decide the response to a request
+
+        Returns:
+            tuple: (status, headers dict, body bytes)
+        """
+        with self._lock:
+            self.counts[source]['requests'] += 1
+            headers = self._rate_limit_headers(source)
+            limited = headers.get('X-RateLimit-Remaining') == '0' and self._over_limit(source)
+            failed = not limited and self._rng.random() < self.error_rate
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+        if delay:
+            time.sleep(delay)
+
+        if limited:
+            with self._lock:
+                self.counts[source]['rate_limited'] += 1
+            # GitHub answers 403 with a message; the registries use 429
+            status = 403 if source == 'github' else 429
+            retry_after = max(1, int(headers['X-RateLimit-Reset']) - int(time.time()))
+            return status, dict(headers, **{'Retry-After': str(retry_after)}), \
+                json.dumps({'message': 'API rate limit exceeded'}).encode()
+
+        if failed:
+            with self._lock:
+                self.counts[source]['errors'] += 1
+            return 503, headers, json.dumps({'message': 'Service unavailable'}).encode()
+
+        payload = self._recorded_payload(source, path, query)
+        if payload is None:
+            payload = build_payload(source, path, query, self.search_size, self.versions)
+
+        if payload is None:
+            return 404, headers, json.dumps({'message': 'Not found'}).encode()
+
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        with self._lock:
+            self.counts[source]['bytes'] += len(body)
+        return 200, headers, body
+
+    def _rate_limit_headers(self, source):
+        """Count the request against its source's window and describe the window"""
+        if not self.rate_limit:
+            return {}
+
+        now = time.monotonic()
+        started, used = self._windows.get(source, (now, 0))
+        if now - started >= self.rate_limit_window:
+            started, used = now, 0
+        used += 1
+        self._windows[source] = (started, used)
+
+        reset = started + self.rate_limit_window - now
+        return {
+            'X-RateLimit-Limit': str(self.rate_limit),
+            'X-RateLimit-Remaining': str(max(0, self.rate_limit - used)),
+            'X-RateLimit-Reset': str(int(time.time() + reset))
+        }
+
+    def _over_limit(self, source):
+        """Whether the source's window is already used up"""
+        return self._windows[source][1] > self.rate_limit
+
+    def _recorded_payload(self, source, path, query):
+        """Recorded response body for a request, if one was saved in payload_dir"""
+        if not self.payload_dir:
+            return None
+
+        name = quote(path + ('?' + query if query else ''), safe='') + '.json'
+        file_path = os.path.join(self.payload_dir, source, name)
+        if not os.path.exists(file_path):
+            return None
+
+        with open(file_path, 'rb') as payload_file:
+            return payload_file.read()
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes requests to the registry named by the first path segment"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        source, _, path = parts.path.lstrip('/').partition('/')
+
+        if source not in SOURCES:
+            status, headers, body = 404, {}, b'{}'
+        else:
+            status, headers, body = self.server.registry.respond(source, unquote(path), parts.query)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def registry_env(base_url):
+    """Settings that point every data source at a mock registry"""
+    return {
+        'PYPI_API_URL': f"{base_url}/pypi",
+        'NPM_API_URL': f"{base_url}/npm",
+        'NUGET_API_URL': f"{base_url}/nuget",
+        'MAVEN_API_URL': f"{base_url}/maven/solrsearch/select",
+        'GITHUB_API_URL': f"{base_url}/github"
+    }
+
+def build_payload(source, path, query, search_size=100, versions=20):
+    """
+    Generate the response body of a registry request
+
+    Args:
+        source (str): One of SOURCES
+        path (str): Request path below the source prefix
+        query (str): Raw query string
+        search_size (int): Most results returned by a search
+        versions (int): Releases in each package's history
+
+    Returns:
+        dict: JSON-serialisable body, or None for unknown paths
+    """
+    params = {key: values[0] for key, values in parse_qs(query).items()}
+
+    if source == 'pypi' and path.endswith('/json'):
+        return _pypi_project(path[:-len('/json')], versions)
+
+    if source == 'npm':
+        if path == '-/v1/search':
+            size = min(int(params.get('size', 20)), search_size)
+            return {'objects': [{'package': _npm_summary(name), 'score': {'final': 0.5}}
+                                for name in _names(params.get('text', ''), 'js', size)],
+                    'total': size}
+        return _npm_packument(path, versions)
+
+    if source == 'nuget':
+        if path == 'query':
+            size = min(int(params.get('take', 20)), search_size)
+            return {'totalHits': size,
+                    'data': [_nuget_summary(name) for name in _names(params.get('q', ''), 'net', size)]}
+        if path.startswith('registration/') and path.endswith('/index.json'):
+            return _nuget_registration(path.split('/')[1], versions)
+        return None
+
+    if source == 'maven' and path == 'solrsearch/select':
+        return _maven_search(params, search_size, versions)
+
+    if source == 'github':
+        return _github(path, params, search_size)
+
+    return None
+
+def _seed(name):
+    """Stable integer derived from a name"""
+    return int(hashlib.md5(name.encode()).hexdigest()[:8], 16)
+
+def _names(keyword, suffix, count):
+    """Package names returned by a search"""
+    slug = '-'.join(keyword.lower().split()) or 'package'
+    return [f"{slug}-{suffix}-{i}" for i in range(count)]
+
+def _history(name, count):
+    """(version, release datetime) pairs of a package, oldest first"""
+    seed = _seed(name)
+    released = EPOCH - timedelta(days=30 * count + seed % 365)
+    history = []
+    for i in range(count):
+        released += timedelta(days=1 + (seed >> (i % 16)) % 45, seconds=seed % 86400)
+        history.append((f"{1 + i // 10}.{i % 10}.{seed % 7}", released))
+    return history
+
+def _keywords(name):
+    """A few AI keywords for a package"""
+    seed = _seed(name)
+    return [KEYWORDS[(seed >> shift) % len(KEYWORDS)] for shift in (0, 5, 10)]
+
+def _dependencies(name, pool=None):
+    """
+    A few dependencies of a package: from the pool if given, otherwise
+    search results ranked before it, so the graph links collected packages
+    """
+    seed = _seed(name)
+    if pool is None:
+        prefix, _, position = name.rpartition('-')
+        if not position.isdigit() or position == '0':
+            return []
+        pool = [f"{prefix}-{i}" for i in range(int(position))]
+
+    picked = []
+    for shift in (0, 4, 8):
+        candidate = pool[(seed >> shift) % len(pool)]
+        if candidate != name and candidate not in picked:
+            picked.append(candidate)
+    return picked
+
+def _pypi_project(name, versions):
+    """PyPI JSON API project document"""
+    history = _history(name, versions)
+    latest, released = history[-1]
+    return {
+        'info': {
+            'name': name,
+            'summary': f"Mock Python package {name}",
+            'version': latest,
+            'author': 'Mock Author',
+            'author_email': 'mock@example.com',
+            'home_page': f"https://example.com/{name}",
+            'license': 'MIT',
+            'keywords': ', '.join(_keywords(name)),
+            'package_url': f"https://pypi.org/project/{name}/",
+            'release_date': released.strftime('%Y-%m-%dT%H:%M:%S'),
+            'requires_dist': [f"{dependency}>=1.0" for dependency in _dependencies(name, PYPI_DEPENDENCIES)] +
+                             ["pytest; extra == 'test'"],
+            'project_urls': {
+                'Source': f"https://github.com/mock-org/{name}",
+                'Documentation': f"https://docs.example.com/{name}"
+            }
+        },
+        'releases': {
+            version: [{'upload_time': date.strftime('%Y-%m-%dT%H:%M:%S')}] for version, date in history
+        }
+    }
+
+def _npm_summary(name):
+    """npm search result entry"""
+    return {
+        'name': name,
+        'description': f"Mock JavaScript package {name}",
+        'version': _history(name, 1)[-1][0],
+        'links': {'npm': f"https://www.npmjs.com/package/{name}"}
+    }
+
+def _npm_packument(name, versions):
+    """npm registry package document"""
+    history = _history(name, versions)
+    latest = history[-1][0]
+    times = {version: date.strftime('%Y-%m-%dT%H:%M:%S.000Z') for version, date in history}
+    return {
+        'name': name,
+        'dist-tags': {'latest': latest},
+        'versions': {version: {
+            'name': name,
+            'version': version,
+            'description': f"Mock JavaScript package {name}",
+            'homepage': f"https://example.com/{name}",
+            'license': 'MIT',
+            'keywords': _keywords(name),
+            'dependencies': {dependency: '^1.0.0' for dependency in _dependencies(name)},
+            'repository': {'type': 'git', 'url': f"git+https://github.com/mock-org/{name.replace('@', '').replace('/', '-')}.git"}
+        } for version, _ in history},
+        'time': dict(times, created=history[0][1].isoformat() + 'Z', modified=history[-1][1].isoformat() + 'Z')
+    }
+
+def _nuget_summary(name):
+    """NuGet search result entry"""
+    return {
+        'id': name,
+        'version': _history(name, 1)[-1][0],
+        'description': f"Mock .NET package {name} for ml and nlp",
+        'totalDownloads': _seed(name) % 5000000,
+        'projectUrl': f"https://github.com/mock-org/{name}"
+    }
+
+def _nuget_registration(package_id, versions):
+    """NuGet registration index with the pages inlined"""
+    return {'count': 1, 'items': [{'items': [{'catalogEntry': {
+        'id': package_id,
+        'version': version,
+        'published': date.isoformat() + '+00:00',
+        'description': f"Mock .NET package {package_id}",
+        'authors': 'Mock Author',
+        'projectUrl': f"https://github.com/mock-org/{package_id}",
+        'tags': _keywords(package_id)
+    }} for version, date in _history(package_id, versions)]}]}
+
+def _maven_search(params, search_size, versions):
+    """Maven Central solrsearch response, for artifact or gav (version) queries"""
+    query = params.get('q', '')
+    rows = min(int(params.get('rows', 20)), search_size if params.get('core') != 'gav' else versions)
+
+    if params.get('core') == 'gav':
+        terms = dict(term.split(':', 1) for term in query.split(' AND ') if ':' in term)
+        group_id, artifact_id = terms.get('g', 'mock'), terms.get('a', 'mock')
+        history = _history(f"{group_id}:{artifact_id}", versions)[-rows:]
+        docs = [{'g': group_id, 'a': artifact_id, 'v': version, 'timestamp': int(date.timestamp() * 1000)}
+                for version, date in history]
+    else:
+        docs = [{
+            'id': f"org.mock:{name}",
+            'g': 'org.mock',
+            'a': name,
+            'latestVersion': _history(name, 1)[-1][0],
+            'versionCount': versions,
+            'description': f"Mock Java artifact {name}"
+        } for name in _names(query, 'java', rows)]
+
+    return {'response': {'numFound': len(docs), 'docs': docs}}
+
+def _github(path, params, search_size):
+    """GitHub REST API repository, release, commit and search responses"""
+    parts = path.split('/')
+
+    if parts[:2] == ['search', 'repositories']:
+        created = re.search(r'created:(\d{4}-\d{2}-\d{2})\.\.(\d{4}-\d{2}-\d{2})', params.get('q', ''))
+        if created:
+            return _github_search_slice(params, *created.groups())
+        size = min(int(params.get('per_page', 30)), search_size)
+        return {'total_count': size, 'items': [_github_repo('mock-org', name)
+                                               for name in _names('repo', 'gh', size)]}
+
+    if len(parts) < 3 or parts[0] != 'repos':
+        return None
+
+    owner, repo = parts[1], parts[2]
+    if len(parts) == 3:
+        return _github_repo(owner, repo)
+
+    history = _history(f"{owner}/{repo}", 5)
+    if parts[3] == 'releases':
+        return [{'tag_name': f"v{version}", 'published_at': date.strftime('%Y-%m-%dT%H:%M:%SZ')}
+                for version, date in reversed(history)]
+    if parts[3] == 'commits':
+        committed = datetime.utcnow() - timedelta(days=_seed(repo) % 40)
+        return [{'sha': hashlib.sha1(repo.encode()).hexdigest(),
+                 'commit': {'committer': {'date': committed.strftime('%Y-%m-%dT%H:%M:%SZ')}}}]
+    return None
+
+def _github_search_slice(params, start, end):
+    """
+    Search results for a creation-date range: GITHUB_REPOS_PER_DAY repositories
+    were created on each day, and like GitHub only the first 1000 can be listed
+    """
+    topic = (re.search(r'topic:(\S+)', params['q']) or [None, 'ai'])[1]
+    first_day = datetime.strptime(start, '%Y-%m-%d')
+    days = (datetime.strptime(end, '%Y-%m-%d') - first_day).days + 1
+    total = max(0, days) * GITHUB_REPOS_PER_DAY
+
+    per_page = min(int(params.get('per_page', 30)), 100)
+    offset = (int(params.get('page', 1)) - 1) * per_page
+    listed = range(offset, min(offset + per_page, total, 1000))
+
+    items = []
+    for index in listed:
+        day = first_day + timedelta(days=index // GITHUB_REPOS_PER_DAY)
+        repo = _github_repo(f"mock-{topic}", f"{topic}-{day:%Y%m%d}-{index % GITHUB_REPOS_PER_DAY}")
+        repo['created_at'] = day.strftime('%Y-%m-%dT%H:%M:%SZ')
+        items.append(repo)
+
+    return {'total_count': total, 'incomplete_results': False, 'items': items}
+
+def _github_repo(owner, repo):
+    """GitHub repository document"""
+    seed = _seed(f"{owner}/{repo}")
+    return {
+        'name': repo,
+        'full_name': f"{owner}/{repo}",
+        'description': f"Mock repository {repo}",
+        'stargazers_count': seed % 50000,
+        'forks_count': seed % 5000,
+        'open_issues_count': seed % 500,
+        'watchers_count': seed % 50000,
+        'html_url': f"https://github.com/{owner}/{repo}",
+        'language': 'Python',
+        'created_at': (EPOCH - timedelta(days=seed % 2000)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve mock PyPI, npm, NuGet, Maven and GitHub APIs')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8900, help='Port to bind')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Random +/- variation of the delay')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with 503')
+    parser.add_argument('--rate-limit', type=int, default=None, help='Requests per source per window')
+    parser.add_argument('--rate-limit-window', type=float, default=60, help='Rate limit window in seconds')
+    parser.add_argument('--search-size', type=int, default=100, help='Most results per search')
+    parser.add_argument('--versions', type=int, default=20, help='Releases per package')
+    parser.add_argument('--payload-dir', help='Directory of recorded payloads to serve')
+    args = parser.parse_args()
+
+    registry = MockRegistry(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit,
+                            args.rate_limit_window, args.search_size, args.versions, args.payload_dir)
+
+    for name, value in registry_env(registry.url).items():
+        print(f"{name}={value}")
+
+    registry.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+import os
+
+# Run `flask --app wsgi init-db` once before starting with APP_ENV=production
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8001')
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+
+# Load and warm the app once in the master; workers fork from it
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+def post_fork(server, worker):
+    """Give each worker its own database connections instead of the parent's"""
+    from app import db
+    from wsgi import app
+
+    with app.app_context():
+        db.engine.dispose(close=False)
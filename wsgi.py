@@ -0,0 +1,5 @@
+from app import create_app, warm_up
+
+# Entry point for gunicorn; see gunicorn.conf.py
+app = create_app()
+warm_up(app)